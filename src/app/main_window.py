@@ -1,15 +1,24 @@
 import tkinter as tk
 from tkinter import font as tkfont
-from PIL import Image, ImageTk
 import random
 import os
 import subprocess
 import sys
 
 from src.utils import resource_path
-from src.ui.settings_window import SettingsWindow
+from src.config.settings import save_capture_target
+from src.core.assets import assets
+from src.core.targets import TARGET_MONITOR, TARGET_WINDOW, TARGET_REGION, DEFAULT_CAPTURE_TARGET
+from src.ui.animation import animation_scheduler
 from src.ui.theme import theme
 
+# Caixa (largura, altura) em que o logo do cabeçalho é reduzido.
+LOGO_BOX = (200, 60)
+
+# Bolhas: ~30 fps, e um quadro deve custar bem menos que o intervalo.
+BUBBLE_INTERVAL_MS = 33
+BUBBLE_BUDGET_MS = 8
+
 class Bubble:
     def __init__(self, canvas, width, height):
         self.canvas, self.width, self.height = canvas, width, height
@@ -21,9 +30,9 @@ class Bubble:
         self.color = random.choice(bubble_colors)
         self.id = self.canvas.create_oval(self.x-self.radius, self.y-self.radius, self.x+self.radius, self.y+self.radius, fill=self.color, outline="")
 
-    def move(self):
-        self.x += self.dx
-        self.y += self.dy
+    def move(self, scale=1.0):
+        self.x += self.dx * scale
+        self.y += self.dy * scale
         if not self.radius < self.x < self.width - self.radius:
             self.dx *= -1
         if not self.radius < self.y < self.height - self.radius:
@@ -40,19 +49,20 @@ class MainApplication(tk.Frame):
         self.recording_module = recording_module
         self.app_config = app_config
         self.record_all_screens_var = tk.BooleanVar(value=False)
+        self.capture_target_var = tk.StringVar(value=self.app_config.get("CaptureTarget", DEFAULT_CAPTURE_TARGET))
         self.configure(bg=theme["window_bg"])
 
         self.canvas = tk.Canvas(self, bg=theme["window_bg"], highlightthickness=0)
         self.canvas.pack(fill="both", expand=True)
         self.bubbles = [Bubble(self.canvas, 1280, 720) for _ in range(20)]
         self.create_widgets()
-        self.animate_bubbles()
+        # Decorativa: o agendador a para enquanto a janela está oculta ou há captura/gravação.
+        animation_scheduler(self.parent).add("bubbles", self.animate_bubbles, BUBBLE_INTERVAL_MS, BUBBLE_BUDGET_MS)
         self.parent.bind("<Configure>", self.on_window_resize)
 
-    def animate_bubbles(self):
+    def animate_bubbles(self, scale=1.0):
         for bubble in self.bubbles:
-            bubble.move()
-        self.after(33, self.animate_bubbles)
+            bubble.move(scale)
 
     def create_widgets(self):
         self.main_card_frame = tk.Frame(self.canvas, bg=theme["card_bg"], bd=1, relief="solid")
@@ -60,9 +70,8 @@ class MainApplication(tk.Frame):
         header_container = tk.Frame(self.main_card_frame, bg=theme["card_bg"], padx=20, pady=15)
         header_container.pack(fill="x", expand=True, pady=(10,0))
         try:
-            logo_image = Image.open(resource_path("assets/logo_guara.png"))
-            logo_image.thumbnail((200, 60))
-            self.logo_tk = ImageTk.PhotoImage(logo_image)
+            logo_path = resource_path("assets/logo_guara.png")
+            self.logo_tk = assets.photo(logo_path, assets.thumbnail(logo_path, LOGO_BOX).size)
             tk.Label(header_container, image=self.logo_tk, bg=theme["card_bg"]).pack(pady=(0,10))
         except Exception as e:
             # Se qualquer erro ocorrer, ele não quebrará o app, mas nos dirá o que aconteceu
@@ -90,6 +99,25 @@ class MainApplication(tk.Frame):
         )
         record_all_checkbox.pack(pady=(0, 10))
 
+        # Alvo da captura e da gravação: menos pixels por quadro em janelas e regiões.
+        target_frame = tk.Frame(content_container, bg=theme["card_bg"])
+        target_frame.pack(pady=(0, 10))
+        tk.Label(target_frame, text="Capturar:", font=("Segoe UI", 9), bg=theme["card_bg"], fg=theme["text_secondary"]).pack(side=tk.LEFT, padx=(0, 5))
+        for value, text in [(TARGET_MONITOR, "Tela inteira"), (TARGET_WINDOW, "Janela sob o cursor"), (TARGET_REGION, "Região desenhada")]:
+            tk.Radiobutton(
+                target_frame,
+                text=text,
+                value=value,
+                variable=self.capture_target_var,
+                command=self.on_capture_target_changed,
+                bg=theme["card_bg"],
+                fg=theme["text_secondary"],
+                activebackground=theme["card_bg"],
+                activeforeground=theme["text_primary"],
+                selectcolor=theme["window_bg"],
+                font=("Segoe UI", 9)
+            ).pack(side=tk.LEFT)
+
         for btn in [btn1, btn2]:
             btn.bind("<Enter>", lambda e: e.widget.config(bg=theme["button_primary_hover"]))
             btn.bind("<Leave>", lambda e: e.widget.config(bg=theme["button_primary_bg"]))
@@ -124,10 +152,17 @@ class MainApplication(tk.Frame):
         except Exception as e:
             print(f"Não foi possível abrir a pasta de evidências: {e}")
 
+    def on_capture_target_changed(self):
+        target = self.capture_target_var.get()
+        self.app_config["CaptureTarget"] = target
+        save_capture_target(self.app_config["config_parser_obj"], target)
+
     def open_settings(self):
+        from src.ui.settings_window import SettingsWindow  # importado aqui: o módulo de áudio traz o PyAV
         SettingsWindow(self.parent, self.app_config, self.on_settings_closed)
 
     def on_settings_closed(self, new_save_path):
         self.app_config["DefaultSaveLocation"] = new_save_path
         self.capture_module.save_path = new_save_path
         self.recording_module.save_path = new_save_path
+        self.recording_module.update_replay()
@@ -0,0 +1,96 @@
+import builtins
+import logging
+import sys
+import threading
+import time
+
+PROFILE_FLAG = "--profile-startup"
+# Módulos listados no relatório (os mais caros, pelo tempo total com os que eles importam).
+PROFILE_TOP_MODULES = 30
+
+
+class StartupProfiler:
+    """
+    Mede a abertura do aplicativo (`--profile-startup`): o tempo de cada
+    importação, total (com as importações que ela dispara) e próprio, e
+    marcos como "janela visível", contados a partir da criação do perfil.
+
+    Envolve o `__import__` enquanto está instalado; sem a flag, nada é
+    instalado e o custo é zero.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports = []  # (módulo, thread, profundidade, total, próprio), na ordem em que terminaram
+        self.marks = []  # (nome, segundos desde o início)
+        self._original_import = None
+        self._local = threading.local()
+
+    @classmethod
+    def from_argv(cls, argv):
+        """Um perfil já instalado se `argv` tem a flag; None sem ela."""
+        if PROFILE_FLAG not in argv:
+            return None
+        profiler = cls()
+        profiler.install()
+        return profiler
+
+    def install(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.started))
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level == 0 and name in sys.modules and not fromlist:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        target = name
+        if level:
+            package = (globals or {}).get("__package__") or ""
+            base = package.rsplit(".", level - 1)[0]
+            target = f"{base}.{name}" if name else base
+        before = set(sys.modules)
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            new = sys.modules.keys() - before
+            if new:
+                # `from pacote import submódulo`: o módulo medido é o submódulo carregado, não o pacote.
+                if target not in new:
+                    target = min([module for module in new if module.startswith(f"{target}.")] or new, key=len)
+                self.imports.append((target, threading.current_thread().name, len(stack), elapsed, elapsed - children))
+
+    def report(self) -> str:
+        lines = ["Perfil de inicialização:"]
+        for name, at in self.marks:
+            lines.append(f"  {name}: {at * 1000:.0f} ms")
+        main_thread = threading.main_thread().name
+        total = sum(elapsed for _, thread, depth, elapsed, _ in self.imports if thread == main_thread and depth == 0)
+        lines.append(f"  importações na thread principal: {total * 1000:.0f} ms ({len(self.imports)} módulos)")
+        lines.append(f"  {'módulo':<40} {'total':>9} {'próprio':>9}  thread")
+        for name, thread, _, elapsed, own in sorted(self.imports, key=lambda item: -item[3])[:PROFILE_TOP_MODULES]:
+            lines.append(f"  {name:<40} {elapsed * 1000:>7.1f}ms {own * 1000:>7.1f}ms  {thread}")
+        return "\n".join(lines)
+
+    def finish(self, name="janela visível"):
+        """Marca o fim da abertura, para de medir e publica o relatório (saída padrão e log)."""
+        self.mark(name)
+        self.uninstall()
+        report = self.report()
+        print(report, flush=True)
+        logging.info(report)
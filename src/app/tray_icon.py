@@ -3,6 +3,7 @@ from pystray import MenuItem as item, Icon as icon, Menu
 from PIL import Image
 import os
 
+from src.core.assets import assets
 from src.utils import resource_path
 from src.ui.theme import theme
 
@@ -26,7 +27,7 @@ def setup_tray_icon(root, capture_module, recording_module, app_config):
             print(f"Não foi possível abrir a pasta de evidências: {e}")
 
     try:
-        image = Image.open(resource_path("assets/sentinela.ico"))
+        image = assets.image(resource_path("assets/sentinela.ico"))
     except FileNotFoundError:
         # Create a placeholder image with the primary theme color
         image = Image.new('RGB', (64, 64), color = theme["primary"])
@@ -0,0 +1,199 @@
+"""
+Linha de comando do Sentinela, sem interface gráfica (não importa o tkinter):
+para automação, CI e gravação remota em máquinas sem Tk.
+
+    python -m src.cli screenshot --monitor 1 --out tela.png
+    python -m src.cli record --preset balanced --duration 60s --monitor 1 --audio mic,system
+    python -m src.cli bench --preset balanced --resolution 1080p
+
+`screenshot` e `record` imprimem o resultado em JSON na saída padrão; o log
+vai para a saída de erro. Usam o config.ini do aplicativo (pasta de destino,
+formato, segmentos, backend de captura), com as opções da linha de comando
+por cima.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+
+# Código de saída de uma gravação que terminou sem nenhum arquivo.
+EXIT_FAILED = 1
+
+AUDIO_SOURCES = ("mic", "system")
+
+_DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(text) -> float:
+    """'90', '90s', '2m', '1h', '1m30s' -> segundos."""
+    parts = re.findall(r"(\d+(?:\.\d+)?)\s*([smh]?)", text.strip().lower())
+    if not parts or re.sub(r"[\d.\s smh]", "", text.lower()):
+        raise argparse.ArgumentTypeError(f"duração inválida: '{text}' (exemplos: 90s, 2m, 1m30s)")
+    return sum(float(value) * _DURATION_UNITS[unit] for value, unit in parts)
+
+
+def parse_audio(text) -> set[str]:
+    """'mic,system' -> {'mic', 'system'}; 'none' ou vazio -> nenhum."""
+    sources = {source.strip() for source in text.lower().split(",") if source.strip()} - {"none"}
+    unknown = sources - set(AUDIO_SOURCES)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"fonte de áudio desconhecida: {', '.join(sorted(unknown))} "
+                                         f"(use {', '.join(AUDIO_SOURCES)})")
+    return sources
+
+
+def _load_config(args):
+    from src.config.settings import load_app_config
+    from src.core.backends import grabber
+
+    app_config = load_app_config()
+    if args.backend:
+        app_config["CaptureBackend"] = args.backend
+    grabber.configure(app_config["CaptureBackend"])
+    return app_config
+
+
+def _check_monitor(monitors, index):
+    """`index` segue o mss: 1 é o primeiro monitor e 0, a área de trabalho inteira (todos)."""
+    if index < 0 or index >= len(monitors):
+        raise SystemExit(f"Monitor {index} não existe (há {len(monitors) - 1}).")
+
+
+def _output_base(out, save_path, prefix):
+    """Caminho sem extensão: `out` (pasta ou arquivo) ou <pasta de destino>/<prefixo>_<data>."""
+    name = f"{prefix}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+    if not out:
+        return os.path.join(save_path, name)
+    if os.path.isdir(out) or out.endswith(os.sep):
+        return os.path.join(out, name)
+    return os.path.splitext(out)[0]
+
+
+def _emit(result):
+    print(json.dumps(result, indent=2, ensure_ascii=False), flush=True)
+
+
+def screenshot(args):
+    from src.core.backends import grabber
+    from src.core.targets import capture_region
+
+    app_config = _load_config(args)
+    backend = grabber.backend()
+    _check_monitor(backend.monitors, args.monitor)
+    region = backend.monitors[args.monitor]
+
+    image = capture_region(backend, region)
+    filename = _output_base(args.out, app_config["DefaultSaveLocation"], "Captura") + ".png"
+    os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+    image.save(filename)
+    grabber.close()
+    _emit({
+        "file": os.path.abspath(filename),
+        "monitor": args.monitor,
+        "region": region,
+        "width": image.width,
+        "height": image.height,
+        "backend": app_config["CaptureBackend"],
+    })
+    return 0
+
+
+def record(args):
+    from src.core.monitors import topology
+    from src.core.presets import get_resolved_preset
+    from src.core.session import RecordingSession
+
+    app_config = _load_config(args)
+    monitors = topology.monitors()
+    _check_monitor(monitors, args.monitor)
+    # Todos os monitores: uma gravação por tela ou a tela estendida, conforme o config.ini.
+    target_monitors = monitors[1:] if args.monitor == 0 else [monitors[args.monitor]]
+    preset = get_resolved_preset(args.preset)
+    base_name = _output_base(args.out, app_config["DefaultSaveLocation"], "Evidencia")
+    os.makedirs(os.path.dirname(os.path.abspath(base_name)), exist_ok=True)
+
+    session = RecordingSession(app_config, preset, target_monitors, base_name,
+                               record_mic="mic" in args.audio, record_system_audio="system" in args.audio)
+    stop_event = threading.Event()
+    # A gravação roda numa thread: a principal só espera o tempo (ou o Ctrl+C) e a para.
+    thread = threading.Thread(target=session.run, args=(stop_event,), name="Gravacao")
+    started = datetime.now()
+    thread.start()
+    try:
+        stop_event.wait(args.duration)
+    except KeyboardInterrupt:
+        logging.info("Gravação interrompida (Ctrl+C).")
+    stop_event.set()
+    thread.join()
+
+    recorded = [name for name in session.output_filenames if os.path.exists(name)]
+    _emit({
+        "files": [os.path.abspath(name) for name in recorded],
+        "preset": args.preset,
+        "monitor": args.monitor,
+        "audio": sorted(args.audio),
+        "started": started.isoformat(timespec="seconds"),
+        "summaries": {
+            os.path.abspath(name): summary.to_dict() if summary else None
+            for name, summary in session.summaries.items()
+        },
+    })
+    return 0 if recorded else EXIT_FAILED
+
+
+def bench(args):
+    from src.core import benchmark
+    benchmark.run(args)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from src.core.backends import available_backends
+    from src.core.benchmark import add_arguments as add_bench_arguments
+    from src.core.presets import PRESET_OPTIONS_ORDER
+
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Sentinela Guará sem interface gráfica.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log detalhado na saída de erro")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    capture = commands.add_parser("screenshot", help="captura um monitor e salva em PNG")
+    capture.add_argument("--monitor", type=int, default=1, help="monitor (1 = o primeiro; 0 = todos)")
+    capture.add_argument("--out", help="arquivo PNG ou pasta (padrão: a pasta de destino do config.ini)")
+    capture.add_argument("--backend", choices=available_backends(), help="backend de captura (padrão: o do config.ini)")
+    capture.set_defaults(handler=screenshot)
+
+    recorder = commands.add_parser("record", help="grava a tela por um tempo fixo (ou até o Ctrl+C)")
+    recorder.add_argument("--preset", default="balanced", choices=PRESET_OPTIONS_ORDER, help="preset de gravação")
+    recorder.add_argument("--duration", type=parse_duration, default=None,
+                          help="duração (90s, 2m, 1m30s; padrão: até o Ctrl+C)")
+    recorder.add_argument("--monitor", type=int, default=1, help="monitor (1 = o primeiro; 0 = todos)")
+    recorder.add_argument("--audio", type=parse_audio, default=set(),
+                          help=f"fontes de áudio separadas por vírgula ({', '.join(AUDIO_SOURCES)}; padrão: nenhuma)")
+    recorder.add_argument("--out", help="arquivo (sem extensão) ou pasta (padrão: a pasta de destino do config.ini)")
+    recorder.add_argument("--backend", choices=available_backends(), help="backend de captura (padrão: o do config.ini)")
+    recorder.set_defaults(handler=record)
+
+    benchmark = commands.add_parser("bench", help="benchmark do pipeline com tela e áudio sintéticos")
+    add_bench_arguments(benchmark)
+    benchmark.set_defaults(handler=bench)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    # `force`: os presets já podem ter logado ao serem importados, o que configura o log padrão.
+    logging.basicConfig(
+        force=True,
+        stream=sys.stderr,
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(threadName)s: %(message)s",
+    )
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
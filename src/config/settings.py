@@ -17,16 +17,46 @@ def load_app_config():
     if not config.has_section('Recording'):
         config.add_section('Recording')
         config.set('Recording', 'Quality', 'balanced') # Default to balanced
+        config.set('Recording', 'HighlightClicks', 'false')
+        config.set('Recording', 'MultiMonitorLayout', 'separate')
+        config.set('Recording', 'OutputFormat', 'fragmented')
+        config.set('Recording', 'SegmentMinutes', '0')
+        config.set('Recording', 'SegmentMegabytes', '0')
 
     if not config.has_section('Audio'):
         config.add_section('Audio')
         config.set('Audio', 'RecordMicrophone', 'false')
         config.set('Audio', 'RecordSystemAudio', 'false')
+        config.set('Audio', 'Mode', 'mix')
+        config.set('Audio', 'MicrophoneGain', '1.0')
+        config.set('Audio', 'SystemGain', '1.0')
 
     if not config.has_section('Hotkeys'):
         config.add_section('Hotkeys')
         config.set('Hotkeys', 'capture', 'F9')
         config.set('Hotkeys', 'record', 'F10')
+        config.set('Hotkeys', 'replay', 'F8')
+
+    if not config.has_section('Capture'):
+        config.add_section('Capture')
+        config.set('Capture', 'Target', 'monitor')
+
+    if not config.has_section('Replay'):
+        config.add_section('Replay')
+        config.set('Replay', 'Enabled', 'false')
+        config.set('Replay', 'Seconds', '30')
+        config.set('Replay', 'MaxMegabytes', '256')
+
+    if not config.has_section('Performance'):
+        config.add_section('Performance')
+        config.set('Performance', 'QueueDepth', '4')
+        config.set('Performance', 'ConversionPath', 'swscale')
+        config.set('Performance', 'DamageDetection', 'true')
+        config.set('Performance', 'LateFramePolicy', 'drop')
+        config.set('Performance', 'AdaptiveQuality', 'true')
+        config.set('Performance', 'AudioOverflow', 'drop_oldest')
+        config.set('Performance', 'AudioBufferSeconds', '2')
+        config.set('Performance', 'CaptureBackend', 'mss')
 
     if not config.has_section('User'):
         config.add_section('User')
@@ -35,11 +65,32 @@ def load_app_config():
     # --- Read values ---
     current_save_location = config.get('Paths', 'DefaultSaveLocation', fallback=DEFAULT_SAVE_LOCATION_FALLBACK)
     recording_quality = config.get('Recording', 'Quality', fallback='balanced')
+    highlight_clicks = config.getboolean('Recording', 'HighlightClicks', fallback=False)
+    multi_monitor_layout = config.get('Recording', 'MultiMonitorLayout', fallback='separate')
+    output_format = config.get('Recording', 'OutputFormat', fallback='fragmented')
+    segment_minutes = config.getfloat('Recording', 'SegmentMinutes', fallback=0)
+    segment_megabytes = config.getfloat('Recording', 'SegmentMegabytes', fallback=0)
+    capture_target = config.get('Capture', 'Target', fallback='monitor')
     record_mic = config.getboolean('Audio', 'RecordMicrophone', fallback=False)
     record_system_audio = config.getboolean('Audio', 'RecordSystemAudio', fallback=False)
+    audio_mode = config.get('Audio', 'Mode', fallback='mix')
+    microphone_gain = config.getfloat('Audio', 'MicrophoneGain', fallback=1.0)
+    system_audio_gain = config.getfloat('Audio', 'SystemGain', fallback=1.0)
     capture_hotkey = config.get('Hotkeys', 'capture', fallback='F9')
     record_hotkey = config.get('Hotkeys', 'record', fallback='F10')
+    replay_hotkey = config.get('Hotkeys', 'replay', fallback='F8')
+    replay_enabled = config.getboolean('Replay', 'Enabled', fallback=False)
+    replay_seconds = config.getfloat('Replay', 'Seconds', fallback=30)
+    replay_max_megabytes = config.getfloat('Replay', 'MaxMegabytes', fallback=256)
     has_run_before = config.getboolean('User', 'has_run_before', fallback=False)
+    pipeline_queue_depth = config.getint('Performance', 'QueueDepth', fallback=4)
+    conversion_path = config.get('Performance', 'ConversionPath', fallback='swscale')
+    damage_detection = config.getboolean('Performance', 'DamageDetection', fallback=True)
+    late_frame_policy = config.get('Performance', 'LateFramePolicy', fallback='drop')
+    adaptive_quality = config.getboolean('Performance', 'AdaptiveQuality', fallback=True)
+    audio_overflow_policy = config.get('Performance', 'AudioOverflow', fallback='drop_oldest')
+    audio_buffer_seconds = config.getfloat('Performance', 'AudioBufferSeconds', fallback=2.0)
+    capture_backend = config.get('Performance', 'CaptureBackend', fallback='mss')
 
     os.makedirs(current_save_location, exist_ok=True)
 
@@ -50,11 +101,32 @@ def load_app_config():
     return {
         "DefaultSaveLocation": current_save_location,
         "RecordingQuality": recording_quality,
+        "HighlightClicks": highlight_clicks,
+        "MultiMonitorLayout": multi_monitor_layout,
+        "OutputFormat": output_format,
+        "SegmentMinutes": segment_minutes,
+        "SegmentMegabytes": segment_megabytes,
+        "CaptureTarget": capture_target,
         "RecordMicrophone": record_mic,
         "RecordSystemAudio": record_system_audio,
+        "AudioMode": audio_mode,
+        "MicrophoneGain": microphone_gain,
+        "SystemAudioGain": system_audio_gain,
         "CaptureHotkey": capture_hotkey,
         "RecordHotkey": record_hotkey,
+        "ReplayHotkey": replay_hotkey,
+        "ReplayEnabled": replay_enabled,
+        "ReplaySeconds": replay_seconds,
+        "ReplayMaxMegabytes": replay_max_megabytes,
         "HasRunBefore": has_run_before,
+        "PipelineQueueDepth": pipeline_queue_depth,
+        "ConversionPath": conversion_path,
+        "DamageDetection": damage_detection,
+        "LateFramePolicy": late_frame_policy,
+        "AdaptiveQuality": adaptive_quality,
+        "AudioOverflowPolicy": audio_overflow_policy,
+        "AudioBufferSeconds": audio_buffer_seconds,
+        "CaptureBackend": capture_backend,
         "config_parser_obj": config
     }
 
@@ -75,3 +147,24 @@ def save_app_config(config_parser_obj, save_path, quality, capture_hotkey, recor
 
     with open(CONFIG_FILE, 'w') as configfile:
         config_parser_obj.write(configfile)
+
+def save_capture_target(config_parser_obj, target):
+    if not config_parser_obj.has_section('Capture'): config_parser_obj.add_section('Capture')
+    config_parser_obj.set('Capture', 'Target', target)
+
+    with open(CONFIG_FILE, 'w') as configfile:
+        config_parser_obj.write(configfile)
+
+def save_replay_enabled(config_parser_obj, enabled):
+    if not config_parser_obj.has_section('Replay'): config_parser_obj.add_section('Replay')
+    config_parser_obj.set('Replay', 'Enabled', str(enabled).lower())
+
+    with open(CONFIG_FILE, 'w') as configfile:
+        config_parser_obj.write(configfile)
+
+def save_audio_mode(config_parser_obj, mode):
+    if not config_parser_obj.has_section('Audio'): config_parser_obj.add_section('Audio')
+    config_parser_obj.set('Audio', 'Mode', mode)
+
+    with open(CONFIG_FILE, 'w') as configfile:
+        config_parser_obj.write(configfile)
@@ -0,0 +1,175 @@
+import collections
+import logging
+from dataclasses import dataclass
+
+from src.core.presets import VideoSettings
+
+# Degraus de velocidade do encoder, do mais lento (melhor compressão) ao mais rápido.
+X264_SPEED_LADDER = ['medium', 'fast', 'faster', 'veryfast', 'superfast', 'ultrafast']
+VP9_SPEED_LADDER = ['4', '6', '8']  # valores de cpu-used
+# Depois da velocidade, o controlador reduz o fps e, por último, a resolução de saída
+# (só quando a gravação já é dividida em segmentos: cada resolução abre outro arquivo).
+FPS_FACTORS = [1.0, 0.8, 2 / 3, 0.5]
+RESOLUTION_FACTORS = [1.0, 0.75, 0.5]
+
+# Acima desta fração do intervalo entre quadros, o encoder está perdendo o tempo real.
+OVERLOAD_RATIO = 0.9
+# Abaixo desta fração (e com a fila vazia), há folga para subir um degrau.
+HEADROOM_RATIO = 0.5
+# Fila do encoder acima desta ocupação também conta como sobrecarga.
+QUEUE_PRESSURE = 0.75
+
+LATENCY_WINDOW = 30
+# Amostras mínimas após uma troca antes de avaliar a latência de novo.
+MIN_SAMPLES = 8
+STEP_DOWN_COOLDOWN = 2.0
+STEP_UP_COOLDOWN = 8.0
+# Se uma subida é desfeita logo em seguida, a próxima tentativa espera o dobro (até o teto).
+MAX_STEP_UP_COOLDOWN = 120.0
+
+
+@dataclass(frozen=True)
+class QualityLevel:
+    """Um degrau de qualidade: velocidade do encoder, fps e resolução de saída."""
+    speed: str | None
+    fps: int
+    resolution: tuple[int, int]
+
+    def describe(self) -> str:
+        speed = f"{self.speed}, " if self.speed else ""
+        return f"{speed}{self.fps} fps, {self.resolution[0]}x{self.resolution[1]}"
+
+
+def encoder_options(video: VideoSettings, speed: str | None) -> dict:
+    """Opções do encoder para o preset com a velocidade do degrau atual."""
+    options = {'crf': str(video.crf), 'preset': video.preset}
+    if speed is None and video.codec == 'libvpx-vp9' and video.preset in VP9_SPEED_LADDER:
+        # Preset calibrado: no VP9 o campo guarda o cpu-used escolhido.
+        speed = video.preset
+    if speed is None:
+        return options
+    if video.codec == 'libx264':
+        options['preset'] = speed
+    elif video.codec == 'libvpx-vp9':
+        options['cpu-used'] = speed
+        options['deadline'] = 'realtime' if int(speed) >= 5 else 'good'
+        options['row-mt'] = '1'
+    return options
+
+
+def _even(value: float) -> int:
+    return max(2, int(value) // 2 * 2)
+
+
+def build_quality_ladder(video: VideoSettings, resolution_steps=True) -> list[QualityLevel]:
+    """Monta os degraus em ordem: primeiro velocidade, depois fps e, com `resolution_steps`, resolução."""
+    width, height = video.resolution
+    if video.codec == 'libx264':
+        start = X264_SPEED_LADDER.index(video.preset) if video.preset in X264_SPEED_LADDER else 0
+        speeds = X264_SPEED_LADDER[start:]
+    elif video.codec == 'libvpx-vp9':
+        if video.preset in VP9_SPEED_LADDER:
+            speeds = VP9_SPEED_LADDER[VP9_SPEED_LADDER.index(video.preset):]
+        else:
+            speeds = [None] + VP9_SPEED_LADDER
+    else:
+        speeds = [None]
+
+    levels = [QualityLevel(speed, video.fps, (width, height)) for speed in speeds]
+    fastest = speeds[-1]
+    for factor in FPS_FACTORS[1:]:
+        fps = max(1, round(video.fps * factor))
+        if fps < levels[-1].fps:
+            levels.append(QualityLevel(fastest, fps, (width, height)))
+    if not resolution_steps:
+        return levels
+    lowest_fps = levels[-1].fps
+    for factor in RESOLUTION_FACTORS[1:]:
+        levels.append(QualityLevel(fastest, lowest_fps, (_even(width * factor), _even(height * factor))))
+    return levels
+
+
+@dataclass
+class QualityStep:
+    """Registro de uma troca de degrau, para o resumo da gravação."""
+    timestamp: float
+    direction: str
+    from_level: str
+    to_level: str
+    reason: str
+
+    def to_dict(self) -> dict:
+        return {
+            "t": round(self.timestamp, 3),
+            "direction": self.direction,
+            "from": self.from_level,
+            "to": self.to_level,
+            "reason": self.reason,
+        }
+
+
+class AdaptiveQualityController:
+    """
+    Observa a latência de codificação por quadro e a ocupação da fila do
+    encoder e desce (ou sobe) um degrau da escada de qualidade quando a
+    gravação deixa de acompanhar o tempo real (ou volta a ter folga).
+    Sem `resolution_steps`, a escada para no menor fps e a resolução nunca muda.
+    """
+    def __init__(self, video: VideoSettings, started_at: float, enabled=True, resolution_steps=True):
+        self.levels = build_quality_ladder(video, resolution_steps)
+        self.index = 0
+        self.enabled = enabled
+        self.started_at = started_at
+        self.steps: list[QualityStep] = []
+
+        self._latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self._last_change = started_at
+        self._step_up_cooldown = STEP_UP_COOLDOWN
+
+    @property
+    def level(self) -> QualityLevel:
+        return self.levels[self.index]
+
+    def start(self, started_at: float):
+        """Fixa o início da gravação, se ele só foi conhecido depois da criação: os degraus contam dele."""
+        self.started_at = started_at
+        self._last_change = started_at
+
+    def observe(self, encode_latency: float, queue_depth: int, queue_capacity: int, now: float) -> QualityLevel | None:
+        """Registra um quadro codificado; retorna o novo degrau quando houver troca."""
+        self._latencies.append(encode_latency)
+        if not self.enabled or len(self._latencies) < MIN_SAMPLES:
+            return None
+
+        frame_interval = 1 / self.level.fps
+        mean_latency = sum(self._latencies) / len(self._latencies)
+        load = mean_latency / frame_interval
+        pressure = queue_depth / queue_capacity if queue_capacity else 0.0
+        since_change = now - self._last_change
+
+        if (load > OVERLOAD_RATIO or pressure >= QUEUE_PRESSURE) and since_change >= STEP_DOWN_COOLDOWN:
+            if self.index < len(self.levels) - 1:
+                reason = f"encode {mean_latency * 1000:.1f} ms ({load:.0%} do quadro), fila {pressure:.0%}"
+                return self._change(self.index + 1, "down", reason, now)
+        elif load < HEADROOM_RATIO and queue_depth == 0 and since_change >= self._step_up_cooldown:
+            if self.index > 0:
+                reason = f"encode {mean_latency * 1000:.1f} ms ({load:.0%} do quadro), fila vazia"
+                return self._change(self.index - 1, "up", reason, now)
+        return None
+
+    def _change(self, new_index, direction, reason, now) -> QualityLevel:
+        old_level = self.level
+        if direction == "down" and self.steps and self.steps[-1].direction == "up" and \
+                now - self._last_change < self._step_up_cooldown:
+            self._step_up_cooldown = min(self._step_up_cooldown * 2, MAX_STEP_UP_COOLDOWN)
+        self.index = new_index
+        self._last_change = now
+        self._latencies.clear()
+
+        step = QualityStep(now - self.started_at, direction, old_level.describe(), self.level.describe(), reason)
+        self.steps.append(step)
+        logging.info(
+            f"Qualidade adaptativa em {step.timestamp:.1f}s: {'reduzida' if direction == 'down' else 'elevada'} "
+            f"de [{step.from_level}] para [{step.to_level}] ({reason})."
+        )
+        return self.level
@@ -0,0 +1,131 @@
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+# Teto (MB) das imagens decodificadas, arrays e PhotoImages guardados; acima dele,
+# os menos usados recentemente saem primeiro.
+ASSET_CACHE_MEGABYTES = 32
+
+
+def _nbytes(value) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    try:
+        return value.width() * value.height() * 4  # PhotoImage: RGBA no Tk
+    except Exception:
+        return 0
+
+
+class AssetCache:
+    """
+    Os recursos do aplicativo (cursor, logo, ícone) decodificados e
+    redimensionados uma vez, por (caminho, tamanho, modo), com descarte LRU.
+    Guarda imagens do PIL, arrays NumPy e PhotoImages, para que nenhuma ação
+    do usuário nem o caminho quente da gravação decodifique PNG ou reamostre
+    com LANCZOS.
+
+    `size` é (largura, altura); um dos lados como None segue o aspect ratio.
+    `mode` é o modo do PIL ("RGBA", "RGB"...), ou None para o do arquivo.
+    """
+    def __init__(self, budget_megabytes=ASSET_CACHE_MEGABYTES):
+        self.budget = budget_megabytes * 1024 * 1024
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # chave -> (valor, bytes)
+        self._bytes = 0
+
+    def cached(self, key, loader):
+        """O valor de `key`, ou `loader()` guardado nela. Erros do loader não são guardados."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+        # Carregado fora do lock: duas threads podem carregar a mesma chave, e a segunda vence.
+        value = loader()
+        size = _nbytes(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.budget and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+        return value
+
+    def image(self, path, size=None, mode=None) -> Image.Image:
+        """A imagem do PIL em `size`/`mode`. Compartilhada: quem for alterá-la usa uma cópia."""
+        if size is None and mode is None:
+            return self.cached((path, None, None), lambda: _decode(path))
+        if size is None:
+            return self.cached((path, None, mode), lambda: self.image(path).convert(mode))
+        size = self._resolve_size(path, size)
+        return self.cached((path, size, mode),
+                           lambda: self.image(path, mode=mode).resize(size, Image.Resampling.LANCZOS))
+
+    def thumbnail(self, path, box, mode=None) -> Image.Image:
+        """A imagem reduzida para caber em `box` (como o `Image.thumbnail`, sem ampliar)."""
+        width, height = self.image(path).size
+        scale = min(1.0, box[0] / width, box[1] / height)
+        return self.image(path, (max(1, round(width * scale)), max(1, round(height * scale))), mode)
+
+    def array(self, path, size=None, mode="RGBA", dtype=np.uint8) -> np.ndarray:
+        """A imagem como array NumPy somente leitura (altura, largura, canais)."""
+        resolved = self._resolve_size(path, size) if size else None
+
+        def load():
+            array = np.asarray(self.image(path, resolved, mode), dtype=dtype).copy()
+            array.setflags(write=False)
+            return array
+        return self.cached((path, resolved, f"{mode}:{np.dtype(dtype).name}"), load)
+
+    def photo(self, path, size=None, mode=None):
+        """PhotoImage da imagem (só na thread do Tk); a conversão parte da imagem já em cache."""
+        from PIL import ImageTk  # importado aqui: traz o tkinter, que a linha de comando não carrega
+
+        resolved = self._resolve_size(path, size) if size else None
+        return self.cached((path, resolved, f"{mode}:photo"), lambda: ImageTk.PhotoImage(self.image(path, resolved, mode)))
+
+    def _resolve_size(self, path, size):
+        width, height = size
+        if width is None or height is None:
+            original_width, original_height = self.image(path).size
+            if width is None:
+                width = max(1, round(height * original_width / original_height))
+            else:
+                height = max(1, round(width * original_height / original_width))
+        return (int(width), int(height))
+
+    def warm(self, requests, on_done=None):
+        """
+        Carrega em segundo plano os pedidos (método, caminho, kwargs), p. ex.
+        ("image", logo, {"size": (None, 216)}). PhotoImages não entram: elas
+        nascem na thread do Tk, a partir das imagens aquecidas aqui. `on_done()`
+        é chamado (na thread de pré-carga) ao fim.
+        """
+        def run():
+            for method, path, kwargs in requests:
+                try:
+                    getattr(self, method)(path, **kwargs)
+                except Exception as e:
+                    logging.warning(f"Não foi possível pré-carregar o recurso '{path}'. Erro: {e}")
+            if on_done:
+                on_done()
+        thread = threading.Thread(target=run, name="PreCargaRecursos", daemon=True)
+        thread.start()
+        return thread
+
+
+def _decode(path):
+    image = Image.open(path)
+    image.load()
+    return image
+
+
+assets = AssetCache()
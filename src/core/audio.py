@@ -0,0 +1,444 @@
+import logging
+import threading
+import time
+
+import av
+import numpy as np
+
+from src.core.clock import DriftCorrector, MediaClock
+from src.core.presets import AudioSettings
+
+# Como microfone e áudio do sistema entram no arquivo quando os dois estão ativos:
+# - "mix": somados numa única faixa, cada um com seu ganho.
+# - "separate": uma faixa de áudio para cada fonte, na ordem microfone, sistema.
+AUDIO_MODE_MIX = "mix"
+AUDIO_MODE_SEPARATE = "separate"
+AUDIO_MODES = (AUDIO_MODE_MIX, AUDIO_MODE_SEPARATE)
+DEFAULT_AUDIO_MODE = AUDIO_MODE_MIX
+
+SOURCE_MICROPHONE = "Microfone"
+SOURCE_SYSTEM = "Sistema"
+
+# Quadros de áudio por leitura do dispositivo e por bloco mixado.
+CHUNK_FRAMES = 1024
+# Taxas tentadas, em ordem, quando o dispositivo não abre na taxa do preset.
+FALLBACK_SAMPLERATES = (48000, 44100)
+# Quanto o mixer espera por uma fonte atrasada antes de tratar o trecho dela como silêncio.
+MIX_MAX_LATENCY = 0.2
+# Um bloco que chega depois de um buraco maior que isto (o loopback do Windows
+# não entrega nada enquanto nada toca) recomeça na posição do seu timestamp.
+GAP_TOLERANCE = 0.05
+# Histórico de cada fonte e dos blocos mixados entregues ao pipeline, em segundos.
+SOURCE_RING_SECONDS = 4.0
+MIX_RING_SECONDS = 10.0
+# Recuperação do limitador por bloco, depois de reduzir o ganho para evitar clipping.
+LIMITER_RELEASE = 1.05
+
+# O que o anel de áudio faz quando o encoder atrasa e ele enche:
+# - "drop_oldest": as amostras mais antigas dão lugar às novas; o áudio fica com um
+#   buraco no lugar delas, mas continua sincronizado com o vídeo.
+# - "block": a captura espera o encoder liberar espaço (backpressure até o dispositivo).
+AUDIO_OVERFLOW_DROP_OLDEST = "drop_oldest"
+AUDIO_OVERFLOW_BLOCK = "block"
+AUDIO_OVERFLOW_POLICIES = (AUDIO_OVERFLOW_DROP_OLDEST, AUDIO_OVERFLOW_BLOCK)
+DEFAULT_AUDIO_OVERFLOW_POLICY = AUDIO_OVERFLOW_DROP_OLDEST
+# Capacidade do anel de cada faixa, em segundos de áudio.
+AUDIO_RING_SECONDS = 2.0
+# Sem amostras novas por mais que isto (a captura entrega um bloco a cada ~21 ms),
+# a espera do encoder conta como um underrun.
+AUDIO_UNDERRUN_TIMEOUT = 0.25
+
+
+def default_sources(record_mic, record_system_audio) -> list[tuple[str, object]]:
+    """As fontes ativas: (nome, dispositivo do soundcard), na ordem das faixas."""
+    import soundcard as sc
+
+    sources = []
+    if record_mic:
+        sources.append((SOURCE_MICROPHONE, sc.default_microphone()))
+    if record_system_audio:
+        # O áudio do sistema é o "microfone" de loopback do alto-falante padrão.
+        speaker = sc.default_speaker()
+        sources.append((SOURCE_SYSTEM, sc.get_microphone(id=str(speaker.name), include_loopback=True)))
+    return sources
+
+
+def track_names(source_names, mode) -> list[str]:
+    """Nomes das faixas de áudio que o pipeline deve criar, na ordem dos índices dos blocos."""
+    if mode == AUDIO_MODE_SEPARATE:
+        return list(source_names)
+    return [" + ".join(source_names)]
+
+
+class _SourceRing:
+    """
+    Amostras de uma fonte já na taxa do preset, indexadas por posição absoluta
+    (amostras desde o início da captura). O buffer é circular e pré-alocado.
+    """
+    def __init__(self, capacity, channels):
+        self.buffer = np.zeros((capacity, channels), dtype=np.float32)
+        self.capacity = capacity
+        self.start = None
+        self.written = 0
+        self.lock = threading.Lock()
+
+    def write(self, position, data, gap_tolerance):
+        with self.lock:
+            if self.start is None:
+                self.start = self.written = position
+            elif position > self.written + gap_tolerance:
+                self._fill(self.written, position - self.written, None)
+                self.written = position
+            # Fora de um buraco, os blocos são contíguos: o jitter dos timestamps não move o áudio.
+            self._fill(self.written, len(data), data)
+            self.written += len(data)
+
+    def _fill(self, position, count, data):
+        count = min(count, self.capacity)
+        offset = position % self.capacity
+        first = min(count, self.capacity - offset)
+        for ring_slice, data_slice in ((slice(offset, offset + first), slice(0, first)),
+                                       (slice(0, count - first), slice(first, count))):
+            if data is None:
+                self.buffer[ring_slice] = 0
+            else:
+                self.buffer[ring_slice] = data[data_slice]
+
+    def mix_into(self, out, scratch, position, gain):
+        """Soma `gain` × as amostras de [position, position + len(out)) em `out`, sem alocar."""
+        with self.lock:
+            if self.start is None:
+                return
+            begin = max(position, self.start, self.written - self.capacity)
+            end = min(position + len(out), self.written)
+            while begin < end:
+                offset = begin % self.capacity
+                count = min(end - begin, self.capacity - offset)
+                target = out[begin - position:begin - position + count]
+                temp = scratch[:count]
+                np.multiply(self.buffer[offset:offset + count], gain, out=temp)
+                np.add(target, temp, out=target)
+                begin += count
+
+
+class AudioSource(threading.Thread):
+    """
+    Lê um dispositivo do soundcard em sua própria thread, reamostrando para a
+    taxa do preset e corrigindo a deriva do relógio do dispositivo em relação
+    ao relógio de mídia.
+    """
+    def __init__(self, name, device, settings: AudioSettings, on_chunk, stop_event, clock: MediaClock):
+        super().__init__(name=f"audio-{name}", daemon=True)
+        self.source_name = name
+        self.device = device
+        self.settings = settings
+        self.on_chunk = on_chunk
+        self.stop_event = stop_event
+        self.clock = clock
+        self.drift = DriftCorrector(settings.samplerate, name)
+        self.samplerate = None
+        self.failed = False
+
+    def _open_recorder(self):
+        samplerates = [self.settings.samplerate] + [rate for rate in FALLBACK_SAMPLERATES if rate != self.settings.samplerate]
+        for samplerate in samplerates:
+            try:
+                recorder = self.device.recorder(samplerate=samplerate, channels=self.settings.channels)
+                recorder.__enter__()
+                return recorder, samplerate
+            except Exception as e:
+                logging.warning(f"Fonte de áudio '{self.source_name}' não abriu a {samplerate} Hz: {e}")
+        raise RuntimeError(f"Nenhuma taxa de amostragem aceita pela fonte '{self.source_name}'.")
+
+    def run(self):
+        layout = 'stereo' if self.settings.channels == 2 else 'mono'
+        recorder = None
+        try:
+            recorder, self.samplerate = self._open_recorder()
+            resampler = None
+            if self.samplerate != self.settings.samplerate:
+                logging.info(f"Fonte '{self.source_name}' a {self.samplerate} Hz; reamostrando para {self.settings.samplerate} Hz.")
+                resampler = av.AudioResampler(format='flt', layout=layout, rate=self.settings.samplerate)
+
+            while not self.stop_event.is_set():
+                data = recorder.record(numframes=CHUNK_FRAMES)
+                # Carimba o bloco no mesmo relógio usado pela captura de vídeo.
+                captured_at = self.clock.now()
+                if data is None or not len(data):
+                    continue
+                if resampler is not None:
+                    frame = av.AudioFrame.from_ndarray(
+                        np.ascontiguousarray(data, dtype=np.float32).reshape(1, -1), format='flt', layout=layout
+                    )
+                    frame.sample_rate = self.samplerate
+                    resampled = [f.to_ndarray().reshape(-1, self.settings.channels) for f in resampler.resample(frame)]
+                    if not resampled:
+                        continue
+                    data = np.concatenate(resampled) if len(resampled) > 1 else resampled[0]
+                data = self.drift.process(captured_at, data)
+                if len(data):
+                    self.on_chunk(self, captured_at, data)
+        except Exception as e:
+            self.failed = True
+            logging.error(f"Erro na captura de áudio ({self.source_name}): {e}")
+        finally:
+            if self.samplerate is not None:
+                logging.info(f"Fonte de áudio '{self.source_name}': {self.drift.describe()}.")
+            if recorder is not None:
+                try:
+                    recorder.__exit__(None, None, None)
+                except Exception:
+                    pass
+
+
+class AudioCapture:
+    """
+    Captura todas as fontes de áudio ativas ao mesmo tempo e entrega ao
+    pipeline blocos `(faixa, captured_at, amostras)` na saída (um
+    AudioRingBuffer ou a fila entre processos), com um `None` no fim.
+
+    Cada fonte roda numa thread e carimba seus blocos no MediaClock da
+    gravação, o mesmo dos quadros de vídeo. No modo "separate" cada fonte vira uma faixa e o
+    pipeline alinha cada uma pelo seu carimbo. No modo "mix", os blocos são
+    posicionados numa linha do tempo comum (amostras desde o início) e o mixer
+    soma as fontes com ganho e limitador em buffers pré-alocados; uma fonte
+    que atrasa mais que MIX_MAX_LATENCY entra como silêncio naquele trecho.
+    Os blocos mixados são views de um anel de MIX_RING_SECONDS, copiados pelo
+    AudioRingBuffer (ou serializados pela fila) bem antes de ele dar a volta.
+    """
+    def __init__(self, settings: AudioSettings, sources, output_queue, stop_event,
+                 mode=DEFAULT_AUDIO_MODE, gains=None, clock: MediaClock = None):
+        if mode not in AUDIO_MODES:
+            logging.error(f"Modo de áudio '{mode}' desconhecido. Usando '{DEFAULT_AUDIO_MODE}'.")
+            mode = DEFAULT_AUDIO_MODE
+        self.settings = settings
+        self.mode = mode
+        self.output_queue = output_queue
+        self.stop_event = stop_event
+        self.clock = clock or MediaClock()
+        self.gains = [float((gains or {}).get(name, 1.0)) for name, _ in sources]
+        self.sources = [AudioSource(name, device, settings, self._on_chunk, stop_event, self.clock)
+                        for name, device in sources]
+        self.started_at = None
+
+        channels = settings.channels
+        self._rings = [
+            _SourceRing(int(SOURCE_RING_SECONDS * settings.samplerate), channels) for _ in self.sources
+        ]
+        self._mix_ring = np.zeros((int(MIX_RING_SECONDS * settings.samplerate) // CHUNK_FRAMES * CHUNK_FRAMES, channels),
+                                  dtype=np.float32)
+        self._scratch = np.empty((CHUNK_FRAMES, channels), dtype=np.float32)
+        self._limiter_gain = 1.0
+        self.late_blocks = 0
+        self.limited_blocks = 0
+
+    @property
+    def tracks(self) -> list[str]:
+        return track_names([source.source_name for source in self.sources], self.mode)
+
+    def run(self):
+        """Captura até `stop_event`; bloqueia a thread que chama."""
+        self.started_at = self.clock.now()
+        try:
+            for source in self.sources:
+                source.start()
+            if self.mode == AUDIO_MODE_MIX:
+                self._mix_loop()
+            else:
+                self.stop_event.wait()
+            for source in self.sources:
+                source.join(timeout=2)
+        finally:
+            if self.late_blocks or self.limited_blocks:
+                logging.info(
+                    f"Mixer de áudio: {self.late_blocks} blocos com fonte atrasada (silêncio), "
+                    f"{self.limited_blocks} blocos com o limitador ativo."
+                )
+            self.output_queue.put(None)
+
+    def _on_chunk(self, source: AudioSource, captured_at, data):
+        if self.mode == AUDIO_MODE_SEPARATE:
+            # Cópia: o bloco reamostrado pelo DriftCorrector vive num buffer reaproveitado.
+            self.output_queue.put((self.sources.index(source), captured_at, data.copy()))
+            return
+        samplerate = self.settings.samplerate
+        position = round((captured_at - self.started_at) * samplerate) - len(data)
+        self._rings[self.sources.index(source)].write(max(0, position), data, int(GAP_TOLERANCE * samplerate))
+
+    def _mix_loop(self):
+        samplerate = self.settings.samplerate
+        block_seconds = CHUNK_FRAMES / samplerate
+        position = 0
+        ring_blocks = len(self._mix_ring) // CHUNK_FRAMES
+        block_index = 0
+
+        while not self.stop_event.is_set():
+            block_end = self.started_at + (position + CHUNK_FRAMES) / samplerate
+            active = [ring for ring, source in zip(self._rings, self.sources) if source.is_alive()]
+            ready = all(ring.written >= position + CHUNK_FRAMES for ring in active if ring.start is not None)
+            late = self.clock.now() > block_end + MIX_MAX_LATENCY
+            if not (ready and any(ring.start is not None for ring in active)) and not late:
+                time.sleep(block_seconds / 2)
+                continue
+            if not ready:
+                self.late_blocks += 1
+
+            out = self._mix_ring[block_index * CHUNK_FRAMES:(block_index + 1) * CHUNK_FRAMES]
+            out[:] = 0
+            for ring, gain in zip(self._rings, self.gains):
+                ring.mix_into(out, self._scratch, position, gain)
+            self._limit(out)
+
+            self.output_queue.put((0, block_end, out))
+            position += CHUNK_FRAMES
+            block_index = (block_index + 1) % ring_blocks
+
+    def _limit(self, out):
+        """Evita clipping: reduz o ganho quando a soma passa de 1.0 e o recupera aos poucos."""
+        peak = max(float(out.max()), -float(out.min()))
+        if peak * self._limiter_gain > 1.0:
+            self._limiter_gain = 1.0 / peak
+            self.limited_blocks += 1
+        if self._limiter_gain < 1.0:
+            out *= self._limiter_gain
+            self._limiter_gain = min(1.0, self._limiter_gain * LIMITER_RELEASE)
+        np.clip(out, -1.0, 1.0, out=out)
+
+
+class AudioRingBuffer:
+    """
+    Anel pré-alocado com as amostras de cada faixa entre a captura e o encoder
+    de áudio, no lugar de uma fila sem limite de blocos.
+
+    Recebe os mesmos itens da fila de áudio (`put((faixa, captured_at, amostras))`
+    e `put(None)` no fim), então a AudioCapture escreve nele diretamente. A
+    etapa de áudio do pipeline lê com `read` exatamente o `frame_size` do
+    encoder; a posição devolvida, somada à `origin` da faixa (o instante de
+    captura da primeira amostra), dá o PTS. Cheio, o anel segue a política
+    `overflow`; `overruns`/`overrun_samples` contam o que foi descartado (ou
+    as vezes que a captura esperou, no modo "block") e `underruns` as esperas
+    do encoder sem amostras novas.
+    """
+    def __init__(self, tracks, settings: AudioSettings, seconds=AUDIO_RING_SECONDS,
+                 overflow=DEFAULT_AUDIO_OVERFLOW_POLICY):
+        if overflow not in AUDIO_OVERFLOW_POLICIES:
+            logging.error(f"Política de estouro de áudio '{overflow}' desconhecida. Usando '{DEFAULT_AUDIO_OVERFLOW_POLICY}'.")
+            overflow = DEFAULT_AUDIO_OVERFLOW_POLICY
+        self.samplerate = settings.samplerate
+        self.channels = settings.channels
+        self.capacity = int(seconds * settings.samplerate)
+        self.overflow = overflow
+
+        self._buffers = [np.zeros((self.capacity, self.channels), dtype=np.float32) for _ in range(tracks)]
+        # Posições absolutas (amostras desde a origem de cada faixa).
+        self._written = [0] * tracks
+        self._read = [0] * tracks
+        self._origins: list[float | None] = [None] * tracks
+        self._closed = False
+        self._condition = threading.Condition()
+
+        self.overruns = 0
+        self.overrun_samples = 0
+        self.underruns = 0
+        # Maior distância entre o fim de um bloco na linha do tempo da faixa e o seu carimbo de captura.
+        self.max_skew = 0.0
+
+    @property
+    def tracks(self) -> int:
+        return len(self._buffers)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def origin(self, track) -> float | None:
+        return self._origins[track]
+
+    def available(self, track) -> int:
+        return self._written[track] - self._read[track]
+
+    def put(self, item) -> bool:
+        """Escreve um bloco (ou fecha o anel com None). False se o anel já estava fechado."""
+        if item is None:
+            self.close()
+            return True
+        track, captured_at, data = item
+        frames = len(data)
+        with self._condition:
+            if self._closed:
+                return False
+            if self._origins[track] is None:
+                self._origins[track] = captured_at - frames / self.samplerate
+            else:
+                skew = abs(self._origins[track] + (self._written[track] + frames) / self.samplerate - captured_at)
+                self.max_skew = max(self.max_skew, skew)
+
+            if frames > self.capacity:
+                # Um bloco maior que o anel inteiro: só o fim dele cabe.
+                skipped = frames - self.capacity
+                data = data[skipped:]
+                frames = self.capacity
+                self._written[track] += skipped
+                self._read[track] = max(self._read[track], self._written[track] - self.capacity)
+            free = self.capacity - self.available(track)
+            if frames > free:
+                self.overruns += 1
+                if self.overflow == AUDIO_OVERFLOW_BLOCK:
+                    while self.capacity - self.available(track) < frames and not self._closed:
+                        self._condition.wait(0.1)
+                    if self._closed:
+                        return False
+                else:
+                    dropped = frames - free
+                    self._read[track] += dropped
+                    self.overrun_samples += dropped
+
+            self._copy_in(track, data)
+            self._written[track] += frames
+            self._condition.notify_all()
+        return True
+
+    def _copy_in(self, track, data):
+        buffer = self._buffers[track]
+        offset = self._written[track] % self.capacity
+        first = min(len(data), self.capacity - offset)
+        buffer[offset:offset + first] = data[:first]
+        buffer[:len(data) - first] = data[first:]
+
+    def read(self, track, out) -> int | None:
+        """
+        Copia as próximas `len(out)` amostras da faixa em `out` (quadros x canais).
+        Retorna a posição da primeira amostra desde a origem da faixa, ou None se
+        ainda não há amostras suficientes.
+        """
+        frames = len(out)
+        with self._condition:
+            if self.available(track) < frames:
+                return None
+            position = self._read[track]
+            buffer = self._buffers[track]
+            offset = position % self.capacity
+            first = min(frames, self.capacity - offset)
+            out[:first] = buffer[offset:offset + first]
+            out[first:] = buffer[:frames - first]
+            self._read[track] += frames
+            self._condition.notify_all()
+            return position
+
+    def wait(self, frames, timeout=AUDIO_UNDERRUN_TIMEOUT) -> bool:
+        """
+        Espera até alguma faixa ter `frames` amostras ou o anel fechar. Esgotar o
+        tempo com a captura já em andamento conta como underrun.
+        """
+        with self._condition:
+            ready = self._condition.wait_for(
+                lambda: self._closed or any(self.available(t) >= frames for t in range(self.tracks)), timeout
+            )
+            if not ready and any(origin is not None for origin in self._origins):
+                self.underruns += 1
+            return ready
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
@@ -0,0 +1,329 @@
+import logging
+import os
+import sys
+import threading
+import time
+
+import mss
+import numpy as np
+
+from src.core.buffers import frame_view
+
+# Backends de captura de tela:
+# - "mss": o mss com o backend padrão da plataforma (GDI no Windows, X11 no Linux,
+#   CoreGraphics no macOS);
+# - "x11shm": X11 com memória compartilhada (MIT-SHM): o servidor escreve a imagem
+#   num segmento compartilhado em vez de enviá-la pelo socket. Usa o XShmGetImage
+#   do mss (>= 10.2), que volta sozinho para o XGetImage se a extensão faltar;
+# - "synthetic": a área de trabalho sintética (SyntheticScreen), sem tela nenhuma;
+#   para medir o pipeline e rodar sem servidor gráfico.
+BACKEND_MSS = "mss"
+BACKEND_X11_SHM = "x11shm"
+BACKEND_SYNTHETIC = "synthetic"
+DEFAULT_CAPTURE_BACKEND = BACKEND_MSS
+
+# Monitores da área de trabalho sintética (largura, altura), lado a lado.
+SYNTHETIC_MONITORS = ((1920, 1080),)
+
+# Tamanhos de captura comparados pelo benchmark, e capturas medidas em cada um.
+BENCH_SIZES = ((1280, 720), (1920, 1080), (2560, 1440), (3840, 2160))
+BENCH_FRAMES = 60
+
+
+class CaptureBackend:
+    """
+    Fonte de capturas da tela. `grab(region)` devolve um array BGRA
+    (altura, largura, 4) que é uma view, sem cópia, do buffer em que a imagem
+    foi escrita; cada captura tem o seu buffer, então a view continua válida
+    enquanto for referenciada (o pipeline a segura até a conversão).
+
+    `monitors` segue o formato do mss: o item 0 é a área de trabalho inteira e
+    os demais são os monitores. Uma instância não deve ser usada por mais de
+    uma thread; o GrabberService mantém uma por thread.
+    """
+    name = ""
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    @property
+    def monitors(self) -> list[dict]:
+        raise NotImplementedError
+
+    def grab(self, region) -> np.ndarray:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+_backends: dict[str, type[CaptureBackend]] = {}
+
+
+def register_backend(cls: type[CaptureBackend]) -> type[CaptureBackend]:
+    """Registra um backend pelo `name` da classe (usado como decorador)."""
+    _backends[cls.name] = cls
+    return cls
+
+
+def available_backends() -> list[str]:
+    """Nomes dos backends registrados que funcionam nesta máquina."""
+    return [name for name, cls in _backends.items() if cls.is_available()]
+
+
+def create_backend(name=DEFAULT_CAPTURE_BACKEND, **kwargs) -> CaptureBackend:
+    """
+    Abre o backend `name`. Um nome desconhecido, ou um backend indisponível
+    ou que falha ao abrir, cai no padrão (o erro vai para o log).
+    """
+    cls = _backends.get(name)
+    if cls is None:
+        logging.error(f"Backend de captura '{name}' desconhecido. Usando '{DEFAULT_CAPTURE_BACKEND}'.")
+    elif not cls.is_available():
+        logging.warning(f"Backend de captura '{name}' indisponível nesta máquina. Usando '{DEFAULT_CAPTURE_BACKEND}'.")
+    else:
+        try:
+            return cls(**kwargs)
+        except Exception as e:
+            if name == DEFAULT_CAPTURE_BACKEND:
+                raise
+            logging.error(f"Não foi possível abrir o backend de captura '{name}'. Usando '{DEFAULT_CAPTURE_BACKEND}'. Erro: {e}")
+    return _backends[DEFAULT_CAPTURE_BACKEND]()
+
+
+@register_backend
+class MssBackend(CaptureBackend):
+    """Captura pelo mss; a view aponta para o buffer da ScreenShot, sem cópia."""
+    name = BACKEND_MSS
+
+    def __init__(self):
+        self._sct = self._open()
+
+    def _open(self):
+        # mss >= 10.2 expõe a classe; antes dela só havia a fábrica `mss.mss()`.
+        factory = getattr(mss, "MSS", None) or mss.mss
+        return factory()
+
+    @property
+    def monitors(self) -> list[dict]:
+        return self._sct.monitors
+
+    def grab(self, region) -> np.ndarray:
+        return frame_view(self._sct.grab(region))
+
+    def close(self):
+        self._sct.close()
+
+
+@register_backend
+class X11ShmBackend(MssBackend):
+    """
+    Captura X11 por memória compartilhada (XShmGetImage do mss). Sem a
+    extensão MIT-SHM (servidor remoto, por exemplo) o mss usa o XGetImage; o
+    motivo fica no log depois da primeira captura.
+    """
+    name = BACKEND_X11_SHM
+
+    @classmethod
+    def is_available(cls) -> bool:
+        if not sys.platform.startswith("linux") or not os.environ.get("DISPLAY"):
+            return False
+        return hasattr(mss, "MSS")
+
+    def __init__(self):
+        super().__init__()
+        self._checked = False
+
+    def _open(self):
+        return mss.MSS(backend="xshmgetimage")
+
+    def grab(self, region) -> np.ndarray:
+        image = super().grab(region)
+        if not self._checked:
+            self._checked = True
+            # Só a volta para o XGetImage é um aviso; "MIT-SHM is working correctly." também vem nas notas.
+            level = logging.WARNING if self.shm_unavailable else logging.INFO
+            for note in getattr(self._sct, "performance_status", []):
+                logging.log(level, f"Captura X11: {note}")
+        return image
+
+    @property
+    def shm_unavailable(self) -> bool:
+        """Se o mss desistiu do MIT-SHM (o `shm_status` fica na implementação X11 do mss)."""
+        status = getattr(getattr(self._sct, "_impl", self._sct), "shm_status", None)
+        return getattr(status, "name", None) == "UNAVAILABLE"
+
+
+@register_backend
+class SyntheticBackend(CaptureBackend):
+    """
+    Área de trabalho sintética: cada captura é o próximo quadro de um
+    SyntheticScreen do tamanho da região, desenhado direto no buffer novo que
+    a view devolve.
+    """
+    name = BACKEND_SYNTHETIC
+
+    def __init__(self, monitors=SYNTHETIC_MONITORS):
+        self._monitors = []
+        left = 0
+        for width, height in monitors:
+            self._monitors.append({'left': left, 'top': 0, 'width': width, 'height': height})
+            left += width
+        desktop = {'left': 0, 'top': 0, 'width': left, 'height': max(height for _, height in monitors)}
+        self._monitors.insert(0, desktop)
+        self._screens = {}  # (largura, altura) -> SyntheticScreen
+        self._index = 0
+
+    @property
+    def monitors(self) -> list[dict]:
+        return self._monitors
+
+    def grab(self, region) -> np.ndarray:
+        size = (region['width'], region['height'])
+        screen = self._screens.get(size)
+        if screen is None:
+            from src.core.synthetic import SyntheticScreen  # importado aqui: traz o OpenCV, que só este backend usa
+            screen = self._screens[size] = SyntheticScreen(*size)
+        self._index += 1
+        return screen.frame(self._index)
+
+
+class GrabberService:
+    """
+    Backends de captura persistentes, um por thread (o mss não pode ser
+    compartilhado entre threads): a primeira captura de uma thread abre o
+    backend e as seguintes o reaproveitam, sem pagar a abertura (conexão X11,
+    DCs do GDI) a cada screenshot.
+
+    Os backends de threads que já terminaram são fechados na próxima abertura;
+    uma thread de vida curta (a de uma gravação) chama `release()` ao terminar.
+    """
+    def __init__(self, backend=DEFAULT_CAPTURE_BACKEND):
+        self.backend_name = backend
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open: list[tuple[threading.Thread, CaptureBackend]] = []
+
+    def configure(self, backend):
+        """Troca o backend padrão; as threads passam a abri-lo na próxima captura."""
+        if backend != self.backend_name:
+            logging.info(f"Backend de captura: '{backend}'.")
+        self.backend_name = backend
+
+    def backend(self, name=None) -> CaptureBackend:
+        """O backend `name` (ou o padrão) da thread atual, aberto na primeira chamada."""
+        name = name or self.backend_name
+        opened = getattr(self._local, "backends", None)
+        if opened is None:
+            opened = self._local.backends = {}
+        backend = opened.get(name)
+        if backend is None:
+            self._close_dead()
+            backend = opened[name] = create_backend(name)
+            with self._lock:
+                self._open.append((threading.current_thread(), backend))
+        return backend
+
+    def monitors(self) -> list[dict]:
+        return self.backend().monitors
+
+    def grab(self, region) -> np.ndarray:
+        return self.backend().grab(region)
+
+    def release(self):
+        """Fecha os backends da thread atual."""
+        opened = getattr(self._local, "backends", None) or {}
+        with self._lock:
+            self._open = [(thread, backend) for thread, backend in self._open
+                          if backend not in opened.values()]
+        for backend in opened.values():
+            self._close(backend)
+        opened.clear()
+
+    def close(self):
+        """Fecha os backends de todas as threads (no encerramento do aplicativo)."""
+        with self._lock:
+            backends, self._open = self._open, []
+        for _, backend in backends:
+            self._close(backend)
+        self._local = threading.local()
+
+    def _close_dead(self):
+        with self._lock:
+            dead = [backend for thread, backend in self._open if not thread.is_alive()]
+            self._open = [(thread, backend) for thread, backend in self._open if thread.is_alive()]
+        for backend in dead:
+            self._close(backend)
+
+    @staticmethod
+    def _close(backend):
+        try:
+            backend.close()
+        except Exception as e:
+            logging.warning(f"Erro ao fechar o backend de captura '{backend.name}': {e}")
+
+
+grabber = GrabberService()
+
+
+def benchmark(names=None, sizes=BENCH_SIZES, frames=BENCH_FRAMES) -> list[dict]:
+    """
+    Mede a latência de `grab` de cada backend em cada tamanho de captura.
+    Tamanhos maiores que a área de trabalho do backend são pulados. Retorna
+    uma linha por (backend, tamanho) com a mediana e o p95 em ms e a vazão.
+    """
+    rows = []
+    for name in names or available_backends():
+        # A área de trabalho sintética é criada do tamanho do maior caso medido.
+        kwargs = {"monitors": (max(sizes),)} if name == BACKEND_SYNTHETIC else {}
+        try:
+            backend = _backends[name](**kwargs)
+        except Exception as e:
+            logging.error(f"Benchmark: não foi possível abrir o backend '{name}'. Erro: {e}")
+            continue
+        with backend:
+            desktop = backend.monitors[0]
+            for width, height in sizes:
+                if width > desktop['width'] or height > desktop['height']:
+                    continue
+                region = {'left': desktop['left'], 'top': desktop['top'], 'width': width, 'height': height}
+                backend.grab(region)  # aquecimento: buffers e conexões abertos fora da medição
+                times = []
+                for _ in range(frames):
+                    start = time.perf_counter()
+                    backend.grab(region)
+                    times.append(time.perf_counter() - start)
+                median = float(np.median(times))
+                rows.append({
+                    "backend": name,
+                    "size": f"{width}x{height}",
+                    "median_ms": round(median * 1000, 2),
+                    "p95_ms": round(float(np.percentile(times, 95)) * 1000, 2),
+                    "mb_per_s": round(width * height * 4 / median / 1e6, 1),
+                })
+    return rows
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Compara a latência de captura dos backends de tela.")
+    parser.add_argument("--backend", action="append", choices=sorted(_backends),
+                        help="backend a medir (repetível; padrão: todos os disponíveis)")
+    parser.add_argument("--frames", type=int, default=BENCH_FRAMES, help="capturas medidas por tamanho")
+    args = parser.parse_args()
+
+    print(f"{'backend':<10} {'tamanho':>10} {'mediana':>10} {'p95':>10} {'MB/s':>9}")
+    for row in benchmark(args.backend, frames=args.frames):
+        print(f"{row['backend']:<10} {row['size']:>10} {row['median_ms']:>8.2f}ms {row['p95_ms']:>8.2f}ms "
+              f"{row['mb_per_s']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import queue
+import tempfile
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime
+
+import av
+
+from src.core.audio import AudioRingBuffer, CHUNK_FRAMES
+from src.core.backends import BACKEND_SYNTHETIC
+from src.core.calibration import cpu_key
+from src.core.clock import MediaClock
+from src.core.pipeline import RecordingPipeline
+from src.core.presets import RECORDING_PRESETS, PRESET_OPTIONS_ORDER, NATIVE_FPS_FALLBACKS, RecordingPreset, fit_resolution
+from src.core.synthetic import SyntheticAudio
+
+# Resoluções de tela medidas para cada preset.
+BENCH_RESOLUTIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+}
+# Segundos de gravação por caso; o primeiro segundo (encoder aquecendo) também conta.
+BENCH_SECONDS = 5.0
+# fps dos presets nativos, que no aplicativo seguem o monitor.
+BENCH_NATIVE_FPS = NATIVE_FPS_FALLBACKS[0]
+# Tempo além da gravação que um caso pode levar (abrir o libav, esvaziar as filas).
+BENCH_CASE_TIMEOUT = 120.0
+
+BENCH_FILE = "benchmark.json"
+BENCH_VERSION = 1
+
+# Cada caso roda num processo novo: o pico de memória (RSS) é medido por caso e
+# nada (buffers, encoders) sobra de um caso para o outro.
+_context = multiprocessing.get_context("spawn")
+
+
+def bench_preset(key, size) -> RecordingPreset:
+    """O preset `key` gravando uma tela de `size`, como o aplicativo o resolveria (sem a calibração)."""
+    base = RECORDING_PRESETS[key]
+    if base.is_native:
+        video = replace(base.video, resolution=size, fps=BENCH_NATIVE_FPS)
+    else:
+        video = replace(base.video, resolution=fit_resolution(size, base.video.resolution))
+    return replace(base, video=video)
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB no Linux, bytes no macOS.
+    return round(peak / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+
+def run_case(key, resolution, seconds=BENCH_SECONDS, audio=True, output_dir=None) -> dict:
+    """
+    Grava `seconds` segundos da tela sintética com o pipeline de gravação real
+    e devolve as medidas do caso. Roda no processo atual.
+    """
+    size = BENCH_RESOLUTIONS[resolution]
+    preset = bench_preset(key, size)
+    monitor = {'left': 0, 'top': 0, 'width': size[0], 'height': size[1]}
+    filename = os.path.join(output_dir, f"bench_{key}_{resolution}{preset.container}")
+
+    clock = MediaClock()
+    stop_event = threading.Event()
+    audio_ring = AudioRingBuffer(1, preset.audio) if audio else None
+    pipeline = RecordingPipeline(
+        preset, monitor, filename, stop_event,
+        audio_queue=audio_ring,
+        clock=clock,
+        # O preset é medido como está: a qualidade adaptativa mudaria o que se mede no meio do caso.
+        adaptive_quality=False,
+        capture_backend=BACKEND_SYNTHETIC,
+    )
+    tone = SyntheticAudio(preset.audio, audio_ring, stop_event, clock, chunk_frames=CHUNK_FRAMES) if audio else None
+    timer = threading.Timer(seconds, stop_event.set)
+
+    cpu_started = time.process_time()
+    if tone:
+        tone.start()
+    timer.start()
+    try:
+        pipeline.run()
+    finally:
+        stop_event.set()
+        timer.cancel()
+        if tone:
+            tone.join()
+    cpu_seconds = time.process_time() - cpu_started
+
+    summary = pipeline.summary
+    output_bytes = sum(os.path.getsize(path) for path in summary.output_files if os.path.exists(path))
+    duration = summary.duration
+    return {
+        "preset": key,
+        "resolution": resolution,
+        "capture_size": f"{size[0]}x{size[1]}",
+        "output_size": f"{preset.video.resolution[0]}x{preset.video.resolution[1]}",
+        "codec": preset.video.codec,
+        "encoder_preset": preset.video.preset,
+        "target_fps": preset.video.fps,
+        "duration": round(duration, 3),
+        "encoded_fps": round(summary.encoded_fps, 2),
+        "captured_fps": round(summary.captured_fps, 2),
+        "dropped_frames": summary.dropped_frames,
+        "cpu_seconds": round(cpu_seconds, 3),
+        # Soma de todas as threads: passa de 100% quando mais de um núcleo trabalha.
+        "cpu_percent": round(cpu_seconds / duration * 100, 1) if duration > 0 else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "output_bytes": output_bytes,
+        "bitrate_kbps": round(output_bytes * 8 / duration / 1000, 1) if duration > 0 else 0.0,
+        "stage_latency": summary.stage_latency,
+        "max_queue_depths": summary.max_queue_depths,
+        "audio_overruns": summary.audio_overruns,
+        "audio_underruns": summary.audio_underruns,
+    }
+
+
+def _case_worker(key, resolution, seconds, audio, output_dir, results):
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    try:
+        results.put(run_case(key, resolution, seconds, audio, output_dir))
+    except Exception as e:
+        results.put({"preset": key, "resolution": resolution, "error": str(e)})
+
+
+def run_suite(presets=PRESET_OPTIONS_ORDER, resolutions=tuple(BENCH_RESOLUTIONS), seconds=BENCH_SECONDS,
+              audio=True, output_dir=None, on_result=None) -> dict:
+    """
+    Roda cada (preset, resolução) num processo próprio e devolve o relatório
+    completo (máquina, versões e um resultado por caso). `on_result` recebe
+    cada resultado assim que o caso termina.
+    """
+    report = {
+        "version": BENCH_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": cpu_key(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "av": av.__version__,
+        "ffmpeg": av.library_versions.get("libavcodec"),
+        "seconds": seconds,
+        "audio": audio,
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="sentinela-bench-") as scratch:
+        for key in presets:
+            for resolution in resolutions:
+                results = _context.Queue()
+                process = _context.Process(
+                    target=_case_worker, args=(key, resolution, seconds, audio, output_dir or scratch, results),
+                    name=f"bench-{key}-{resolution}", daemon=True,
+                )
+                process.start()
+                try:
+                    result = results.get(timeout=seconds + BENCH_CASE_TIMEOUT)
+                except queue.Empty:
+                    result = {"preset": key, "resolution": resolution, "error": "tempo esgotado"}
+                process.join(BENCH_CASE_TIMEOUT)
+                if process.is_alive():
+                    process.terminate()
+                report["results"].append(result)
+                if on_result:
+                    on_result(result)
+    return report
+
+
+def write_report(report, path=BENCH_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def load_report(path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def describe_result(result) -> str:
+    if "error" in result:
+        return f"{result['preset']:<9} {result['resolution']:<6} ERRO: {result['error']}"
+    encode = result["stage_latency"].get("encode", {})
+    return (
+        f"{result['preset']:<9} {result['resolution']:<6} {result['encoded_fps']:>6.1f}/{result['target_fps']:<3} fps "
+        f"{result['dropped_frames']:>5} perdidos  encode p95 {encode.get('p95_ms', 0):>7.1f} ms  "
+        f"CPU {result['cpu_percent']:>6.1f}%  RSS {result['peak_rss_mb'] or 0:>7.1f} MB  "
+        f"{result['bitrate_kbps']:>8.0f} kbps"
+    )
+
+
+def compare_reports(baseline, current) -> list[str]:
+    """Linhas com a variação de fps, latência de codificação, CPU e bitrate de cada caso presente nos dois relatórios."""
+    previous = {(r["preset"], r["resolution"]): r for r in baseline["results"] if "error" not in r}
+    lines = []
+    for result in current["results"]:
+        before = previous.get((result["preset"], result["resolution"]))
+        if before is None or "error" in result:
+            continue
+
+        def delta(value, old, unit):
+            change = f" ({(value - old) / old:+.0%})" if old else ""
+            return f"{value:.1f}{unit}{change}"
+
+        encode = result["stage_latency"].get("encode", {}).get("p95_ms", 0.0)
+        encode_before = before["stage_latency"].get("encode", {}).get("p95_ms", 0.0)
+        lines.append(
+            f"{result['preset']:<9} {result['resolution']:<6} {delta(result['encoded_fps'], before['encoded_fps'], ' fps')}  "
+            f"encode p95 {delta(encode, encode_before, ' ms')}  CPU {delta(result['cpu_percent'], before['cpu_percent'], '%')}  "
+            f"{delta(result['bitrate_kbps'], before['bitrate_kbps'], ' kbps')}"
+        )
+    return lines
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Benchmark do pipeline de gravação com tela e áudio sintéticos (sem Tk, tela ou placa de som)."
+    )
+    add_arguments(parser)
+    run(parser.parse_args())
+
+
+def add_arguments(parser):
+    """Opções da suíte; também as do subcomando `bench` da linha de comando (src.cli)."""
+    parser.add_argument("--preset", action="append", choices=PRESET_OPTIONS_ORDER,
+                        help="preset a medir (repetível; padrão: todos)")
+    parser.add_argument("--resolution", action="append", choices=list(BENCH_RESOLUTIONS),
+                        help="resolução da tela (repetível; padrão: todas)")
+    parser.add_argument("--seconds", type=float, default=BENCH_SECONDS, help="segundos gravados por caso")
+    parser.add_argument("--no-audio", action="store_true", help="grava sem a faixa de áudio sintética")
+    parser.add_argument("--output", default=BENCH_FILE, help="arquivo JSON com os resultados")
+    parser.add_argument("--output-dir", help="pasta para manter os vídeos gravados (padrão: descartados)")
+    parser.add_argument("--compare", metavar="BASE", help="relatório anterior para comparar com este")
+
+
+def run(args):
+    """Roda a suíte com os argumentos de `main`, imprime cada caso e grava o relatório."""
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    report = run_suite(
+        presets=args.preset or PRESET_OPTIONS_ORDER,
+        resolutions=args.resolution or list(BENCH_RESOLUTIONS),
+        seconds=args.seconds,
+        audio=not args.no_audio,
+        output_dir=args.output_dir,
+        on_result=lambda result: print(describe_result(result), flush=True),
+    )
+    write_report(report, args.output)
+    print(f"Resultados em '{args.output}'.")
+    if args.compare:
+        print(f"Comparação com '{args.compare}':")
+        for line in compare_reports(load_report(args.compare), report):
+            print(line)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import threading
+
+import numpy as np
+
+
+class FrameBufferPool:
+    """
+    Pool de arrays de quadro pré-alocados e reutilizáveis.
+
+    O pipeline adquire um buffer por quadro convertido e o devolve assim que
+    o encoder copia os pixels para o AVFrame. Em regime estável nenhum array
+    novo é criado; se o pool se esgotar, ele cresce e a alocação é contada
+    em `bytes_allocated`. Os AVFrames que o libav cria a cada quadro
+    (`from_ndarray`, `reformat`) não passam pelo pool: são contados à parte
+    em `libav_bytes_allocated`.
+    """
+    def __init__(self, shape, count, dtype=np.uint8):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        self._free = [np.empty(self.shape, dtype=self.dtype) for _ in range(count)]
+
+        self.capacity = count
+        self.preallocated_bytes = count * self.frame_nbytes
+        self.bytes_allocated = 0
+        self.libav_bytes_allocated = 0
+        self.frames = 0
+
+    @property
+    def frame_nbytes(self) -> int:
+        return int(np.prod(self.shape)) * self.dtype.itemsize
+
+    def acquire(self) -> np.ndarray:
+        with self._lock:
+            self.frames += 1
+            if self._free:
+                return self._free.pop()
+            self.capacity += 1
+        self.note_allocation(self.frame_nbytes)
+        return np.empty(self.shape, dtype=self.dtype)
+
+    def release(self, buffer: np.ndarray):
+        if not isinstance(buffer, np.ndarray) or buffer.shape != self.shape or buffer.dtype != self.dtype:
+            return
+        with self._lock:
+            self._free.append(buffer)
+
+    def note_allocation(self, nbytes: int):
+        """Registra uma alocação feita fora do pool no caminho quente (ex.: um cv2 que ignorou o `dst`)."""
+        with self._lock:
+            self.bytes_allocated += nbytes
+
+    def note_libav_allocation(self, video_frame):
+        """Registra um AVFrame novo criado no caminho quente (os planos que o libav alocou para ele)."""
+        nbytes = sum(plane.buffer_size for plane in video_frame.planes)
+        with self._lock:
+            self.libav_bytes_allocated += nbytes
+
+    def ensure_target(self, result: np.ndarray, target: np.ndarray) -> np.ndarray:
+        """Confere se uma operação escreveu no buffer de destino; caso contrário, conta a cópia extra."""
+        if result is not target:
+            self.note_allocation(result.nbytes)
+        return result
+
+
+def frame_view(sct_img) -> np.ndarray:
+    """Envolve o buffer BGRA de uma captura do mss em um array (altura, largura, 4) sem copiar."""
+    return np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(sct_img.height, sct_img.width, 4)
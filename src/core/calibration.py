@@ -0,0 +1,309 @@
+import json
+import logging
+import os
+import platform
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime
+from fractions import Fraction
+from functools import lru_cache
+
+from src.core.adaptive import X264_SPEED_LADDER, VP9_SPEED_LADDER, encoder_options
+from src.core.presets import VideoSettings
+
+# Fica ao lado do config.ini (mesmo diretório de trabalho).
+CALIBRATION_FILE = "calibration.json"
+CALIBRATION_VERSION = 1
+
+# Segundos de conteúdo sintético codificados por velocidade do encoder...
+CALIBRATION_SECONDS = 3.0
+# ...limitados por este tempo de relógio, com um mínimo de quadros para a média valer.
+MAX_CANDIDATE_SECONDS = 4.0
+MIN_CANDIDATE_FRAMES = 10
+CALIBRATION_FPS = 30
+
+# Fração do intervalo entre quadros que o encoder pode ocupar; o resto fica para captura e conversão.
+REALTIME_LOAD = 0.7
+
+SPEED_LADDERS = {
+    'libx264': X264_SPEED_LADDER,
+    'libvpx-vp9': VP9_SPEED_LADDER,
+}
+
+
+@lru_cache(maxsize=None)
+def cpu_key() -> str:
+    """Identifica a CPU da máquina para indexar o cache de calibração."""
+    name = platform.processor()
+    if not name or name == platform.machine():
+        try:
+            with open("/proc/cpuinfo") as cpuinfo:
+                for line in cpuinfo:
+                    if line.startswith("model name"):
+                        name = line.split(":", 1)[1].strip()
+                        break
+        except OSError:
+            pass
+    return f"{name or platform.machine()} ({os.cpu_count()} threads)"
+
+
+def resolution_key(resolution) -> str:
+    return f"{resolution[0]}x{resolution[1]}"
+
+
+def encoder_key(codec, crf) -> str:
+    # O CRF muda o bitrate (e um pouco o custo), então presets com CRFs diferentes são medidos à parte.
+    return f"{codec}/crf{crf}"
+
+
+@dataclass
+class SpeedMeasurement:
+    """Custo medido de uma velocidade do encoder em uma resolução."""
+    encode_ms: float
+    frame_bits: float
+    frames: int
+
+    def load(self, fps) -> float:
+        """Fração do intervalo entre quadros gasta codificando, a `fps` quadros por segundo."""
+        return self.encode_ms * fps / 1000
+
+    def bitrate(self, fps) -> float:
+        return self.frame_bits * fps
+
+
+@dataclass
+class PresetEstimate:
+    """Estimativa exibida ao lado de cada preset nas configurações."""
+    cpu_load: float
+    bitrate: float
+
+    def describe(self) -> str:
+        return f"CPU ~{self.cpu_load:.0%}, ~{self.bitrate / 1_000_000:.1f} Mbps"
+
+
+# --- Cache ---
+
+_cache_lock = threading.Lock()
+
+
+def load_calibration() -> dict:
+    try:
+        with open(CALIBRATION_FILE, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.error(f"Não foi possível ler o cache de calibração '{CALIBRATION_FILE}'. Erro: {e}")
+        return {}
+    if data.get("version") != CALIBRATION_VERSION:
+        return {}
+    return data
+
+
+def _store_measurements(resolution, codec, crf, measurements: dict[str, SpeedMeasurement]):
+    with _cache_lock:
+        data = load_calibration() or {"version": CALIBRATION_VERSION, "machines": {}}
+        machine = data.setdefault("machines", {}).setdefault(cpu_key(), {})
+        machine.setdefault(resolution_key(resolution), {})[encoder_key(codec, crf)] = {
+            "measured_at": datetime.now().isoformat(timespec="seconds"),
+            "speeds": {
+                speed: {"encode_ms": round(m.encode_ms, 3), "frame_bits": round(m.frame_bits), "frames": m.frames}
+                for speed, m in measurements.items()
+            },
+        }
+        try:
+            with open(CALIBRATION_FILE, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            logging.error(f"Não foi possível salvar o cache de calibração. Erro: {e}")
+
+
+def get_measurements(resolution, codec, crf, data=None) -> dict[str, SpeedMeasurement]:
+    """Medições em cache desta máquina para o encoder e a resolução, da velocidade mais lenta à mais rápida."""
+    data = load_calibration() if data is None else data
+    entry = data.get("machines", {}).get(cpu_key(), {}).get(resolution_key(resolution), {}).get(encoder_key(codec, crf))
+    if not entry:
+        return {}
+    speeds = entry.get("speeds", {})
+    ladder = SPEED_LADDERS.get(codec, [])
+    return {speed: SpeedMeasurement(**speeds[speed]) for speed in ladder if speed in speeds}
+
+
+def is_calibrated(targets) -> bool:
+    data = load_calibration()
+    return all(get_measurements(resolution, codec, crf, data) for codec, resolution, crf in targets)
+
+
+# --- Escolha das configurações ---
+
+def choose_speed(measurements: dict[str, SpeedMeasurement], fps) -> str | None:
+    """A velocidade de melhor compressão (mais lenta) que ainda cabe no tempo real a `fps`."""
+    fitting = [speed for speed, m in measurements.items() if m.load(fps) <= REALTIME_LOAD]
+    return fitting[0] if fitting else None
+
+
+def tune_preset(preset, fps_candidates=None):
+    """
+    Ajusta a velocidade do encoder (e, para presets nativos, o fps) do preset
+    resolvido conforme a calibração desta máquina. Sem calibração para a
+    resolução do preset, ele é devolvido sem mudanças.
+    """
+    video = preset.video
+    measurements = get_measurements(video.resolution, video.codec, video.crf)
+    if not measurements:
+        return preset
+
+    candidates = fps_candidates or [video.fps]
+    for fps in candidates:
+        speed = choose_speed(measurements, fps)
+        if speed:
+            break
+    else:
+        # Nenhuma combinação cabe: a mais rápida no menor fps, e o controle adaptativo cuida do resto.
+        speed, fps = list(measurements)[-1], candidates[-1]
+        logging.warning(
+            f"Calibração: nenhuma velocidade de {video.codec} mantém {resolution_key(video.resolution)} "
+            f"em tempo real; usando {speed} a {fps} fps."
+        )
+
+    return replace(preset, video=replace(video, preset=speed, fps=fps))
+
+
+def estimate_preset(preset) -> PresetEstimate | None:
+    """Carga de CPU e bitrate estimados do preset (já resolvido e ajustado), ou None sem calibração."""
+    video = preset.video
+    measurement = get_measurements(video.resolution, video.codec, video.crf).get(video.preset)
+    if measurement is None:
+        return None
+    return PresetEstimate(measurement.load(video.fps), measurement.bitrate(video.fps) + preset.audio.bitrate)
+
+
+# --- Medição ---
+
+def measure_speed(screen, codec, speed, crf, cancel_event=None) -> SpeedMeasurement | None:
+    """Codifica o conteúdo de um SyntheticScreen com uma velocidade do encoder e mede o tempo médio por quadro."""
+    # PyAV e NumPy só na medição: o cache e o tune_preset são usados na abertura do
+    # aplicativo e não devem trazer a pilha de mídia junto.
+    import av
+    import numpy as np
+
+    video = VideoSettings(codec=codec, resolution=(screen.width, screen.height), fps=CALIBRATION_FPS, crf=crf)
+    encoder = av.CodecContext.create(codec, 'w')
+    encoder.width = screen.width
+    encoder.height = screen.height
+    encoder.pix_fmt = 'yuv420p'
+    encoder.time_base = Fraction(1, CALIBRATION_FPS)
+    encoder.framerate = Fraction(CALIBRATION_FPS, 1)
+    encoder.options = encoder_options(video, speed)
+
+    bgra = np.empty(screen.shape, dtype=np.uint8)
+    total_frames = int(CALIBRATION_SECONDS * CALIBRATION_FPS)
+    encode_seconds = 0.0
+    total_bytes = 0
+    frames = 0
+    started = time.perf_counter()
+
+    while frames < total_frames:
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        if frames >= MIN_CANDIDATE_FRAMES and time.perf_counter() - started > MAX_CANDIDATE_SECONDS:
+            break
+        screen.frame(frames, out=bgra)
+        frame = av.VideoFrame.from_ndarray(bgra, format='bgra').reformat(format='yuv420p')
+        frame.pts = frames
+
+        t0 = time.perf_counter()
+        packets = encoder.encode(frame)
+        encode_seconds += time.perf_counter() - t0
+        total_bytes += sum(packet.size for packet in packets)
+        frames += 1
+
+    t0 = time.perf_counter()
+    packets = encoder.encode(None)
+    encode_seconds += time.perf_counter() - t0
+    total_bytes += sum(packet.size for packet in packets)
+
+    return SpeedMeasurement(encode_ms=encode_seconds / frames * 1000, frame_bits=total_bytes * 8 / frames, frames=frames)
+
+
+def calibrate(codec, resolution, crf, cancel_event=None, progress=None) -> dict[str, SpeedMeasurement]:
+    """
+    Mede todas as velocidades do codec em uma resolução, da mais rápida à mais
+    lenta. Quando uma velocidade já passa do dobro do tempo real, as mais
+    lentas não são medidas (não seriam escolhidas de qualquer forma).
+    """
+    from src.core.synthetic import SyntheticScreen  # importado aqui: traz o OpenCV
+
+    screen = SyntheticScreen(*resolution)
+    measurements = {}
+    for speed in reversed(SPEED_LADDERS[codec]):
+        if progress:
+            progress(f"{codec} {resolution_key(resolution)}: {speed}")
+        measurement = measure_speed(screen, codec, speed, crf, cancel_event)
+        if measurement is None:
+            return {}
+        measurements[speed] = measurement
+        logging.info(
+            f"Calibração {codec} {resolution_key(resolution)} [{speed}]: {measurement.encode_ms:.1f} ms/quadro, "
+            f"{measurement.bitrate(CALIBRATION_FPS) / 1000:.0f} kbps a {CALIBRATION_FPS} fps."
+        )
+        if measurement.load(CALIBRATION_FPS) > 2 * REALTIME_LOAD:
+            break
+
+    ordered = {speed: measurements[speed] for speed in SPEED_LADDERS[codec] if speed in measurements}
+    _store_measurements(resolution, codec, crf, ordered)
+    return ordered
+
+
+class CalibrationRunner:
+    """
+    Executa a calibração em uma thread de fundo, uma de cada vez. A janela de
+    configurações consulta `progress` e `is_running`; a gravação pode cancelar
+    para não disputar CPU com o encoder.
+    """
+    def __init__(self):
+        self._thread = None
+        self._cancel = threading.Event()
+        self.progress = ""
+        self.finished_at = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, targets) -> bool:
+        """Calibra cada par (codec, resolução, crf) em `targets`. Retorna False se já estiver rodando."""
+        if self.is_running:
+            return False
+        self._cancel.clear()
+        self.progress = "Iniciando calibração..."
+        self._thread = threading.Thread(target=self._run, args=(list(targets),), name="Calibracao", daemon=True)
+        self._thread.start()
+        return True
+
+    def cancel(self):
+        if self.is_running:
+            self._cancel.set()
+
+    def _set_progress(self, text):
+        self.progress = f"Calibrando {text}..."
+
+    def _run(self, targets):
+        started = time.perf_counter()
+        try:
+            for codec, resolution, crf in targets:
+                if not calibrate(codec, resolution, crf, self._cancel, self._set_progress):
+                    self.progress = "Calibração cancelada."
+                    logging.info("Calibração cancelada.")
+                    return
+            self.progress = "Calibração concluída."
+            logging.info(f"Calibração concluída em {time.perf_counter() - started:.1f}s.")
+        except Exception as e:
+            self.progress = "Falha na calibração."
+            logging.error(f"Falha na calibração do encoder. Erro: {e}")
+        finally:
+            self.finished_at = time.monotonic()
+
+
+calibration_runner = CalibrationRunner()
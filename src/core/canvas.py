@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+
+from src.core.buffers import FrameBufferPool
+
+
+def _even(value: float) -> int:
+    return max(2, int(value) // 2 * 2)
+
+
+class MonitorCanvas:
+    """
+    Junta vários monitores numa única tela, lado a lado (da esquerda para a
+    direita, na ordem em que estão na área de trabalho), cada um na sua
+    própria escala: monitores mais altos que `target_height` são reduzidos
+    para essa altura, os demais entram em tamanho nativo.
+
+    A área de trabalho inteira é capturada numa só chamada ao backend e cada
+    monitor é recortado dela. As telas compostas vêm de um pool e voltam a
+    ele com `release`, como os buffers de conversão.
+    """
+    def __init__(self, monitors, target_height):
+        self.monitors = sorted(monitors, key=lambda m: (m['left'], m['top']))
+        self.bounds = {
+            'left': min(m['left'] for m in self.monitors),
+            'top': min(m['top'] for m in self.monitors),
+        }
+        self.bounds['width'] = max(m['left'] + m['width'] for m in self.monitors) - self.bounds['left']
+        self.bounds['height'] = max(m['top'] + m['height'] for m in self.monitors) - self.bounds['top']
+
+        # (monitor, escala, x no canvas, largura, altura) de cada monitor.
+        self.placements = []
+        x = 0
+        for monitor in self.monitors:
+            scale = min(1.0, target_height / monitor['height'])
+            width = max(1, round(monitor['width'] * scale))
+            height = max(1, round(monitor['height'] * scale))
+            self.placements.append((monitor, scale, x, width, height))
+            x += width
+        self.width = _even(x + 1)
+        self.height = _even(max(p[4] for p in self.placements) + 1)
+
+        self._scratch = [
+            np.empty((height, width, 4), dtype=np.uint8) if scale < 1.0 else None
+            for _, scale, _, width, height in self.placements
+        ]
+        self.pool: FrameBufferPool = None
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return (self.height, self.width, 4)
+
+    def allocate_pool(self, count):
+        self.pool = FrameBufferPool(self.shape, count=count)
+
+    def release(self, image):
+        if self.pool is not None:
+            self.pool.release(image)
+
+    def grab(self, backend) -> np.ndarray:
+        """Captura todos os monitores pelo `backend` e devolve a tela composta (BGRA), vinda do pool."""
+        desktop = backend.grab(self.bounds)
+        canvas = self.pool.acquire()
+        for (monitor, scale, x, width, height), scratch in zip(self.placements, self._scratch):
+            top = monitor['top'] - self.bounds['top']
+            left = monitor['left'] - self.bounds['left']
+            region = desktop[top:top + monitor['height'], left:left + monitor['width']]
+            if scratch is not None:
+                region = self.pool.ensure_target(
+                    cv2.resize(region, (width, height), dst=scratch, interpolation=cv2.INTER_AREA), scratch
+                )
+            canvas[:height, x:x + width] = region
+            # O que sobra abaixo de monitores mais baixos fica preto.
+            canvas[height:, x:x + width] = 0
+        canvas[:, self.placements[-1][2] + self.placements[-1][3]:] = 0
+        return canvas
+
+    def locate(self, x, y):
+        """Converte um ponto da área de trabalho para o canvas: (x, y, escala), ou None fora dos monitores."""
+        for monitor, scale, offset, _, _ in self.placements:
+            if monitor['left'] <= x < monitor['left'] + monitor['width'] and \
+                    monitor['top'] <= y < monitor['top'] + monitor['height']:
+                return offset + (x - monitor['left']) * scale, (y - monitor['top']) * scale, scale
+        return None
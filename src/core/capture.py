@@ -1,15 +1,21 @@
 import os
-import mss
+import logging
 import tkinter as tk
-from PIL import Image
 from datetime import datetime
 from tkinter import simpledialog
 import re
 
 # Assuming these are the correct locations from the original file
+from src.core.backends import grabber
+from src.core.monitors import topology
 from src.ui.preparation_mode import PreparationOverlayManager
 from src.ui.dialogs import show_success_dialog
 from src.ui.capture_indicator import CaptureIndicator
+from src.ui.region_selector import RegionSelector
+from src.ui.animation import animation_scheduler, REASON_CAPTURE
+from src.core.targets import (
+    TARGET_WINDOW, TARGET_REGION, DEFAULT_CAPTURE_TARGET, capture_region, find_window_at, window_rect
+)
 
 def is_valid_foldername(name):
     """ Helper function to validate folder names. """
@@ -19,9 +25,11 @@ def is_valid_foldername(name):
     return True
 
 class ScreenCaptureModule:
-    def __init__(self, root, save_path):
+    def __init__(self, root, save_path, app_config=None):
         self.root = root
         self.save_path = save_path
+        self.app_config = app_config if app_config is not None else {}
+        self.region_selector = None
         self.overlay_manager = None # Will be instantiated in start_capture_session
         self.capture_indicator = CaptureIndicator(self.root, self)
 
@@ -44,6 +52,8 @@ class ScreenCaptureModule:
         if self.is_in_session:
             return
         self.is_in_session = True
+        # A animação da janela principal para durante a sessão.
+        animation_scheduler(self.root).suspend(REASON_CAPTURE)
 
         # This part handles displaying overlays on all screens
         self.overlay_manager = PreparationOverlayManager(
@@ -91,7 +101,35 @@ class ScreenCaptureModule:
 
 
     def take_screenshot(self, active_monitor):
-        """ Captures a screenshot of the specified monitor and updates the session. """
+        """ Captures a screenshot of the configured target (monitor, window or region) and updates the session. """
+        if not self.is_in_session:
+            return
+
+        target = self.app_config.get("CaptureTarget", DEFAULT_CAPTURE_TARGET)
+        if target == TARGET_REGION:
+            if self.region_selector and self.region_selector.winfo_exists():
+                return
+            desktop = topology.desktop()
+            # A captura acontece depois que a camada de seleção some da tela.
+            self.region_selector = RegionSelector(
+                self.root, desktop,
+                on_selected=lambda region: self.root.after(100, self._capture_region, region),
+                on_cancel=lambda: setattr(self, "region_selector", None)
+            )
+            return
+
+        region = active_monitor
+        if target == TARGET_WINDOW:
+            window = find_window_at(*self.root.winfo_pointerxy())
+            rect = window_rect(window) if window else None
+            if rect:
+                region = rect
+            else:
+                logging.warning("Nenhuma janela sob o cursor; capturando a tela ativa.")
+        self._capture_region(region)
+
+    def _capture_region(self, region):
+        self.region_selector = None
         if not self.is_in_session:
             return
 
@@ -99,10 +137,9 @@ class ScreenCaptureModule:
         if not self.screenshots:
             self.transform_command_bar_for_session()
 
-        # Second Block: Capture the image
-        with mss.mss() as sct:
-            sct_img = sct.grab(active_monitor)
-            img = Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
+        # Second Block: Capture only the target rectangle
+        # O backend da thread da interface fica aberto entre as capturas.
+        img = capture_region(grabber.backend(), region)
 
         # Third Block: Add image to list and update counter
         self.screenshots.append(img)
@@ -155,6 +192,7 @@ class ScreenCaptureModule:
             self.overlay_manager = None
 
         # Show the main window again if it was hidden
+        animation_scheduler(self.root).resume(REASON_CAPTURE)
         self.root.deiconify()
 
         # O FEITIÇO DO ZERAMENTO VISUAL
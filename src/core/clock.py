@@ -0,0 +1,215 @@
+import logging
+import time
+
+import numpy as np
+
+# Correção da deriva entre o relógio de um dispositivo de áudio e o relógio de mídia:
+# - erros (suavizados) abaixo de DRIFT_DEADBAND não são corrigidos; a correção
+#   termina quando o erro volta a ficar abaixo de DRIFT_RELEASE;
+# - um erro é absorvido em cerca de DRIFT_CORRECTION_SECONDS, sem passar de
+#   DRIFT_MAX_RATIO de mudança de velocidade (0,2%, ~3,5 cents: inaudível);
+# - DRIFT_SMOOTHING é o peso de cada bloco na média do erro, que filtra o jitter
+#   de `recorder.record()` (~50 blocos, cerca de 1 s).
+DRIFT_DEADBAND = 0.010
+DRIFT_RELEASE = 0.002
+DRIFT_CORRECTION_SECONDS = 10.0
+DRIFT_MAX_RATIO = 0.002
+DRIFT_SMOOTHING = 0.02
+# Um bloco que chega mais tarde do que isto em relação ao esperado pode ser um buraco
+# na entrega do dispositivo (o loopback do Windows fica mudo enquanto nada toca) ou
+# só a thread de leitura atrasada, com o dispositivo guardando as amostras. Os blocos
+# ficam retidos por até DRIFT_GAP_CONFIRM_SECONDS: se a leitura alcança o relógio, era
+# atraso; se não, o buraco é preenchido com silêncio antes deles.
+DRIFT_GAP_SECONDS = 0.05
+DRIFT_GAP_CONFIRM_SECONDS = 0.1
+# Folga (em amostras) dos buffers da reamostragem: com a razão variando até
+# DRIFT_MAX_RATIO, um bloco do mesmo tamanho pode render uma ou duas amostras a mais.
+DRIFT_BUFFER_MARGIN = 16
+
+
+class MediaClock:
+    """
+    Relógio único de uma gravação. Quadros de vídeo e blocos de áudio são
+    carimbados com `now()` no instante da captura e `start()` fixa o instante
+    que vira o PTS zero de todos os streams.
+
+    A base é `time.perf_counter`, monotônica e comum a todo o sistema: um
+    MediaClock recriado com o mesmo `started_at` em outro processo é o mesmo
+    relógio.
+    """
+    def __init__(self, started_at=None):
+        self.started_at = started_at
+
+    @staticmethod
+    def now() -> float:
+        return time.perf_counter()
+
+    def start(self, at=None) -> float:
+        """Fixa o PTS zero (agora, ou em `at`) se ainda não foi fixado; retorna o instante."""
+        if self.started_at is None:
+            self.started_at = self.now() if at is None else at
+        return self.started_at
+
+    def elapsed(self, timestamp=None) -> float:
+        """Segundos desde o PTS zero até `timestamp` (ou até agora)."""
+        return (self.now() if timestamp is None else timestamp) - self.started_at
+
+    def to_pts(self, timestamp, time_base) -> int:
+        return round(self.elapsed(timestamp) / time_base)
+
+
+class DriftCorrector:
+    """
+    Mantém a linha do tempo de uma fonte de áudio (amostras entregues) colada ao
+    relógio de mídia.
+
+    Cada bloco chega com o carimbo da captura; a diferença entre as amostras já
+    entregues e as que o relógio diz que deveriam existir é o erro. O jitter da
+    leitura é filtrado por uma média móvel; um erro que persiste (a deriva do
+    cristal do dispositivo, ou a latência do `record()` acumulada) é corrigido
+    reamostrando os blocos numa razão levemente diferente de 1, com a fase
+    contínua entre blocos. Um atraso súbito maior que DRIFT_GAP_SECONDS que não
+    é recuperado logo em seguida é um buraco e vira silêncio. As correções são
+    registradas no log.
+    """
+    def __init__(self, samplerate, name=""):
+        self.samplerate = samplerate
+        self.name = name
+        self.ratio = 1.0
+        self.corrections = 0
+        self.adjusted_samples = 0
+        self.gaps = 0
+        self.gap_samples = 0
+        self.max_error = 0.0
+
+        self._origin = None
+        self._produced = 0
+        self._error = 0.0
+        self._correcting = False
+        # Fase da próxima amostra de saída, em amostras de entrada a partir da última
+        # amostra do bloco anterior (1.0 = a primeira do bloco seguinte, sem atraso fracionário).
+        self._phase = 1.0
+        self._previous = None
+        # Buffers de `_stretch`, criados no primeiro bloco reamostrado.
+        self._source = None
+        self._out = None
+        # Blocos retidos enquanto um atraso não é confirmado como buraco.
+        self._held = []
+        self._held_since = 0.0
+
+    def process(self, captured_at, data):
+        """
+        Recebe um bloco (quadros x canais) carimbado em `captured_at`; retorna o
+        áudio corrigido, que pode juntar blocos retidos ou vir vazio.
+        """
+        if self._origin is None:
+            self._origin = captured_at - len(data) / self.samplerate
+
+        held_frames = sum(len(block) for block in self._held)
+        error = self._produced + held_frames + len(data) - (captured_at - self._origin) * self.samplerate
+        delay = self._error - error
+        gap = DRIFT_GAP_SECONDS * self.samplerate
+        if self._held:
+            self._held.append(data)
+            if delay < gap / 2:
+                data = np.concatenate(self._held)  # a leitura alcançou o relógio: era só atraso
+            elif captured_at - self._held_since >= DRIFT_GAP_CONFIRM_SECONDS:
+                silence = int(delay)
+                data = np.concatenate([np.zeros((silence, data.shape[1]), dtype=data.dtype)] + self._held)
+                self.gaps += 1
+                self.gap_samples += silence
+                error += silence
+            else:
+                return data[:0]
+            self._held = []
+        elif self._previous is not None and delay > gap:
+            self._held = [data]
+            self._held_since = captured_at
+            return data[:0]
+        self._error += DRIFT_SMOOTHING * (error - self._error) if self._previous is not None else error
+        self.max_error = max(self.max_error, abs(self._error) / self.samplerate)
+        self._update_ratio()
+
+        if self._previous is None or (self.ratio == 1.0 and self._phase == 1.0):
+            out = data
+        else:
+            out = self._stretch(data)
+        if len(data):
+            self._previous = data[-1:]
+        self._produced += len(out)
+        self.adjusted_samples += len(out) - len(data)
+        return out
+
+    def _update_ratio(self):
+        error_seconds = self._error / self.samplerate
+        if not self._correcting and abs(error_seconds) > DRIFT_DEADBAND:
+            self._correcting = True
+            self.corrections += 1
+            logging.info(f"Áudio '{self.name}': deriva de {error_seconds * 1000:+.0f} ms em relação ao relógio; corrigindo.")
+        elif self._correcting and abs(error_seconds) < DRIFT_RELEASE:
+            self._correcting = False
+            self.ratio = 1.0
+            # Volta à cópia direta; o resto de fase (menos de uma amostra) é descartado.
+            self._phase = 1.0
+            logging.info(f"Áudio '{self.name}': deriva corrigida (erro {error_seconds * 1000:+.1f} ms).")
+        if self._correcting:
+            # Adiantado (erro positivo) entrega menos amostras; atrasado, mais.
+            adjust = max(-DRIFT_MAX_RATIO, min(DRIFT_MAX_RATIO, error_seconds / DRIFT_CORRECTION_SECONDS))
+            self.ratio = 1.0 - adjust
+
+    def _stretch(self, data):
+        """
+        Reamostra o bloco na razão atual por interpolação linear, continuando a fase do anterior.
+
+        Os buffers (fonte, posições, saída) são reaproveitados entre blocos e só crescem
+        quando chega um bloco maior; o retorno é válido até a próxima chamada.
+        """
+        step = 1.0 / self.ratio
+        frames, channels = data.shape
+        if self._source is None or len(self._source) < frames + 1 or self._source.shape[1] != channels:
+            self._source = np.empty((frames + 1, channels), dtype=np.float32)
+        source = self._source[:frames + 1]
+        source[0] = self._previous[-1]
+        source[1:] = data
+        last = frames
+        count = int(np.floor((last - self._phase) / step)) + 1
+        if count <= 0:
+            self._phase -= frames
+            return data[:0]
+        if self._out is None or len(self._out) < count or self._out.shape[1] != channels:
+            capacity = count + DRIFT_BUFFER_MARGIN
+            self._ramp = np.arange(capacity, dtype=np.float64)
+            self._positions = np.empty(capacity, dtype=np.float64)
+            self._fraction = np.empty(capacity, dtype=np.float64)
+            self._index = np.empty(capacity, dtype=np.intp)
+            self._out = np.empty((capacity, channels), dtype=np.float32)
+            self._next = np.empty((capacity, channels), dtype=np.float32)
+        positions = self._positions[:count]
+        fraction = self._fraction[:count]
+        index = self._index[:count]
+        out = self._out[:count]
+        upper = self._next[:count]
+
+        np.multiply(self._ramp[:count], step, out=positions)
+        positions += self._phase
+        # Amostra à esquerda de cada posição; a última posição pode cair exatamente
+        # sobre a última amostra, que então é interpolada com peso 1 a partir da anterior.
+        np.floor(positions, out=fraction)
+        index[:] = fraction
+        np.minimum(index, last - 1, out=index)
+        np.subtract(positions, index, out=fraction)
+        np.take(source, index, axis=0, out=out)
+        index += 1
+        np.take(source, index, axis=0, out=upper)
+        upper -= out
+        upper *= fraction[:, None]
+        out += upper
+        self._phase = positions[-1] + step - last
+        return out
+
+    def describe(self) -> str:
+        return (
+            f"{self.corrections} correções de deriva ({self.adjusted_samples / self.samplerate * 1000:+.0f} ms ajustados, "
+            f"erro máx. {self.max_error * 1000:.0f} ms), {self.gaps} buracos preenchidos com "
+            f"{self.gap_samples / self.samplerate:.2f}s de silêncio"
+        )
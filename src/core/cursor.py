@@ -0,0 +1,203 @@
+import collections
+import logging
+import time
+
+import cv2
+import numpy as np
+
+from src.core.assets import assets
+
+# Tamanho do cursor em 96 DPI (100%), o mesmo usado pelo Windows.
+BASE_CURSOR_SIZE = 32
+BASE_DPI = 96
+
+# Destaque de clique: anel amarelo que some em CLICK_HIGHLIGHT_DURATION segundos.
+CLICK_HIGHLIGHT_COLOR = (241, 196, 15)
+CLICK_HIGHLIGHT_DURATION = 0.35
+CLICK_HIGHLIGHT_FADE_STEPS = 4
+
+
+def get_system_dpi() -> int:
+    """Retorna o DPI do sistema (Windows 10+); 96 nas demais plataformas."""
+    try:
+        import ctypes
+        return int(ctypes.windll.user32.GetDpiForSystem()) or BASE_DPI
+    except Exception:
+        return BASE_DPI
+
+
+class CursorSprite:
+    """
+    Sprite RGBA em alfa pré-multiplicado, pronto para mesclar sem conversões:
+    `premultiplied` guarda cor*alfa (+127 para arredondar) e `inverse_alpha`
+    guarda 255-alfa, ambos em uint16 para que a soma caiba sem estouro.
+    """
+    def __init__(self, rgba: np.ndarray, channel_order="rgb"):
+        rgba = rgba.astype(np.uint16)
+        color = rgba[..., :3] if channel_order == "rgb" else rgba[..., 2::-1]
+        alpha = rgba[..., 3:4]
+
+        self.height, self.width = rgba.shape[:2]
+        self.premultiplied = np.ascontiguousarray(color * alpha + 127, dtype=np.uint16)
+        self.inverse_alpha = np.ascontiguousarray(255 - alpha, dtype=np.uint16)
+        self._scratch = np.empty((self.height, self.width, 3), dtype=np.uint16)
+
+    def blend_into(self, frame: np.ndarray, x: int, y: int):
+        """Mescla o sprite no quadro, no lugar, recortando nas bordas. Custo O(área do sprite)."""
+        frame_h, frame_w = frame.shape[:2]
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + self.width, frame_w), min(y + self.height, frame_h)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        sx0, sy0 = x0 - x, y0 - y
+        sx1, sy1 = sx0 + (x1 - x0), sy0 + (y1 - y0)
+
+        roi = frame[y0:y1, x0:x1, :3]
+        scratch = self._scratch[sy0:sy1, sx0:sx1]
+        np.multiply(roi, self.inverse_alpha[sy0:sy1, sx0:sx1], out=scratch)
+        np.add(scratch, self.premultiplied[sy0:sy1, sx0:sx1], out=scratch)
+        np.floor_divide(scratch, 255, out=scratch)
+        np.copyto(roi, scratch, casting='unsafe')
+
+
+def _ring_rgba(diameter: int, opacity: float) -> np.ndarray:
+    """Gera um anel suavizado (RGBA) para o destaque de clique."""
+    radius = diameter / 2
+    yy, xx = np.mgrid[0:diameter, 0:diameter]
+    distance = np.hypot(xx + 0.5 - radius, yy + 0.5 - radius)
+    thickness = max(2.0, diameter * 0.12)
+    edge = np.clip(1 - np.abs(distance - (radius - thickness)) / thickness, 0, 1)
+    fill = np.clip(radius - distance, 0, 1) * 0.25
+
+    rgba = np.zeros((diameter, diameter, 4), dtype=np.uint8)
+    rgba[..., :3] = CLICK_HIGHLIGHT_COLOR
+    rgba[..., 3] = (np.maximum(edge, fill) * 255 * opacity).astype(np.uint8)
+    return rgba
+
+
+class CursorCompositor:
+    """
+    Desenha o cursor (e, opcionalmente, destaques de clique) diretamente no
+    quadro em NumPy, tocando só a região do sprite.
+
+    A imagem do cursor é decodificada uma única vez; cada tamanho pedido
+    (escala de saída x DPI) é reamostrado e pré-multiplicado uma vez e fica
+    no cache de recursos, compartilhado entre gravações. Os cliques chegam
+    por um listener do pynput.
+    """
+    def __init__(self, cursor_path, channel_order="rgb", dpi=None, highlight_clicks=False):
+        self.channel_order = channel_order
+        self.dpi_scale = (dpi or get_system_dpi()) / BASE_DPI
+        self.highlight_clicks = highlight_clicks
+
+        self.cursor_path = cursor_path
+        self._source = assets.array(cursor_path, mode="RGBA", dtype=np.float32)
+        self._sprites = {}
+        self._ring_sprites = {}
+
+        self._clicks = collections.deque(maxlen=8)
+        self._listener = None
+
+    # --- Sprites ---
+
+    def sprite_for(self, output_scale: float) -> CursorSprite:
+        size = max(1, round(BASE_CURSOR_SIZE * self.dpi_scale * output_scale))
+        sprite = self._sprites.get(size)
+        if sprite is None:
+            rgba = assets.cached((self.cursor_path, (size, size), "RGBA:premultiplied"),
+                                 lambda: self._resize_premultiplied(size))
+            sprite = CursorSprite(rgba, self.channel_order)
+            self._sprites[size] = sprite
+        return sprite
+
+    def _resize_premultiplied(self, size: int) -> np.ndarray:
+        # Reamostra em alfa pré-multiplicado para não criar halo nas bordas do cursor.
+        source = self._source.copy()
+        source[..., :3] *= source[..., 3:4] / 255.0
+        resized = cv2.resize(source, (size, size), interpolation=cv2.INTER_AREA)
+        alpha = resized[..., 3:4]
+        resized[..., :3] = np.divide(resized[..., :3] * 255.0, alpha, out=np.zeros_like(resized[..., :3]), where=alpha > 0)
+        return np.clip(resized, 0, 255).astype(np.uint8)
+
+    def _ring_sprite(self, diameter: int, step: int) -> CursorSprite:
+        key = (diameter, step)
+        sprite = self._ring_sprites.get(key)
+        if sprite is None:
+            opacity = 1 - step / CLICK_HIGHLIGHT_FADE_STEPS
+            sprite = CursorSprite(_ring_rgba(diameter, opacity), self.channel_order)
+            self._ring_sprites[key] = sprite
+        return sprite
+
+    # --- Click highlight ---
+
+    def start(self):
+        """Inicia o listener de cliques, se o destaque estiver habilitado."""
+        if not self.highlight_clicks or self._listener:
+            return
+        try:
+            from pynput import mouse
+            self._listener = mouse.Listener(on_click=self._on_click)
+            self._listener.daemon = True
+            self._listener.start()
+        except Exception as e:
+            logging.warning(f"Destaque de cliques indisponível: {e}")
+            self._listener = None
+
+    def stop(self):
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+
+    def _on_click(self, x, y, _button, pressed):
+        if pressed:
+            self._clicks.append((time.perf_counter(), x, y))
+
+    def has_active_highlight(self, timestamp) -> bool:
+        """Indica se algum destaque de clique ainda está visível no instante dado."""
+        return any(0 <= timestamp - clicked_at <= CLICK_HIGHLIGHT_DURATION for clicked_at, _, _ in list(self._clicks))
+
+    # --- Compositing ---
+
+    @staticmethod
+    def _to_frame(monitor, x, y, frame_w, frame_h):
+        """Leva um ponto global para o quadro: (x, y, escala), ou None se ele não está na área gravada."""
+        if hasattr(monitor, "locate"):
+            # Canvas com vários monitores, cada um na sua escala.
+            located = monitor.locate(x, y)
+            if located is None:
+                return None
+            canvas_x, canvas_y, scale = located
+            factor = frame_w / monitor.width
+            return int(canvas_x * factor), int(canvas_y * factor), scale * factor
+        scale_x = frame_w / monitor['width']
+        scale_y = frame_h / monitor['height']
+        return int((x - monitor['left']) * scale_x), int((y - monitor['top']) * scale_y), scale_x
+
+    def draw(self, frame: np.ndarray, cursor_pos, monitor, timestamp=None):
+        """
+        Desenha destaques de clique recentes e o cursor no quadro.
+        `cursor_pos` está em coordenadas globais; `monitor` é a área capturada
+        (um monitor do mss ou um MonitorCanvas).
+        """
+        frame_h, frame_w = frame.shape[:2]
+
+        if self._clicks:
+            now = timestamp if timestamp is not None else time.perf_counter()
+            for clicked_at, click_x, click_y in list(self._clicks):
+                age = now - clicked_at
+                if age < 0 or age > CLICK_HIGHLIGHT_DURATION:
+                    continue
+                located = self._to_frame(monitor, click_x, click_y, frame_w, frame_h)
+                if located is None:
+                    continue
+                center_x, center_y, scale = located
+                diameter = max(8, round(BASE_CURSOR_SIZE * 1.5 * self.dpi_scale * scale))
+                step = min(int(age / CLICK_HIGHLIGHT_DURATION * CLICK_HIGHLIGHT_FADE_STEPS), CLICK_HIGHLIGHT_FADE_STEPS - 1)
+                self._ring_sprite(diameter, step).blend_into(frame, center_x - diameter // 2, center_y - diameter // 2)
+
+        if cursor_pos:
+            located = self._to_frame(monitor, cursor_pos[0], cursor_pos[1], frame_w, frame_h)
+            if located is not None:
+                cursor_x, cursor_y, scale = located
+                self.sprite_for(scale).blend_into(frame, cursor_x, cursor_y)
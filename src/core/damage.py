@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+
+# Cada tile cobre DEFAULT_TILE_SIZE x DEFAULT_TILE_SIZE pixels da amostra.
+DEFAULT_TILE_SIZE = 32
+# Uma amostra a cada DEFAULT_SAMPLE_STEP pixels em cada eixo (1/4 da tela com 2).
+DEFAULT_SAMPLE_STEP = 2
+# Mesmo sem mudanças, um quadro é enviado a cada DEFAULT_KEEPALIVE segundos.
+DEFAULT_KEEPALIVE = 1.0
+
+
+class DamageDetector:
+    """
+    Detecta se uma captura mudou em relação à anterior, numa grade de tiles.
+
+    Cada pixel BGRA é comparado como um único uint32, numa amostra com passo
+    `sample_step`. A amostra é copiada para buffers pré-alocados (com margem
+    até múltiplos do tile), então a comparação não aloca nada além da pequena
+    matriz de tiles sujos.
+    """
+    def __init__(self, frame_shape, tile_size=DEFAULT_TILE_SIZE, sample_step=DEFAULT_SAMPLE_STEP):
+        height, width = frame_shape[:2]
+        self.frame_shape = (height, width)
+        self.sample_step = max(1, sample_step)
+        self.tile_size = max(1, tile_size)
+
+        self.sample_height = math.ceil(height / self.sample_step)
+        self.sample_width = math.ceil(width / self.sample_step)
+        self.rows = math.ceil(self.sample_height / self.tile_size)
+        self.cols = math.ceil(self.sample_width / self.tile_size)
+
+        padded = (self.rows * self.tile_size, self.cols * self.tile_size)
+        self._current = np.zeros(padded, dtype=np.uint32)
+        self._previous = np.zeros(padded, dtype=np.uint32)
+        self._diff = np.zeros(padded, dtype=bool)
+        self._has_previous = False
+
+        self.frames = 0
+        self.skipped = 0
+        self.dirty_tiles = 0
+
+    @property
+    def total_tiles(self) -> int:
+        return self.rows * self.cols
+
+    def dirty_fraction(self, bgra: np.ndarray) -> float:
+        """Compara a captura (altura, largura, 4) com a anterior e retorna a fração de tiles alterados."""
+        pixels = bgra.view(np.uint32).reshape(bgra.shape[0], bgra.shape[1])
+        sample = pixels[::self.sample_step, ::self.sample_step]
+        np.copyto(self._current[:self.sample_height, :self.sample_width], sample)
+
+        if not self._has_previous:
+            self._has_previous = True
+            dirty = self.total_tiles
+        else:
+            np.not_equal(self._current, self._previous, out=self._diff)
+            tiles = self._diff.reshape(self.rows, self.tile_size, self.cols, self.tile_size)
+            dirty = int(np.count_nonzero(tiles.any(axis=(1, 3))))
+
+        self._current, self._previous = self._previous, self._current
+        self.frames += 1
+        self.dirty_tiles += dirty
+        return dirty / self.total_tiles
+
+    def record_skip(self):
+        self.skipped += 1
+
+    @property
+    def skip_ratio(self) -> float:
+        return self.skipped / self.frames if self.frames else 0.0
+
+    @property
+    def mean_dirty_fraction(self) -> float:
+        return self.dirty_tiles / (self.frames * self.total_tiles) if self.frames else 0.0
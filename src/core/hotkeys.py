@@ -1,6 +1,8 @@
 import configparser
 from pynput import keyboard
 from src.config.settings import CONFIG_FILE
+from src.core.loop_probe import event_loop_probe
+from src.core.monitors import topology
 
 def parse_hotkey_string(hotkey_string):
     """
@@ -39,22 +41,27 @@ def key_listener_thread_proc(capture_module, recording_module, root_window, main
 
     capture_hotkey_str = config.get('Hotkeys', 'capture', fallback='F9')
     record_hotkey_str = config.get('Hotkeys', 'record', fallback='F10')
+    replay_hotkey_str = config.get('Hotkeys', 'replay', fallback='F8')
+
+    def dispatch(callback, *args):
+        # root.after(0, ...) medido: o atraso de cada atalho até o Tk rodá-lo vai para a sonda do loop.
+        event_loop_probe.dispatch(root_window, callback, *args)
 
     def on_activate_capture():
         # Logic as per the new blueprint
         # This check needs to be based on the recording module's state attribute
-        if recording_module.is_recording:
+        if recording_module.is_busy:
             return
 
         if not capture_module.is_in_session:
             # Inicia a sessão
-            root_window.after(0, capture_module.start_capture_session)
+            dispatch(capture_module.start_capture_session)
         else:
-            # Tira o screenshot dentro da sessão
-            # The 'get_active_monitor_logic' is implemented by the capture module's overlay
-            active_monitor = capture_module.overlay_manager.get_active_monitor() # Pega a tela ativa
+            # Tira o screenshot dentro da sessão, da tela sob o cursor neste instante
+            # (a topologia já a conhece: o listener do mouse a mantém atualizada).
+            active_monitor = topology.pointer_monitor()
             if active_monitor:
-                root_window.after(0, capture_module.take_screenshot, active_monitor)
+                dispatch(capture_module.take_screenshot, active_monitor)
 
     def on_activate_record():
         # Prevent recording from starting if a capture is in preparation.
@@ -64,27 +71,35 @@ def key_listener_thread_proc(capture_module, recording_module, root_window, main
         # This check is illustrative. Assuming is_recording is a boolean property.
         # The actual state transition logic for recording remains unchanged.
         if recording_module.state == "idle":
-            root_window.after(0, recording_module.enter_preparation_mode)
+            dispatch(recording_module.enter_preparation_mode)
         elif recording_module.state == "preparing":
-            root_window.after(0, recording_module.start_recording_mode)
+            dispatch(recording_module.start_recording_mode)
         elif recording_module.state == "recording":
-            root_window.after(0, recording_module.stop_recording)
+            dispatch(recording_module.stop_recording)
+
+    def on_activate_replay():
+        # Salva os últimos segundos do replay em memória (se estiver ativado).
+        if capture_module.is_in_session:
+            return
+        dispatch(recording_module.save_replay)
 
     # It's better to handle exceptions here in case of invalid hotkey formats
     try:
         parsed_capture_hotkey = parse_hotkey_string(capture_hotkey_str)
         parsed_record_hotkey = parse_hotkey_string(record_hotkey_str)
+        parsed_replay_hotkey = parse_hotkey_string(replay_hotkey_str)
 
         def on_escape():
             """Cancels any active preparation mode."""
             if capture_module.is_in_session:
-                root_window.after(0, capture_module.end_capture_session)
+                dispatch(capture_module.end_capture_session)
             elif recording_module.is_preparing:
-                root_window.after(0, recording_module.exit_preparation_mode)
+                dispatch(recording_module.exit_preparation_mode)
 
         hotkeys = {
             parsed_capture_hotkey: on_activate_capture,
             parsed_record_hotkey: on_activate_record,
+            parsed_replay_hotkey: on_activate_replay,
             '<esc>': on_escape
         }
 
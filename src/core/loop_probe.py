@@ -0,0 +1,76 @@
+import logging
+import threading
+import time
+
+from src.core.metrics import LatencyHistogram
+
+# Uma amostra sintética por PROBE_INTERVAL_SECONDS: de uma thread qualquer, `root.after(0, ...)`
+# e o tempo até o Tk rodá-lo, como acontece com cada atalho de teclado.
+PROBE_INTERVAL_SECONDS = 1.0
+# Atrasos acima deste limite são logados na hora; os percentis, a cada PROBE_LOG_SECONDS.
+PROBE_SLOW_MS = 50
+PROBE_LOG_SECONDS = 300
+
+SAMPLE_PROBE = "sonda"
+SAMPLE_HOTKEY = "atalhos"
+
+
+class EventLoopProbe:
+    """
+    Mede a latência do loop do Tk: o tempo entre um `root.after(0, ...)`
+    chamado de outra thread e a execução do callback. A sonda faz uma
+    chamada sintética por segundo; os atalhos de teclado passam por
+    `dispatch`, que mede cada despacho real. Os dois histogramas vão para o
+    log periodicamente (e em `report`).
+    """
+    def __init__(self):
+        self.root = None
+        self.histograms = {SAMPLE_PROBE: LatencyHistogram(), SAMPLE_HOTKEY: LatencyHistogram()}
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._last_log = time.perf_counter()
+
+    def start(self, root):
+        self.root = root
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="SondaLoopTk", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def dispatch(self, root, callback, *args):
+        """`root.after(0, callback, *args)`, medindo quanto o Tk demorou para rodá-lo."""
+        root.after(0, self._run_callback, SAMPLE_HOTKEY, time.perf_counter(), callback, args)
+
+    def _run(self):
+        while not self._stop_event.wait(PROBE_INTERVAL_SECONDS):
+            try:
+                self.root.after(0, self._run_callback, SAMPLE_PROBE, time.perf_counter(), None, ())
+            except RuntimeError:
+                return  # o Tk foi fechado
+
+    def _run_callback(self, kind, queued, callback, args):
+        delay = time.perf_counter() - queued
+        # Os histogramas só são escritos aqui, na thread do Tk.
+        self.histograms[kind].record(delay)
+        if delay * 1000 > PROBE_SLOW_MS:
+            name = getattr(callback, "__name__", kind)
+            logging.warning(f"Loop do Tk atrasado: '{name}' esperou {delay * 1000:.0f} ms para rodar.")
+        if time.perf_counter() - self._last_log > PROBE_LOG_SECONDS:
+            self._last_log = time.perf_counter()
+            logging.info(self.report())
+        if callback:
+            callback(*args)
+
+    def report(self) -> str:
+        parts = []
+        for kind, histogram in self.histograms.items():
+            if histogram.count:
+                stats = histogram.to_dict()
+                parts.append(f"{kind}: {stats['count']} amostras, p50 {stats['p50_ms']} ms, "
+                             f"p99 {stats['p99_ms']} ms, máx. {stats['max_ms']} ms")
+        return "Latência do loop do Tk: " + ("; ".join(parts) or "sem amostras")
+
+
+event_loop_probe = EventLoopProbe()
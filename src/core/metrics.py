@@ -0,0 +1,147 @@
+import json
+import math
+from dataclasses import dataclass, asdict, field
+
+# Etapas do caminho quente cronometradas em cada quadro (ou bloco de áudio):
+# captura, conversão de cor, redimensionamento, cursor, codificação, mux e
+# esvaziamento do anel de áudio (leitura + codificação de um quadro do encoder).
+TIMED_STEPS = ("grab", "convert", "resize", "cursor", "encode", "mux", "audio")
+
+# Histogramas de latência: baldes logarítmicos de HISTOGRAM_MIN_SECONDS a
+# HISTOGRAM_MAX_SECONDS, HISTOGRAM_BUCKETS_PER_DECADE por década (os percentis
+# saem com erro de até ~12%, o bastante para achar o gargalo).
+HISTOGRAM_MIN_SECONDS = 1e-5
+HISTOGRAM_MAX_SECONDS = 10.0
+HISTOGRAM_BUCKETS_PER_DECADE = 20
+
+# Métricas de uma gravação, gravadas ao lado do vídeo (`Evidencia_..._metricas.json`).
+METRICS_SUFFIX = "_metricas.json"
+
+
+class LatencyHistogram:
+    """
+    Histograma de latências de tamanho fixo: `record` é O(1) e não aloca,
+    então pode ficar no caminho quente de cada quadro. Cada histograma é
+    escrito por uma só thread (a da etapa); a leitura dos percentis pode vir
+    de outra.
+    """
+    _BUCKETS = int(math.log10(HISTOGRAM_MAX_SECONDS / HISTOGRAM_MIN_SECONDS) * HISTOGRAM_BUCKETS_PER_DECADE) + 2
+
+    def __init__(self):
+        # Balde 0: até o mínimo; o último: acima do máximo.
+        self.counts = [0] * self._BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        if seconds <= HISTOGRAM_MIN_SECONDS:
+            index = 0
+        else:
+            index = min(self._BUCKETS - 1,
+                        1 + int(math.log10(seconds / HISTOGRAM_MIN_SECONDS) * HISTOGRAM_BUCKETS_PER_DECADE))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q) -> float:
+        """Latência (s) abaixo da qual ficam `q`% das amostras: o limite superior do balde."""
+        if not self.count:
+            return 0.0
+        target = q / 100 * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                if index == self._BUCKETS - 1:
+                    return self.max  # o balde acima do máximo não tem limite superior
+                upper = HISTOGRAM_MIN_SECONDS * 10 ** (index / HISTOGRAM_BUCKETS_PER_DECADE)
+                return min(upper, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class StageTimings:
+    """Um LatencyHistogram por etapa cronometrada do pipeline."""
+    def __init__(self, steps=TIMED_STEPS):
+        self.histograms = {step: LatencyHistogram() for step in steps}
+
+    def record(self, step, seconds):
+        self.histograms[step].record(seconds)
+
+    def to_dict(self) -> dict:
+        """Percentis das etapas que tiveram amostras (o redimensionamento, por exemplo, pode não ocorrer)."""
+        return {step: histogram.to_dict() for step, histogram in self.histograms.items() if histogram.count}
+
+
+@dataclass
+class RecordingSummary:
+    """Resumo de uma gravação: ritmo alcançado e decisões de temporização."""
+    duration: float = 0.0
+    target_fps: float = 0.0
+    frames_captured: int = 0
+    frames_encoded: int = 0
+    dropped_frames: int = 0
+    duplicated_frames: int = 0
+    skipped_unchanged: int = 0
+    max_av_skew_ms: float = 0.0
+    # Anel de áudio: vezes que encheu (estouro) e esperas do encoder sem amostras (falta).
+    audio_overruns: int = 0
+    audio_underruns: int = 0
+    final_quality: str = ""
+    # Percentis de latência por etapa (StageTimings.to_dict) e maior ocupação de cada fila.
+    stage_latency: dict[str, dict] = field(default_factory=dict)
+    max_queue_depths: dict[str, int] = field(default_factory=dict)
+    quality_steps: list[dict] = field(default_factory=list)
+    # Arquivos efetivamente gravados (mais de um quando a gravação é segmentada).
+    output_files: list[str] = field(default_factory=list)
+
+    @property
+    def encoded_fps(self) -> float:
+        """O ritmo que chegou ao arquivo: quadros codificados por segundo (o número de destaque)."""
+        return self.frames_encoded / self.duration if self.duration > 0 else 0.0
+
+    @property
+    def captured_fps(self) -> float:
+        """Quadros capturados por segundo, contando os que as filas descartaram ou que não mudaram."""
+        return self.frames_captured / self.duration if self.duration > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["encoded_fps"] = round(self.encoded_fps, 2)
+        data["captured_fps"] = round(self.captured_fps, 2)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RecordingSummary":
+        return cls(**{name: value for name, value in data.items() if name in cls.__dataclass_fields__})
+
+    def describe(self) -> str:
+        audio = ""
+        if self.audio_overruns or self.audio_underruns:
+            audio = f" (áudio: {self.audio_overruns} estouros, {self.audio_underruns} faltas)"
+        return (
+            f"{self.duration:.1f}s, {self.encoded_fps:.1f}/{self.target_fps:g} fps codificados "
+            f"({self.captured_fps:.1f} capturados), "
+            f"{self.frames_encoded} quadros codificados, {self.dropped_frames} descartados, "
+            f"{self.duplicated_frames} duplicados, {self.skipped_unchanged} sem mudança, "
+            f"desvio A/V máx. {self.max_av_skew_ms:.0f} ms{audio}, "
+            f"{len(self.quality_steps)} ajustes de qualidade (final: {self.final_quality})"
+        )
+
+
+def write_metrics(path, summary: RecordingSummary):
+    """Grava o resumo da gravação (com os percentis por etapa) em JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary.to_dict(), f, indent=2, ensure_ascii=False)
@@ -0,0 +1,236 @@
+import ctypes
+import logging
+import sys
+import threading
+
+from src.core.backends import grabber, create_backend
+
+# GetSystemMetrics: posição e tamanho da área de trabalho virtual e número de monitores.
+# Mudam quando um monitor é ligado, desligado, movido ou muda de resolução.
+_SM_DISPLAY_METRICS = (76, 77, 78, 79, 80)
+
+# Tamanho usado quando nenhum monitor é encontrado (sessão sem tela).
+FALLBACK_MONITOR = {'left': 0, 'top': 0, 'width': 1920, 'height': 1080}
+
+
+def _display_signature():
+    """
+    Assinatura barata (microssegundos) da configuração de telas, ou None onde
+    ela não existe: aí a topologia é relida a cada `refresh()`.
+    """
+    if sys.platform != "win32":
+        return None
+    try:
+        metrics = ctypes.windll.user32.GetSystemMetrics
+        return tuple(metrics(index) for index in _SM_DISPLAY_METRICS)
+    except (AttributeError, OSError):
+        return None
+
+
+def _primary_geometry():
+    """
+    (left, top, largura, altura) do monitor primário segundo o sistema, ou None.
+    O mss não diz qual tela é a primária, e a ordem das telas dele (a do
+    EnumDisplayMonitors, a das saídas do XRandR) não garante que seja a primeira.
+    """
+    try:
+        from screeninfo import get_monitors  # importado aqui: só a leitura da topologia o usa
+
+        return next(((m.x, m.y, m.width, m.height) for m in get_monitors() if m.is_primary), None)
+    except Exception as e:
+        logging.debug(f"Não foi possível consultar o monitor primário. Erro: {e}")
+        return None
+
+
+def _mark_primary(screens):
+    """Marca `is_primary` na tela do monitor primário: pela geometria, ou pela origem (com escala de DPI)."""
+    primary = _primary_geometry()
+    match = None
+    if primary is not None:
+        match = next((s for s in screens if (s['left'], s['top'], s['width'], s['height']) == primary), None) or \
+            next((s for s in screens if (s['left'], s['top']) == primary[:2]), None)
+    if match is None:
+        logging.warning("Nenhum monitor primário detectado. Usando o primeiro monitor da lista.")
+        match = screens[0]
+    for screen in screens:
+        screen['is_primary'] = screen is match
+
+
+class MonitorTopology:
+    """
+    Geometria dos monitores, lida uma vez e guardada até a configuração de
+    telas mudar. Responde "qual monitor contém este ponto" sem consultar o
+    sistema e, enquanto alguém acompanha o monitor ativo (`track`), recebe os
+    movimentos do mouse por um listener do pynput e avisa só quando o cursor
+    passa para outra tela, sem polling.
+
+    Os monitores seguem o formato do mss: `monitors()[0]` é a área de trabalho
+    inteira e os demais são as telas, que também têm um `id` (a posição em
+    `screens()`) e `is_primary`.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._monitors = None
+        self._rects = []  # (left, top, right, bottom, tela), na ordem de screens()
+        self._signature = None
+        self._last_hit = 0
+
+        self._mouse = None
+        self._listener = None
+        self._subscribers = []
+        self._active = None
+
+    # --- Geometria ---
+
+    def monitors(self) -> list[dict]:
+        """A área de trabalho e as telas; relidas só se a configuração de telas mudou."""
+        if self._monitors is None or self._changed():
+            self._load()
+        return self._monitors
+
+    def screens(self) -> list[dict]:
+        return self.monitors()[1:]
+
+    def desktop(self) -> dict:
+        return self.monitors()[0]
+
+    def primary(self) -> dict:
+        """O monitor primário (o primeiro, se o sistema não informar qual é)."""
+        screens = self.screens()
+        return next((screen for screen in screens if screen.get('is_primary')), screens[0])
+
+    def refresh(self) -> bool:
+        """
+        Relê a topologia se ela mudou; sem assinatura da configuração de telas,
+        relê sempre. Chamado ao abrir o modo de preparação. Retorna True se releu.
+        """
+        if self._monitors is not None and _display_signature() is not None and not self._changed():
+            return False
+        self._load()
+        return True
+
+    def invalidate(self):
+        """Descarta a topologia guardada; a próxima consulta a relê."""
+        with self._lock:
+            self._monitors = None
+
+    def _changed(self) -> bool:
+        signature = _display_signature()
+        return signature is not None and signature != self._signature
+
+    def _load(self):
+        signature = _display_signature()
+        # Um backend próprio e de vida curta: o mss guarda os monitores da primeira consulta,
+        # e o backend persistente de cada thread nunca os releria.
+        try:
+            with create_backend(grabber.backend_name) as backend:
+                monitors = [dict(monitor) for monitor in backend.monitors]
+        except Exception as e:
+            logging.error(f"Não foi possível ler os monitores. Usando {FALLBACK_MONITOR['width']}x"
+                          f"{FALLBACK_MONITOR['height']}. Erro: {e}")
+            monitors = [dict(FALLBACK_MONITOR), dict(FALLBACK_MONITOR)]
+        if len(monitors) < 2:
+            monitors.append(dict(monitors[0]))
+        for index, screen in enumerate(monitors[1:]):
+            screen['id'] = index
+        _mark_primary(monitors[1:])
+
+        with self._lock:
+            previous = self._monitors
+            self._monitors = monitors
+            self._rects = [(m['left'], m['top'], m['left'] + m['width'], m['top'] + m['height'], m) for m in monitors[1:]]
+            self._signature = signature
+            self._last_hit = 0
+        if previous is not None and previous[1:] != monitors[1:]:
+            logging.info(f"Configuração de telas mudou: {len(monitors) - 1} monitor(es).")
+
+    def monitor_at(self, x, y) -> dict:
+        """A tela que contém o ponto (ou a primeira, se nenhuma contiver)."""
+        screens = self.screens()
+        return self._screen_at(x, y) or screens[0]
+
+    def _screen_at(self, x, y):
+        rects = self._rects
+        # O cursor quase sempre continua na tela da consulta anterior: ela é testada primeiro.
+        last = self._last_hit
+        if last < len(rects):
+            left, top, right, bottom, screen = rects[last]
+            if left <= x < right and top <= y < bottom:
+                return screen
+        for index, (left, top, right, bottom, screen) in enumerate(rects):
+            if left <= x < right and top <= y < bottom:
+                self._last_hit = index
+                return screen
+        return None
+
+    # --- Monitor ativo (o do cursor) ---
+
+    def pointer_monitor(self) -> dict:
+        """
+        A tela sob o cursor agora. Com o listener rodando, é a última que ele
+        informou; sem ele, uma consulta à posição do mouse.
+        """
+        if self._listener is not None and self._active is not None:
+            return self._active
+        try:
+            if self._mouse is None:
+                from pynput.mouse import Controller as MouseController
+                self._mouse = MouseController()
+            x, y = self._mouse.position
+        except Exception as e:
+            logging.warning(f"Posição do mouse indisponível; usando a primeira tela. Erro: {e}")
+            return self.screens()[0]
+        return self.monitor_at(x, y)
+
+    def track(self, callback):
+        """
+        Chama `callback(tela)` sempre que o cursor passa para outra tela. A
+        chamada vem da thread do listener: quem mexe no Tk usa `root.after`.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+            start = self._listener is None
+        if start:
+            self._active = self.pointer_monitor()
+            self._start_listener()
+
+    def untrack(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+            listener = self._listener if not self._subscribers else None
+            if listener is not None:
+                self._listener = None
+        if listener is not None:
+            listener.stop()
+
+    def _start_listener(self):
+        try:
+            from pynput import mouse
+            listener = mouse.Listener(on_move=self._on_move)
+            listener.daemon = True
+            listener.start()
+        except Exception as e:
+            logging.warning(f"Sem o listener do mouse, o monitor ativo não será acompanhado. Erro: {e}")
+            return
+        with self._lock:
+            if self._subscribers and self._listener is None:
+                self._listener = listener
+                return
+        listener.stop()  # todos saíram enquanto ele abria
+
+    def _on_move(self, x, y):
+        screen = self._screen_at(x, y)
+        if screen is None:
+            return
+        if self._active is not None and self._active['id'] == screen['id']:
+            return
+        self._active = screen
+        for callback in list(self._subscribers):
+            try:
+                callback(screen)
+            except Exception as e:
+                logging.error(f"Erro ao avisar a troca de monitor ativo: {e}")
+
+
+topology = MonitorTopology()
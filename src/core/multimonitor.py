@@ -0,0 +1,174 @@
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import signal
+import time
+from datetime import datetime, timezone
+
+from src.core.metrics import RecordingSummary
+
+# Layouts da gravação de todas as telas:
+# - "separate": cada monitor é capturado e codificado em um processo próprio, um arquivo por monitor.
+# - "composite": os monitores são compostos lado a lado numa só tela e codificados juntos.
+LAYOUT_SEPARATE = "separate"
+LAYOUT_COMPOSITE = "composite"
+MULTI_MONITOR_LAYOUTS = (LAYOUT_SEPARATE, LAYOUT_COMPOSITE)
+DEFAULT_MULTI_MONITOR_LAYOUT = LAYOUT_SEPARATE
+
+# Tempo para os processos carregarem o libav e abrirem encoders, arquivos e captura antes da largada.
+WORKER_STARTUP_TIMEOUT = 20.0
+# O PTS zero fica um pouco depois do sinal de largada, para que todos já estejam esperando por ele.
+START_MARGIN = 0.1
+WORKER_JOIN_TIMEOUT = 10.0
+
+# "spawn" em todas as plataformas: o processo pai tem Tk e threads, que não sobrevivem a um fork.
+_context = multiprocessing.get_context("spawn")
+
+
+def _monitor_worker(preset, monitor, output_filename, options, stop_event, start_event, start_times,
+                    audio_queue, messages, log_queue, live_counters):
+    """Processo de um monitor: abre o pipeline, avisa que está pronto, espera a largada comum e grava."""
+    root_logger = logging.getLogger()
+    root_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root_logger.setLevel(logging.INFO)
+    # O Ctrl+C da linha de comando chega a todo o grupo de processos; quem encerra a
+    # gravação (e fecha os arquivos) é o stop_event do processo principal.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    summary = None
+    try:
+        from src.core.clock import MediaClock
+        from src.core.pipeline import RecordingPipeline
+
+        # Encoder, arquivo e backend de captura abrem antes do "pronto": depois da
+        # largada, cada processo só fixa o PTS zero comum e começa a capturar. (O
+        # cabeçalho, com o creation_time da largada, sai no primeiro pacote, no mux.)
+        clock = MediaClock()
+        pipeline = RecordingPipeline(
+            preset, monitor, output_filename, stop_event,
+            audio_queue=audio_queue,
+            clock=clock,
+            live_counters=live_counters,
+            **options,
+        )
+        pipeline.open()
+        messages.put(("ready", output_filename))
+        if not start_event.wait(WORKER_STARTUP_TIMEOUT * 2) or stop_event.is_set():
+            pipeline.cancel()
+            return
+
+        started_at, started_wall = start_times[0], start_times[1]
+        clock.start(started_at)
+        pipeline.set_creation_time(datetime.fromtimestamp(started_wall, timezone.utc).isoformat())
+        pipeline.run()
+        summary = pipeline.summary.to_dict()
+    except Exception as e:
+        logging.error(f"Erro fatal na gravação do monitor ({output_filename}): {e}")
+        # Uma tela que falha encerra as demais: as gravações só valem juntas.
+        stop_event.set()
+    finally:
+        messages.put(("done", output_filename, summary))
+
+
+class MonitorWorkers:
+    """
+    Grava vários monitores em paralelo, um processo (e um arquivo) por monitor.
+
+    Todos os processos recebem o mesmo instante de largada no relógio de
+    `time.perf_counter` (monotônico e comum a todo o sistema), que vira o PTS
+    zero de cada arquivo, e o mesmo `creation_time` nos metadados; assim os
+    vídeos ficam alinhados entre si. O áudio, se houver, vai para o primeiro.
+    """
+    def __init__(self, jobs, options, with_audio=False):
+        # jobs: lista de (preset, monitor, arquivo de saída), na ordem dos monitores.
+        self.jobs = jobs
+        self.options = options
+        self.stop_event = _context.Event()
+        self.audio_queue = _context.Queue() if with_audio else None
+        self.summaries: dict[str, RecordingSummary | None] = {}
+        # [codificados, descartados] de cada processo, atualizados a cada quadro.
+        self.live_counters = [_context.Array('q', 2, lock=False) for _ in jobs]
+
+    def progress(self) -> tuple[int, int]:
+        """Quadros codificados e descartados até agora, somados entre as telas."""
+        counters = [tuple(c) for c in self.live_counters]
+        return sum(c[0] for c in counters), sum(c[1] for c in counters)
+
+    def run(self, stop_event):
+        """Roda até `stop_event` (da interface) ser acionado ou algum processo falhar."""
+        start_event = _context.Event()
+        start_times = _context.Array('d', 2)
+        messages = _context.Queue()
+        log_queue = _context.Queue()
+        listener = logging.handlers.QueueListener(log_queue, *logging.getLogger().handlers, respect_handler_level=True)
+        listener.start()
+
+        processes = []
+        for index, (preset, monitor, output_filename) in enumerate(self.jobs):
+            process = _context.Process(
+                target=_monitor_worker,
+                args=(preset, monitor, output_filename, self.options, self.stop_event, start_event, start_times,
+                      self.audio_queue if index == 0 else None, messages, log_queue, self.live_counters[index]),
+                name=f"gravacao-tela{index + 1}",
+                daemon=True,
+            )
+            process.start()
+            processes.append(process)
+
+        try:
+            if self._wait_ready(messages, processes, stop_event):
+                start_times[0] = time.perf_counter() + START_MARGIN
+                start_times[1] = time.time() + START_MARGIN
+                logging.info(f"Gravação de {len(processes)} monitores em processos paralelos iniciada.")
+            else:
+                logging.error("Nem todos os processos de gravação ficaram prontos; gravação cancelada.")
+                self.stop_event.set()
+            start_event.set()
+
+            while not stop_event.wait(0.2):
+                if self.stop_event.is_set() or not any(p.is_alive() for p in processes):
+                    break
+        finally:
+            self.stop_event.set()
+            start_event.set()
+            self._collect(messages, processes)
+            for process in processes:
+                process.join(WORKER_JOIN_TIMEOUT)
+                if process.is_alive():
+                    logging.error(f"Processo {process.name} não terminou a tempo e foi encerrado.")
+                    process.terminate()
+            listener.stop()
+
+    def _wait_ready(self, messages, processes, stop_event) -> bool:
+        ready = 0
+        deadline = time.monotonic() + WORKER_STARTUP_TIMEOUT
+        while ready < len(processes) and time.monotonic() < deadline and not stop_event.is_set():
+            try:
+                message = messages.get(timeout=0.2)
+            except queue.Empty:
+                if not all(p.is_alive() for p in processes):
+                    return False
+                continue
+            if message[0] == "ready":
+                ready += 1
+            else:
+                self._record(message)
+                return False
+        return ready == len(processes)
+
+    def _collect(self, messages, processes):
+        deadline = time.monotonic() + WORKER_JOIN_TIMEOUT
+        while len(self.summaries) < len(processes) and time.monotonic() < deadline:
+            try:
+                message = messages.get(timeout=0.5)
+            except queue.Empty:
+                if not any(p.is_alive() for p in processes):
+                    break
+                continue
+            if message[0] == "done":
+                self._record(message)
+
+    def _record(self, message):
+        _, output_filename, summary = message
+        self.summaries[output_filename] = RecordingSummary.from_dict(summary) if summary else None
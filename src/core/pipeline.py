@@ -0,0 +1,879 @@
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from fractions import Fraction
+
+import av
+import cv2
+import numpy as np
+from av.video.frame import PictureType
+from av.video.reformatter import Interpolation, VideoReformatter
+
+from src.core.adaptive import AdaptiveQualityController, QualityLevel, encoder_options
+from src.core.audio import AudioRingBuffer, AUDIO_RING_SECONDS, CHUNK_FRAMES, DEFAULT_AUDIO_OVERFLOW_POLICY
+from src.core.backends import grabber, DEFAULT_CAPTURE_BACKEND
+from src.core.buffers import FrameBufferPool
+from src.core.canvas import MonitorCanvas
+from src.core.clock import MediaClock
+from src.core.cursor import CursorCompositor
+from src.core.damage import DamageDetector, DEFAULT_KEEPALIVE
+from src.core.metrics import RecordingSummary, StageTimings, write_metrics, METRICS_SUFFIX
+from src.core.presets import RecordingPreset
+from src.core.replay import ReplayBuffer
+from src.core.segments import SegmentedWriter, StreamTemplate, DEFAULT_OUTPUT_FORMAT, FRAGMENTED_ENCODER_OPTIONS
+from src.core.targets import WindowTarget
+from src.utils import resource_path
+
+# Profundidade padrão das filas entre as etapas (em quadros).
+DEFAULT_QUEUE_DEPTH = 4
+
+# Marcador que atravessa as filas sinalizando o fim do fluxo.
+END_OF_STREAM = None
+
+# Quanto o fim da gravação espera a captura de áudio fechar o anel, em segundos.
+AUDIO_STAGE_JOIN_TIMEOUT = 5.0
+
+# Caminhos de conversão BGRA -> YUV disponíveis para a etapa de conversão:
+# - "opencv": redimensiona e converte para RGB com cv2; o libav converte de novo para YUV.
+# - "swscale": entrega o BGRA do mss ao libswscale, que escala e converte para YUV numa só passada.
+CONVERSION_OPENCV = "opencv"
+CONVERSION_SWSCALE = "swscale"
+CONVERSION_PATHS = (CONVERSION_OPENCV, CONVERSION_SWSCALE)
+DEFAULT_CONVERSION_PATH = CONVERSION_SWSCALE
+
+# O PTS do vídeo vem do relógio de captura, numa base de tempo fina (90 kHz, como no MPEG).
+VIDEO_TIME_BASE = Fraction(1, 90000)
+
+# O que fazer com os intervalos perdidos quando a captura atrasa:
+# - "drop": o quadro seguinte simplesmente chega mais tarde (o anterior fica mais tempo na tela).
+# - "duplicate": o último quadro é codificado de novo em cada intervalo perdido (taxa constante).
+LATE_FRAMES_DROP = "drop"
+LATE_FRAMES_DUPLICATE = "duplicate"
+DEFAULT_LATE_FRAME_POLICY = LATE_FRAMES_DROP
+
+
+@dataclass
+class StageStats:
+    """Contadores de uma etapa do pipeline de gravação."""
+    name: str
+    processed: int = 0
+    dropped: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    busy_seconds: float = 0.0
+
+    @property
+    def mean_ms(self) -> float:
+        """Tempo médio gasto por item nesta etapa, em milissegundos."""
+        return self.busy_seconds / self.processed * 1000 if self.processed else 0.0
+
+
+@dataclass
+class CapturedFrame:
+    """Um quadro em trânsito entre as etapas, com seu PTS e a posição do cursor no momento da captura."""
+    pts: int
+    image: np.ndarray | av.VideoFrame
+    cursor_pos: tuple[int, int] | None = None
+    captured_at: float = 0.0
+    # PTS dos intervalos perdidos antes deste quadro, a preencher com o quadro anterior.
+    duplicate_pts: list[int] = field(default_factory=list)
+    # Área capturada neste quadro (muda quando a janela seguida se move).
+    region: dict | MonitorCanvas | None = None
+
+
+class FrameQueue:
+    """
+    Fila limitada entre duas etapas. Quando cheia, descarta o item novo
+    (drop_when_full=True) ou bloqueia o produtor até haver espaço.
+    O marcador de fim de fluxo nunca é descartado.
+    """
+    def __init__(self, maxsize, drop_when_full=True):
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+        self.drop_when_full = drop_when_full
+        self.max_depth = 0
+
+    def put(self, item) -> bool:
+        if self.drop_when_full and item is not END_OF_STREAM:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                return False
+        else:
+            self._queue.put(item)
+
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return True
+
+    def get(self):
+        return self._queue.get()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+
+class PipelineStage(threading.Thread):
+    """
+    Etapa que consome a fila de entrada em sua própria thread e entrega os
+    resultados para a fila de saída através de `emit`.
+
+    `handler(item, emit)` processa um item; `flush(emit)` é chamado uma vez
+    ao receber o fim do fluxo e `on_drop(item)` recebe o que não coube na
+    fila de saída. Se a etapa falhar, ela continua drenando a
+    entrada (sem processar) para que as etapas anteriores nunca travem.
+    """
+    def __init__(self, name, handler, input_queue, output_queue=None, flush=None, on_error=None, on_drop=None):
+        super().__init__(name=f"pipeline-{name}", daemon=True)
+        self.stats = StageStats(name)
+        self.handler = handler
+        self.flush = flush
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.on_error = on_error
+        self.on_drop = on_drop
+        self.failed = False
+
+    def emit(self, item):
+        if self.output_queue is None:
+            return
+        if not self.output_queue.put(item):
+            self.stats.dropped += 1
+            if self.on_drop:
+                self.on_drop(item)
+
+    def run(self):
+        while True:
+            item = self.input_queue.get()
+            self.stats.queue_depth = self.input_queue.depth
+            self.stats.max_queue_depth = self.input_queue.max_depth
+            if item is END_OF_STREAM:
+                break
+            if self.failed:
+                continue
+            try:
+                started = time.perf_counter()
+                self.handler(item, self.emit)
+                self.stats.busy_seconds += time.perf_counter() - started
+                self.stats.processed += 1
+            except Exception as e:
+                self._fail(e)
+
+        if self.flush and not self.failed:
+            try:
+                self.flush(self.emit)
+            except Exception as e:
+                self._fail(e)
+        if self.output_queue is not None:
+            self.output_queue.put(END_OF_STREAM)
+
+    def _fail(self, error):
+        self.failed = True
+        logging.error(f"Erro na etapa '{self.stats.name}' do pipeline de gravação: {error}")
+        if self.on_error:
+            self.on_error(error)
+
+
+class RecordingPipeline:
+    """
+    Pipeline de gravação em etapas: captura -> conversão -> codificação -> mux.
+
+    A captura roda na thread que chama `run()` e mantém o ritmo do preset;
+    as demais etapas rodam em threads próprias ligadas por filas limitadas.
+    cv2 e libav liberam o GIL, então um quadro lento no encoder não atrasa
+    a próxima captura: ele só ocupa a fila (ou é descartado, se ela encher).
+    `open()` prepara tudo antes do PTS zero, para que a primeira captura saia
+    nele; `run()` o chama se ninguém chamou.
+
+    `monitor` é um monitor (ou região) do mss, um MonitorCanvas (vários
+    monitores num só vídeo) ou um WindowTarget (uma janela seguida), capturado
+    pelo backend `capture_backend` (src.core.backends). Os
+    quadros são carimbados no `clock` (MediaClock) da gravação, o mesmo da
+    captura de áudio, e o início dele vira o PTS zero; gravações paralelas com
+    o mesmo instante de início saem alinhadas.
+
+    Os pacotes codificados vão para o arquivo (SegmentedWriter) e, se houver
+    um `replay`, também para o anel em memória; sem `output_filename` o
+    pipeline só alimenta o replay.
+
+    Cada passo do caminho quente é cronometrado num histograma (`timings`);
+    ao fim, os percentis por etapa vão para o resumo e para o arquivo de
+    métricas ao lado do vídeo.
+    """
+    def __init__(self, preset: RecordingPreset, monitor, output_filename, stop_event,
+                 audio_queue=None, queue_depth=DEFAULT_QUEUE_DEPTH, highlight_clicks=False,
+                 conversion=DEFAULT_CONVERSION_PATH, damage_detection=True, keepalive=DEFAULT_KEEPALIVE,
+                 late_frame_policy=DEFAULT_LATE_FRAME_POLICY, adaptive_quality=True,
+                 clock: MediaClock = None, creation_time=None, output_format=DEFAULT_OUTPUT_FORMAT,
+                 segment_seconds=0, segment_bytes=0, replay: ReplayBuffer = None, audio_tracks=None,
+                 audio_overflow=DEFAULT_AUDIO_OVERFLOW_POLICY, audio_buffer_seconds=AUDIO_RING_SECONDS,
+                 capture_backend=DEFAULT_CAPTURE_BACKEND, live_counters=None):
+        self.preset = preset
+        self.monitor = monitor
+        self.canvas = monitor if isinstance(monitor, MonitorCanvas) else None
+        self.window = monitor if isinstance(monitor, WindowTarget) else None
+        self.output_filename = output_filename
+        self.stop_event = stop_event
+        self.audio_queue = audio_queue
+        # Nomes das faixas de áudio; os blocos da fila trazem o índice da faixa.
+        self.audio_tracks = list(audio_tracks) if audio_tracks else [""]
+        self.audio_overflow = audio_overflow
+        self.audio_buffer_seconds = audio_buffer_seconds
+        self.queue_depth = queue_depth
+        self.highlight_clicks = highlight_clicks
+        if conversion not in CONVERSION_PATHS:
+            logging.error(f"Caminho de conversão '{conversion}' desconhecido. Usando '{DEFAULT_CONVERSION_PATH}'.")
+            conversion = DEFAULT_CONVERSION_PATH
+        self.conversion = conversion
+        self.damage_detection = damage_detection
+        self.keepalive = keepalive
+        self.late_frame_policy = late_frame_policy
+        self.adaptive_quality = adaptive_quality
+        self.output_format = output_format
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.replay = replay
+        self.capture_backend = capture_backend
+        # Array compartilhado [codificados, descartados] lido pela interface quando o
+        # pipeline roda em outro processo (o vídeo de cada tela).
+        self.live_counters = live_counters
+
+        self.grab_stats = StageStats("grab")
+        self.audio_stats = StageStats("audio")
+        self.timings = StageTimings()
+        self.damage: DamageDetector = None
+        # Um quadro descartado numa fila (na captura ou depois da conversão) levou uma
+        # mudança da tela que a referência do detector já contém: o próximo quadro
+        # capturado segue adiante mesmo sem mudança, para que ela chegue ao arquivo.
+        self._resend_next_frame = False
+        self.stages: list[PipelineStage] = []
+
+        self.cursor: CursorCompositor = None
+        self.buffer_pool: FrameBufferPool = None
+        self._scale_buffer = None
+        # O reformatter guarda o SwsContext e o reaproveita enquanto a geometria não mudar.
+        self._reformatter = VideoReformatter()
+        self.writer: SegmentedWriter = None
+        self.audio_ring: AudioRingBuffer = None
+        self._audio_stage: threading.Thread = None
+        self.clock = clock or MediaClock()
+        self.started_at = None
+        self.creation_time = creation_time
+
+        self.summary = RecordingSummary(target_fps=preset.video.fps)
+        self.quality: AdaptiveQualityController = None
+        # Degrau de qualidade em vigor: a captura lê o fps, a conversão a resolução
+        # e a codificação a velocidade. Só a etapa de codificação o troca.
+        self.level: QualityLevel = None
+        self._video_encoder = None
+        self._audio_encoders = []
+        self._video_template: StreamTemplate = None
+        self._audio_templates: list[StreamTemplate] = []
+        self._encoder_level: QualityLevel = None
+        self._last_video_dts = None
+        self._convert_queue: FrameQueue = None
+        self._encode_queue: FrameQueue = None
+        self._mux_queue: FrameQueue = None
+        self._backend = None
+        self._last_video_frame = None
+        self._last_encoded_pts = -1
+
+    def stats(self) -> list[StageStats]:
+        """Retorna os contadores atuais de todas as etapas, da captura ao mux."""
+        stats = [self.grab_stats] + [stage.stats for stage in self.stages]
+        return stats + [self.audio_stats] if self._audio_stage else stats
+
+    def progress(self) -> tuple[int, int]:
+        """
+        Quadros codificados e descartados até agora, para o indicador da gravação.
+        O ritmo mostrado é o que chega ao arquivo, não o da captura: os quadros
+        que as filas descartam aparecem só entre os descartados.
+        """
+        return self.summary.frames_encoded, self.summary.dropped_frames + sum(s.dropped for s in self.stats())
+
+    def _abort(self, _error):
+        self.stop_event.set()
+
+    def open(self):
+        """
+        Prepara a gravação sem capturar nada: encoders, arquivo, cursor, backend
+        de captura e as etapas, já esperando quadros. O PTS zero ainda não está
+        fixado; `run()` o fixa e começa a captura. Quem chama `open()` e desiste
+        antes de `run()` chama `cancel()`.
+        """
+        video_settings = self.preset.video
+        width, height = video_settings.resolution
+
+        if self.output_filename:
+            self.writer = SegmentedWriter(self.output_filename, self.output_format, self.segment_seconds,
+                                          self.segment_bytes, self.creation_time)
+        try:
+            # Um tamanho novo abre outro arquivo; quem pediu um arquivo só (sem limites de
+            # segmento) fica com um tamanho só, e a escada para na velocidade e no fps.
+            self.quality = AdaptiveQualityController(video_settings, self.clock.started_at, enabled=self.adaptive_quality,
+                                                     resolution_steps=self.writer is None or self.writer.rotating)
+            self.level = self.quality.level
+
+            # Os encoders ficam fora do arquivo: o writer cria os streams de cada segmento a partir dos templates.
+            self._video_encoder = self._create_video_encoder(width, height)
+            if self.audio_queue is not None:
+                for track, title in enumerate(self.audio_tracks):
+                    encoder = self._create_audio_encoder()
+                    self._audio_encoders.append(encoder)
+                    self._audio_templates.append(StreamTemplate.from_encoder(encoder, track, title))
+            # Aberto aqui, e não no primeiro quadro: a inicialização do encoder (threads,
+            # lookahead) não atrasa as primeiras capturas depois do PTS zero.
+            self._video_encoder.open()
+            if self.writer:
+                self.writer.open(self._video_template, self._audio_templates)
+            if self.replay:
+                self.replay.reset(self._audio_templates)
+
+            try:
+                channel_order = "bgra" if self.conversion == CONVERSION_SWSCALE else "rgb"
+                self.cursor = CursorCompositor(resource_path("assets/cursor.png"), channel_order=channel_order,
+                                               highlight_clicks=self.highlight_clicks)
+                self.cursor.start()
+            except FileNotFoundError:
+                self.cursor = None
+
+            # Buffers para cada quadro que pode estar na fila do encoder, mais o
+            # que está sendo convertido e o que está sendo codificado.
+            # No caminho swscale os quadros vivem em AVFrames do próprio libav e o pool fica vazio
+            # (os AVFrames, novos a cada quadro, entram em `libav_bytes_allocated`).
+            pool_size = self.queue_depth + 2 if self.conversion == CONVERSION_OPENCV else 0
+            self.buffer_pool = FrameBufferPool((height, width, 3), count=pool_size)
+            if self.canvas:
+                # Telas compostas em trânsito: a fila de conversão, a que está sendo
+                # convertida, a que está sendo montada e a última pulada sem mudança.
+                self.canvas.allocate_pool(self.queue_depth + 3)
+                source_size = (self.canvas.width, self.canvas.height)
+            elif self.window:
+                region = self.window.region()
+                source_size = (region['width'], region['height'])
+            else:
+                source_size = (self.monitor['width'], self.monitor['height'])
+            if self.conversion == CONVERSION_OPENCV and source_size != (width, height):
+                self._scale_buffer = np.empty((height, width, 4), dtype=np.uint8)
+
+            # O backend é da thread que chama `open()`; `run()` precisa rodar nela. Uma
+            # captura descartada termina de abri-lo (o segmento MIT-SHM, o OpenCV da tela
+            # sintética), o que não pode ficar para depois do PTS zero.
+            self._backend = grabber.backend(self.capture_backend)
+            if self.canvas:
+                self.canvas.release(self.canvas.grab(self._backend))
+            else:
+                self._backend.grab(self.window.region() if self.window else self.monitor)
+
+            # --- Stages ---
+            self._convert_queue = FrameQueue(self.queue_depth, drop_when_full=True)
+            encode_queue = FrameQueue(self.queue_depth, drop_when_full=True)
+            self._encode_queue = encode_queue
+            # Pacotes já codificados nunca são descartados: o mux aplica backpressure.
+            self._mux_queue = FrameQueue(self.queue_depth * 4, drop_when_full=False)
+
+            stages = [
+                PipelineStage("convert", self._convert_swscale if self.conversion == CONVERSION_SWSCALE else self._convert, self._convert_queue, encode_queue, on_error=self._abort,
+                              on_drop=self._on_converted_frame_dropped),
+                PipelineStage("encode", self._encode, encode_queue, self._mux_queue, flush=self._flush_encoders, on_error=self._abort),
+                PipelineStage("mux", self._mux, self._mux_queue, on_error=self._abort),
+            ]
+            for stage in stages:
+                stage.start()
+            self.stages = stages
+        except BaseException:
+            self._shutdown(discard=True)
+            raise
+
+    def cancel(self):
+        """Desfaz um `open()` sem `run()`: encerra as etapas e apaga o arquivo, que não recebeu nenhum quadro."""
+        self._shutdown(discard=True)
+
+    def _shutdown(self, discard=False):
+        try:
+            if self.stages:
+                self._convert_queue.put(END_OF_STREAM)
+                for stage in self.stages:
+                    stage.join()
+            if self.cursor:
+                self.cursor.stop()
+            if self._backend is not None:
+                grabber.release()
+        finally:
+            if self.writer and discard:
+                self.writer.discard()
+            elif self.writer:
+                # Fecha só o segmento atual: os anteriores já foram finalizados na troca.
+                self.writer.close()
+
+    def set_creation_time(self, creation_time):
+        """Data e hora (ISO 8601) do PTS zero nos metadados, se só ficou conhecida depois de `open()`."""
+        self.creation_time = creation_time
+        if self.writer:
+            self.writer.set_creation_time(creation_time)
+
+    def run(self):
+        """Fixa o PTS zero (se o `clock` ainda não tem um) e grava até o `stop_event`; abre antes, se preciso."""
+        if not self.stages:
+            self.open()
+        try:
+            self.started_at = self.clock.start()
+            self.quality.start(self.started_at)
+            if self._audio_encoders:
+                self._start_audio_stage(self._mux_queue)
+            try:
+                self._grab_loop(self._convert_queue)
+            finally:
+                self.summary.duration = self.clock.elapsed()
+        finally:
+            self._shutdown()
+
+        summary = ", ".join(
+            f"{s.name}: {s.processed} ok / {s.dropped} descartados / fila máx. {s.max_queue_depth} / {s.mean_ms:.2f} ms"
+            for s in self.stats()
+        )
+        logging.info(f"Pipeline de gravação finalizado [{self.preset.name}, conversão {self.conversion}] ({summary}).")
+        converted = max(1, self.stages[0].stats.processed) if self.stages else 1
+        logging.info(
+            f"Pool de quadros: {self.buffer_pool.capacity} buffers; por quadro convertido, "
+            f"{self.buffer_pool.bytes_allocated / converted:.0f} bytes em arrays fora do pool e "
+            f"{self.buffer_pool.libav_bytes_allocated / converted:.0f} bytes em AVFrames novos do libav."
+        )
+        if self.window:
+            logging.info(f"Janela seguida '{self.window.title}': {self.window.moves} mudanças de posição/tamanho.")
+        if self.damage:
+            logging.info(
+                f"Detecção de mudanças: {self.damage.skip_ratio:.0%} dos quadros sem mudança pulados, "
+                f"{self.damage.mean_dirty_fraction:.1%} dos tiles alterados em média."
+            )
+
+        self.summary.frames_captured = self.grab_stats.processed
+        self.summary.dropped_frames += sum(s.dropped for s in self.stats())
+        self.summary.skipped_unchanged = self.damage.skipped if self.damage else 0
+        self.summary.quality_steps = [step.to_dict() for step in self.quality.steps]
+        self.summary.final_quality = self.level.describe()
+        self.summary.output_files = list(self.writer.paths) if self.writer else []
+        self.summary.stage_latency = self.timings.to_dict()
+        self.summary.max_queue_depths = {s.name: s.max_queue_depth for s in self.stats()}
+        if self.audio_ring:
+            self.summary.max_av_skew_ms = self.audio_ring.max_skew * 1000
+            self.summary.audio_overruns = self.audio_ring.overruns
+            self.summary.audio_underruns = self.audio_ring.underruns
+            if self.audio_ring.overrun_samples:
+                logging.warning(
+                    f"Anel de áudio cheio: {self.audio_ring.overrun_samples / self.audio_ring.samplerate:.2f}s "
+                    f"de áudio descartados em {self.audio_ring.overruns} estouros."
+                )
+        if self.writer and self.writer.segmented:
+            logging.info(f"Gravação dividida em {len(self.writer.paths)} segmentos (manifesto: {self.writer.manifest_path}).")
+        logging.info(f"Resumo da gravação: {self.summary.describe()}.")
+        if self.output_filename:
+            self._write_metrics()
+
+    def _write_metrics(self):
+        path = os.path.splitext(self.output_filename)[0] + METRICS_SUFFIX
+        try:
+            write_metrics(path, self.summary)
+        except OSError as e:
+            logging.error(f"Não foi possível gravar as métricas da gravação em '{path}'. Erro: {e}")
+            return
+        latency = ", ".join(f"{step} p95 {values['p95_ms']:.1f} ms" for step, values in self.summary.stage_latency.items())
+        logging.info(f"Métricas da gravação em '{path}' ({latency}).")
+
+    # --- Grab stage (calling thread) ---
+
+    def _grab_loop(self, output_queue):
+        mouse_controller = None
+        if self.cursor:
+            try:
+                from pynput.mouse import Controller as MouseController
+                mouse_controller = MouseController()
+            except Exception as e:
+                logging.warning(f"Cursor não será desenhado na gravação: {e}")
+
+        # Relógio de captura monotônico: cada quadro recebe o PTS do instante em que
+        # foi capturado, e os intervalos perdidos por atraso são contados um a um.
+        # O intervalo segue o fps do degrau de qualidade atual.
+        next_deadline = self.started_at
+        last_pts = -1
+
+        # Quadros sem mudança não seguem adiante: o PTS do próximo quadro enviado
+        # pula os intervalos omitidos e o vídeo sai com taxa de quadros variável.
+        last_sent_at = None
+        last_cursor_pos = None
+        skipped_frame = None
+
+        backend = self._backend
+        try:
+            while not self.stop_event.is_set():
+                # --- Frame Rate Control ---
+                frame_time = 1 / self.level.fps
+                sleep_duration = next_deadline - self.clock.now()
+                if sleep_duration > 0:
+                    time.sleep(sleep_duration)
+
+                # A view mantém o buffer da captura vivo até a conversão, sem cópia.
+                grab_started = time.perf_counter()
+                if self.canvas:
+                    region = self.canvas
+                    image = self.canvas.grab(backend)
+                else:
+                    region = self.window.region() if self.window else self.monitor
+                    image = backend.grab(region)
+                captured_at = self.clock.now()
+                self.timings.record("grab", captured_at - grab_started)
+                cursor_pos = mouse_controller.position if mouse_controller else None
+
+                missed = max(0, int((captured_at - next_deadline) / frame_time))
+                missed_deadlines = [next_deadline + k * frame_time for k in range(missed)]
+                next_deadline += (missed + 1) * frame_time
+
+                pts = max(self._to_pts(captured_at), last_pts + 1)
+                last_pts = pts
+
+                frame = CapturedFrame(pts, image, cursor_pos, captured_at, region=region)
+                self.grab_stats.processed += 1
+
+                if missed_deadlines:
+                    if self.late_frame_policy == LATE_FRAMES_DUPLICATE:
+                        frame.duplicate_pts = [self._to_pts(deadline) for deadline in missed_deadlines]
+                    else:
+                        self.summary.dropped_frames += len(missed_deadlines)
+
+                if self._is_unchanged(frame, last_cursor_pos, last_sent_at):
+                    self.damage.record_skip()
+                    if skipped_frame is not None:
+                        self._release_source(skipped_frame)
+                    skipped_frame = frame
+                else:
+                    if self._send(frame, output_queue):
+                        last_sent_at = frame.captured_at
+                    if skipped_frame is not None:
+                        self._release_source(skipped_frame)
+                    skipped_frame = None
+                last_cursor_pos = cursor_pos
+                if self.live_counters is not None:
+                    self.live_counters[:] = self.progress()
+        finally:
+            # A thread da captura termina com a gravação: o backend dela não será reaproveitado.
+            self._backend = None
+            grabber.release()
+
+        # Fecha o vídeo com o último quadro, para que a pausa final tenha a duração certa.
+        if skipped_frame is not None:
+            self._send(skipped_frame, output_queue)
+
+    def _to_pts(self, timestamp: float) -> int:
+        return self.clock.to_pts(timestamp, VIDEO_TIME_BASE)
+
+    def _release_source(self, frame: CapturedFrame):
+        """Devolve a tela composta ao pool do canvas; capturas diretas do backend não têm pool."""
+        if self.canvas:
+            self.canvas.release(frame.image)
+
+    def _send(self, frame: CapturedFrame, output_queue) -> bool:
+        """Enfileira o quadro para a conversão; False se a fila estava cheia e ele foi descartado."""
+        sent = output_queue.put(frame)
+        if not sent:
+            self.grab_stats.dropped += 1
+            self._release_source(frame)
+            self._resend_next_frame = True
+        self.grab_stats.queue_depth = output_queue.depth
+        self.grab_stats.max_queue_depth = output_queue.max_depth
+        return sent
+
+    def _on_converted_frame_dropped(self, frame):
+        self.buffer_pool.release(frame.image)
+        self._resend_next_frame = True
+
+    def _is_unchanged(self, frame: CapturedFrame, last_cursor_pos, last_sent_at) -> bool:
+        if not self.damage_detection:
+            return False
+        if self.damage is None or self.damage.frame_shape != frame.image.shape[:2]:
+            self.damage = DamageDetector(frame.image.shape)
+
+        # O detector roda em todo quadro para manter a referência atualizada.
+        dirty = self.damage.dirty_fraction(frame.image) > 0
+        if self._resend_next_frame:
+            self._resend_next_frame = False
+            return False
+        if dirty or last_sent_at is None:
+            return False
+        if frame.cursor_pos != last_cursor_pos:
+            return False
+        if self.cursor and self.cursor.has_active_highlight(frame.captured_at):
+            return False
+        return frame.captured_at - last_sent_at < self.keepalive
+
+    # --- Convert stage ---
+
+    def _convert(self, frame: CapturedFrame, emit):
+        width, height = self.level.resolution
+        if self.buffer_pool.shape != (height, width, 3):
+            # O degrau de qualidade mudou a resolução: o pool é refeito uma vez no novo tamanho.
+            self.buffer_pool = FrameBufferPool((height, width, 3), count=self.queue_depth + 2)
+            self._scale_buffer = None
+        pool = self.buffer_pool
+        source = frame.image
+
+        # Redimensiona ainda em BGRA (menos pixels para converter) num buffer de escala reutilizado.
+        if (source.shape[1], source.shape[0]) != (width, height):
+            if self._scale_buffer is None:
+                self._scale_buffer = np.empty((height, width, 4), dtype=np.uint8)
+                pool.note_allocation(self._scale_buffer.nbytes)
+            started = time.perf_counter()
+            source = pool.ensure_target(
+                cv2.resize(source, (width, height), dst=self._scale_buffer, interpolation=cv2.INTER_AREA),
+                self._scale_buffer
+            )
+            self.timings.record("resize", time.perf_counter() - started)
+
+        started = time.perf_counter()
+        frame_rgb = pool.acquire()
+        frame_rgb = pool.ensure_target(cv2.cvtColor(source, cv2.COLOR_BGRA2RGB, dst=frame_rgb), frame_rgb)
+        self._release_source(frame)
+        self.timings.record("convert", time.perf_counter() - started)
+
+        if self.cursor and frame.cursor_pos:
+            started = time.perf_counter()
+            self.cursor.draw(frame_rgb, frame.cursor_pos, frame.region, frame.captured_at)
+            self.timings.record("cursor", time.perf_counter() - started)
+
+        frame.image = frame_rgb
+        emit(frame)
+
+    def _convert_swscale(self, frame: CapturedFrame, emit):
+        width, height = self.level.resolution
+
+        # O cursor é desenhado direto no buffer BGRA do mss, na resolução da tela.
+        if self.cursor and frame.cursor_pos:
+            started = time.perf_counter()
+            self.cursor.draw(frame.image, frame.cursor_pos, frame.region, frame.captured_at)
+            self.timings.record("cursor", time.perf_counter() - started)
+
+        started = time.perf_counter()
+        bgra_frame = av.VideoFrame.from_ndarray(frame.image, format='bgra')
+        # from_ndarray copiou os pixels; a tela composta já pode voltar ao pool.
+        self._release_source(frame)
+        frame.image = self._reformatter.reformat(
+            bgra_frame, width, height, 'yuv420p', interpolation=Interpolation.AREA
+        )
+        # O PyAV não converte num AVFrame existente: os dois quadros são novos a cada captura.
+        self.buffer_pool.note_libav_allocation(bgra_frame)
+        self.buffer_pool.note_libav_allocation(frame.image)
+        # O swscale escala e converte numa passada só: com escala, o tempo todo conta como "resize".
+        scaled = (bgra_frame.width, bgra_frame.height) != (width, height)
+        self.timings.record("resize" if scaled else "convert", time.perf_counter() - started)
+        emit(frame)
+
+    # --- Encode stage ---
+
+    def _encode(self, frame: CapturedFrame, emit):
+        if isinstance(frame.image, av.VideoFrame):
+            video_frame = frame.image
+        else:
+            video_frame = av.VideoFrame.from_ndarray(frame.image, format='rgb24')
+            # from_ndarray já copiou os pixels para um AVFrame novo; o buffer volta ao pool.
+            self.buffer_pool.note_libav_allocation(video_frame)
+            self.buffer_pool.release(frame.image)
+
+        # Preenche os intervalos perdidos repetindo o último quadro codificado.
+        if self._last_video_frame is not None:
+            for pts in frame.duplicate_pts:
+                if self._last_encoded_pts < pts < frame.pts:
+                    self._encode_video_frame(self._last_video_frame, pts, emit)
+                    self.summary.duplicated_frames += 1
+
+        encoder = self._video_encoder
+        started = time.perf_counter()
+        self._encode_video_frame(video_frame, frame.pts, emit)
+        self._last_video_frame = video_frame
+
+        # A troca de encoder (que esvazia o anterior) não entra na medida de latência.
+        if encoder is self._video_encoder:
+            finished = time.perf_counter()
+            new_level = self.quality.observe(finished - started, self._encode_queue.depth, self.queue_depth, finished)
+            if new_level:
+                self.level = new_level
+
+    def _encode_video_frame(self, video_frame, pts, emit):
+        if (video_frame.width, video_frame.height) != (self._video_encoder.width, self._video_encoder.height) or \
+                self.level.speed != self._encoder_level.speed:
+            self._reopen_video_encoder(video_frame.width, video_frame.height, emit)
+
+        video_frame.pts = pts
+        video_frame.time_base = VIDEO_TIME_BASE
+        # O próximo segmento só pode começar num quadro-chave.
+        frame_time = float(pts * VIDEO_TIME_BASE)
+        requests = [sink.take_keyframe_request(frame_time) for sink in (self.writer, self.replay) if sink]
+        keyframe = any(requests)
+        video_frame.pict_type = PictureType.I if keyframe else PictureType.NONE
+        started = time.perf_counter()
+        packets = self._video_encoder.encode(video_frame)
+        self.timings.record("encode", time.perf_counter() - started)
+        self._emit_video_packets(packets, emit)
+        self._last_encoded_pts = pts
+        self.summary.frames_encoded += 1
+
+    def _reopen_video_encoder(self, width, height, emit):
+        """
+        Troca o encoder no meio da gravação: esvazia o atual e abre um novo com a
+        velocidade e o tamanho do degrau. Na mesma resolução, o novo encoder repete
+        SPS/PPS (ou o cabeçalho VP9) em banda e os pacotes continuam no mesmo
+        stream; numa resolução nova (só numa gravação em segmentos, ou no replay),
+        o primeiro quadro-chave dele abre outro arquivo no writer (e o replay salvo
+        começa nele), porque um stream só declara um tamanho.
+        """
+        self._emit_video_packets(self._video_encoder.encode(None), emit)
+        self._video_encoder = self._create_video_encoder(width, height)
+        # Um quadro de outro tamanho não pode repetir um intervalo perdido no encoder novo.
+        self._last_video_frame = None
+
+    def _create_video_encoder(self, width, height):
+        video_settings = self.preset.video
+        encoder = av.CodecContext.create(video_settings.codec, 'w')
+        encoder.width = width
+        encoder.height = height
+        encoder.pix_fmt = 'yuv420p'
+        encoder.time_base = VIDEO_TIME_BASE
+        encoder.framerate = Fraction(self.level.fps, 1)
+        options = encoder_options(video_settings, self.level.speed)
+        if self.writer and self.writer.fragmented:
+            options.update(FRAGMENTED_ENCODER_OPTIONS)
+        encoder.options = options
+        self._encoder_level = self.level
+        self._video_template = StreamTemplate.from_encoder(encoder)
+        return encoder
+
+    def _create_audio_encoder(self):
+        audio_settings = self.preset.audio
+        encoder = av.CodecContext.create(audio_settings.codec, 'w')
+        encoder.sample_rate = audio_settings.samplerate
+        encoder.layout = 'stereo' if audio_settings.channels == 2 else 'mono'
+        encoder.format = encoder.codec.audio_formats[0].name
+        encoder.bit_rate = audio_settings.bitrate
+        encoder.time_base = Fraction(1, audio_settings.samplerate)
+        # Aberto já aqui para que o frame_size (1024 no AAC, 960 no Opus) seja conhecido.
+        encoder.open()
+        return encoder
+
+    def _emit_video_packets(self, packets, emit):
+        template = self._video_template
+        for packet in packets:
+            # Com B-frames, o primeiro DTS de um encoder novo pode recuar para antes do
+            # último DTS do anterior; o mux exige DTS crescente, então ele é ajustado.
+            if packet.dts is not None:
+                if self._last_video_dts is not None and packet.dts <= self._last_video_dts:
+                    packet.dts = self._last_video_dts + 1
+                self._last_video_dts = packet.dts
+            emit((template, packet))
+
+    def _flush_encoders(self, emit):
+        self._emit_video_packets(self._video_encoder.encode(None), emit)
+        if self._audio_stage:
+            # O mux só recebe o fim do fluxo depois dos últimos pacotes de áudio.
+            self._audio_stage.join(AUDIO_STAGE_JOIN_TIMEOUT)
+            if self._audio_stage.is_alive():
+                logging.warning("A captura de áudio não terminou a tempo; encerrando o áudio da gravação.")
+                self.audio_ring.close()
+                self._audio_stage.join()
+
+    # --- Audio stage ---
+
+    def _start_audio_stage(self, mux_queue):
+        if isinstance(self.audio_queue, AudioRingBuffer):
+            self.audio_ring = self.audio_queue
+        else:
+            # Fila entre processos (um processo por tela): uma thread a esvazia no anel deste processo.
+            self.audio_ring = AudioRingBuffer(len(self.audio_tracks), self.preset.audio, self.audio_buffer_seconds,
+                                              self.audio_overflow)
+            threading.Thread(target=self._pump_audio_queue, name="pipeline-audio-pump", daemon=True).start()
+        self._audio_stage = threading.Thread(target=self._audio_loop, args=(mux_queue,), name="pipeline-audio",
+                                             daemon=True)
+        self._audio_stage.start()
+
+    def _pump_audio_queue(self):
+        while not self.audio_ring.closed:
+            try:
+                item = self.audio_queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            self.audio_ring.put(item)
+
+    def _audio_loop(self, mux_queue):
+        """
+        Etapa de áudio, em thread própria e fora do caminho do vídeo: codifica o
+        anel em quadros com exatamente o frame_size de cada encoder, no formato
+        de amostra nativo dele, e entrega os pacotes direto à fila do mux.
+        """
+        ring = self.audio_ring
+        frame_sizes = [encoder.frame_size or CHUNK_FRAMES for encoder in self._audio_encoders]
+        samples = [np.empty((size, ring.channels), dtype=np.float32) for size in frame_sizes]
+        # AAC e Opus codificam float planar/intercalado; assim o libav não precisa converter.
+        planar = [encoder.format.name == 'fltp' for encoder in self._audio_encoders]
+        planes = [np.empty((ring.channels, size), dtype=np.float32) if is_planar else None
+                  for size, is_planar in zip(frame_sizes, planar)]
+        try:
+            while True:
+                closed = ring.closed
+                encoded = False
+                for track, encoder in enumerate(self._audio_encoders):
+                    while True:
+                        started = time.perf_counter()
+                        position = ring.read(track, samples[track])
+                        if position is None:
+                            break
+                        self._encode_audio_frame(track, position, samples[track], planes[track], mux_queue)
+                        elapsed = time.perf_counter() - started
+                        self.timings.record("audio", elapsed)
+                        self.audio_stats.busy_seconds += elapsed
+                        self.audio_stats.processed += 1
+                        encoded = True
+                if closed:
+                    # O que sobra no anel fechado é menos que um quadro do encoder.
+                    break
+                if not encoded:
+                    ring.wait(min(frame_sizes))
+            for encoder, template in zip(self._audio_encoders, self._audio_templates):
+                for packet in encoder.encode(None):
+                    mux_queue.put((template, packet))
+        except Exception as e:
+            logging.error(f"Erro na etapa 'audio' do pipeline de gravação: {e}")
+            ring.close()
+            self._abort(e)
+
+    def _encode_audio_frame(self, track, position, samples, planes, mux_queue):
+        encoder = self._audio_encoders[track]
+        samplerate = encoder.sample_rate
+        # A origem da faixa é o instante do relógio de captura da sua primeira amostra.
+        pts = self.clock.to_pts(self.audio_ring.origin(track), encoder.time_base) + position
+        if pts < 0:
+            return  # capturado antes do PTS zero do vídeo
+
+        if planes is not None:
+            np.copyto(planes, samples.T)
+            audio_frame = av.AudioFrame.from_ndarray(planes, format='fltp', layout=encoder.layout.name)
+        else:
+            # O soundcard entrega float32 intercalado (quadros x canais), o formato 'flt' do libav;
+            # formatos intercalados vão para o PyAV como um único plano: (1, quadros * canais).
+            audio_frame = av.AudioFrame.from_ndarray(samples.reshape(1, -1), format='flt', layout=encoder.layout.name)
+        audio_frame.sample_rate = samplerate
+        audio_frame.pts = pts
+        for packet in encoder.encode(audio_frame):
+            mux_queue.put((self._audio_templates[track], packet))
+
+    # --- Mux stage ---
+
+    def _mux(self, item, _emit):
+        started = time.perf_counter()
+        template, packet = item
+        # O anel copia o pacote antes do mux, que reescreve os timestamps no lugar.
+        if self.replay:
+            self.replay.append(template, packet)
+        if self.writer:
+            self.writer.mux(template, packet)
+        self.timings.record("mux", time.perf_counter() - started)
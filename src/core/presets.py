@@ -36,6 +36,12 @@ def _get_limited_resolution(max_width, max_height):
         logging.error(f"Não foi possível obter a resolução nativa, usando 1920x1080 como fallback. Erro: {e}")
         native_width, native_height = 1920, 1080
 
+    return fit_resolution((native_width, native_height), (max_width, max_height))
+
+def fit_resolution(size, max_size):
+    """Reduz `size` (largura, altura) para caber em `max_size`, mantendo o aspect ratio."""
+    native_width, native_height = size
+    max_width, max_height = max_size
     if native_width <= max_width and native_height <= max_height:
         return (native_width, native_height)
 
@@ -53,7 +59,9 @@ def _get_limited_resolution(max_width, max_height):
     return (new_width, new_height)
 
 # --- Definição dos Presets BASE ---
-# Usamos placeholders (0,0) e 0 para resolução/fps nativos
+# Usamos placeholders (0,0) e 0 para resolução/fps nativos. Nos demais, a resolução é o
+# máximo: o monitor só é consultado ao resolver o preset (get_resolved_preset), nunca
+# ao importar o módulo.
 
 PRESET_HIGH = RecordingPreset(
     name="Alta Qualidade (Nativa)",
@@ -74,7 +82,7 @@ PRESET_BALANCED = RecordingPreset(
     container=".mp4",
     video=VideoSettings(
         codec='libx264',
-        resolution=_get_limited_resolution(1920, 1080),
+        resolution=(1920, 1080), # Máximo; limitado ao monitor ao resolver
         fps=30,
         crf=23,
         preset='medium'
@@ -87,7 +95,7 @@ PRESET_COMPACT = RecordingPreset(
     container=".webm",
     video=VideoSettings(
         codec='libvpx-vp9',
-        resolution=_get_limited_resolution(1280, 720),
+        resolution=(1280, 720), # Máximo; limitado ao monitor ao resolver
         fps=24,
         crf=32,
         preset='medium'
@@ -106,27 +114,55 @@ RECORDING_PRESETS = {
 PRESET_OPTIONS_ORDER = ["high", "balanced", "compact"]
 PRESET_DISPLAY_NAMES = [p.name for p in RECORDING_PRESETS.values()]
 
+# fps tentados para presets nativos quando a máquina não mantém a taxa do monitor.
+NATIVE_FPS_FALLBACKS = [60, 30]
+
+def _resolve_native(base_preset: RecordingPreset) -> RecordingPreset:
+    """Cria uma cópia do preset com a resolução e o fps do monitor, sem modificar o original."""
+    try:
+        native_resolution = get_primary_monitor_resolution()
+        native_fps = get_primary_monitor_refresh_rate()
+    except Exception as e:
+        logging.error(f"Falha ao resolver preset nativo, usando 1920x1080@60fps. Erro: {e}")
+        native_resolution = (1920, 1080)
+        native_fps = 60
+    return replace(base_preset, video=replace(base_preset.video, resolution=native_resolution, fps=native_fps))
+
+def _resolve(base_preset: RecordingPreset) -> RecordingPreset:
+    """O preset com a resolução do monitor: a nativa, ou a do preset limitada ao monitor."""
+    if base_preset.is_native:
+        return _resolve_native(base_preset)
+    resolution = _get_limited_resolution(*base_preset.video.resolution)
+    return replace(base_preset, video=replace(base_preset.video, resolution=resolution))
+
+def _fps_candidates(preset: RecordingPreset) -> list[int]:
+    fps = preset.video.fps
+    if not preset.is_native:
+        return [fps]
+    return [fps] + [candidate for candidate in NATIVE_FPS_FALLBACKS if candidate < fps]
+
+def calibration_targets() -> list[tuple[str, tuple[int, int], int]]:
+    """Pares (codec, resolução, crf) que a calibração precisa medir para os presets desta máquina."""
+    targets = []
+    for key in PRESET_OPTIONS_ORDER:
+        base_preset = RECORDING_PRESETS[key]
+        video = _resolve(base_preset).video
+        target = (video.codec, video.resolution, video.crf)
+        if target not in targets:
+            targets.append(target)
+    return targets
+
 def get_resolved_preset(key: str) -> RecordingPreset:
     """
-    Retorna uma cópia do preset com os valores nativos resolvidos no momento da chamada.
+    Retorna uma cópia do preset com a resolução (e o fps, nos nativos) do monitor resolvida no momento da chamada
+    e a velocidade do encoder (e o fps, nos nativos) ajustada pela calibração da máquina.
     """
+    from src.core.calibration import tune_preset  # importado aqui: calibration depende deste módulo
+
     base_preset = RECORDING_PRESETS.get(key)
     if not base_preset:
         logging.error(f"Preset '{key}' não encontrado. Usando 'balanced' como fallback.")
         base_preset = RECORDING_PRESETS["balanced"]
 
-    if base_preset.is_native:
-        # Cria uma nova cópia do preset para não modificar o original
-        resolved_preset = replace(base_preset)
-        try:
-            native_resolution = get_primary_monitor_resolution()
-            native_fps = get_primary_monitor_refresh_rate()
-            resolved_preset.video.resolution = native_resolution
-            resolved_preset.video.fps = native_fps
-        except Exception as e:
-            logging.error(f"Falha ao resolver preset nativo, usando 1920x1080@60fps. Erro: {e}")
-            resolved_preset.video.resolution = (1920, 1080)
-            resolved_preset.video.fps = 60
-        return resolved_preset
-
-    return base_preset
+    resolved_preset = _resolve(base_preset)
+    return tune_preset(resolved_preset, _fps_candidates(resolved_preset))
@@ -1,44 +1,67 @@
 import os
 import time
+import logging
 import threading
-import queue
 from datetime import datetime
-import cv2
-import mss
-import numpy as np
-from PIL import Image
-from pynput.mouse import Controller as MouseController
 import tkinter as tk
-import soundcard as sc
-import av
 
+from src.core.monitors import topology
+from src.core.calibration import calibration_runner
 from src.core.presets import get_resolved_preset, RecordingPreset
-from src.utils import resource_path
+from src.core.targets import (
+    TARGET_MONITOR, TARGET_WINDOW, TARGET_REGION, DEFAULT_CAPTURE_TARGET,
+    WindowTarget, clip_region, find_window_at
+)
 from src.ui.preparation_indicator import PreparationIndicator
 from src.ui.dialogs import show_success_dialog
 from src.ui.preparation_mode import PreparationOverlayManager
+from src.ui.region_selector import RegionSelector
+from src.ui.animation import animation_scheduler, REASON_RECORDING
+from src.ui.static_noise import noise_animator
+
+# Enquanto a calibração mede o encoder, o replay espera (em ms) para não disputar a CPU.
+REPLAY_RETRY_MS = 2000
+
+# O fim de uma gravação (esvaziar filas e encoders) é esperado sem bloquear o Tk: a thread
+# é consultada a cada THREAD_POLL_MS; depois de RECORDING_STOP_TIMEOUT segundos, segue sem ela.
+THREAD_POLL_MS = 50
+RECORDING_STOP_TIMEOUT = 20
+AUDIO_STOP_TIMEOUT = 5
+REPLAY_STOP_TIMEOUT = 10
+
+# A sessão, o replay e os segmentos trazem o PyAV, o OpenCV e o soundcard: são importados
+# nas threads de gravação (ou na primeira ação que os usa), não na abertura do aplicativo.
 
 class ScreenRecordingModule:
     def __init__(self, root, app_config):
         self.root = root
         self.app_config = app_config
         self.state = "idle"
-        self.sct = mss.mss()
         self.indicator = PreparationIndicator(self.root)
         self.overlay_manager = None
+        self.region_selector = None
 
         # Threading and synchronization
         self.recording_thread_obj = None
-        self.audio_thread = None
-        self.audio_queue = queue.Queue()
         self.stop_event = threading.Event()
+        self.session = None  # RecordingSession da gravação em curso
+        self.last_summary = None
+        self.last_summaries = {}
 
         # Placeholders for recording parameters
         self.preset: RecordingPreset = None
         self.record_mic = False
         self.record_system_audio = False
         self.target_monitor = None
-        self.output_filename = ""
+        self.record_all_screens = False
+        self.target_mode = DEFAULT_CAPTURE_TARGET
+        self.target_region = None
+        self.target_monitors = []
+
+        # Replay instantâneo: um pipeline sem arquivo que só alimenta o anel em memória.
+        self.replay = None  # ReplayBuffer, criado pela thread do replay
+        self.replay_thread = None
+        self.replay_stop_event = threading.Event()
 
     @property
     def is_recording(self):
@@ -48,33 +71,114 @@ class ScreenRecordingModule:
     def is_preparing(self):
         return self.state == "preparing"
 
+    @property
+    def is_busy(self):
+        """Começando, gravando ou encerrando uma gravação: nenhum outro modo pode começar."""
+        return self.state in ("starting", "recording", "stopping")
+
     def enter_preparation_mode(self, record_all_screens=False):
-        if self.is_recording or self.is_preparing:
+        if self.state != "idle":
             return
         self.record_all_screens = record_all_screens
+        self.target_mode = TARGET_MONITOR if record_all_screens else self.app_config.get("CaptureTarget", DEFAULT_CAPTURE_TARGET)
+        self.target_region = None
         self.state = "preparing"
+
+        if self.target_mode == TARGET_REGION:
+            # A região desenhada já é a mira: ao soltar o mouse, a gravação começa.
+            self.root.withdraw()
+            self.region_selector = RegionSelector(
+                self.root, topology.desktop(), self._on_region_selected, on_cancel=self.exit_preparation_mode,
+                text="Arraste para marcar a região a gravar. ESC para cancelar."
+            )
+            return
+
+        if record_all_screens:
+            indicator_text = "Todas as telas serão gravadas. Pressione F10 para Iniciar/Parar"
+            inactive_text = "Esta tela também será gravada."
+        elif self.target_mode == TARGET_WINDOW:
+            indicator_text = "Aponte o cursor para a janela e pressione F10 para Iniciar/Parar"
+            inactive_text = "Esta tela não será gravada."
+        else:
+            indicator_text = "Mire na tela e pressione F10 para Iniciar/Parar"
+            inactive_text = "Esta tela não será gravada."
         self.overlay_manager = PreparationOverlayManager(
             self.root,
             self.indicator,
-            indicator_text="Mire na tela e pressione F10 para Iniciar/Parar",
-            inactive_text="Esta tela não será gravada."
+            indicator_text=indicator_text,
+            inactive_text=inactive_text
         )
         self.overlay_manager.start()
 
+    def exit_preparation_mode(self):
+        if not self.is_preparing:
+            return
+        self.state = "idle"
+        if self.region_selector:
+            if self.region_selector.winfo_exists():
+                self.region_selector.destroy()
+            self.region_selector = None
+        if self.overlay_manager:
+            self.overlay_manager.destroy()
+            self.overlay_manager = None
+        self.root.deiconify()
+
+    def _on_region_selected(self, region):
+        self.region_selector = None
+        self.target_region = region
+        # Espera a camada de seleção sumir da tela antes da primeira captura.
+        self.root.after(100, self.start_recording_mode)
+
+    def _resolve_target(self):
+        """O alvo da gravação de uma tela só: a região desenhada, a janela sob o cursor ou o monitor."""
+        desktop = topology.desktop()
+        if self.target_mode == TARGET_REGION and self.target_region:
+            return clip_region(self.target_region, desktop) or self.target_monitor
+        if self.target_mode == TARGET_WINDOW:
+            window = find_window_at(*self.root.winfo_pointerxy())
+            if window:
+                try:
+                    target = WindowTarget(window, desktop)
+                    logging.info(f"Gravando a janela '{target.title}' ({target.width}x{target.height}).")
+                    return target
+                except ValueError as e:
+                    logging.error(f"Não foi possível seguir a janela: {e}")
+            logging.warning("Nenhuma janela sob o cursor; gravando o monitor inteiro.")
+        return self.target_monitor
+
     def start_recording_mode(self):
-        if self.is_recording:
+        if self.is_busy:
             return
 
         if self.is_preparing:
-            if not self.overlay_manager:
+            if self.target_mode == TARGET_REGION:
+                if not self.target_region:
+                    return  # a região ainda está sendo desenhada
+                center_x = self.target_region['left'] + self.target_region['width'] // 2
+                center_y = self.target_region['top'] + self.target_region['height'] // 2
+                self.target_monitor = topology.monitor_at(center_x, center_y)
+            elif not self.overlay_manager:
                 self.state = "idle"
                 return
-            self.target_monitor = self.overlay_manager.get_active_monitor()
-            self.overlay_manager.destroy()
-            self.overlay_manager = None
+            else:
+                self.target_monitor = self.overlay_manager.get_active_monitor()
+                self.overlay_manager.destroy()
+                self.overlay_manager = None
         else:
-            self.target_monitor = self.sct.monitors[1]
-
+            self.target_monitor = topology.primary()
+        self.target_monitors = topology.screens() if self.record_all_screens else [self._resolve_target()]
+
+        # A calibração disputaria a CPU com o encoder; ela volta a rodar na próxima abertura.
+        calibration_runner.cancel()
+        # O ruído das telas inativas e a animação da janela principal também param enquanto a gravação roda.
+        noise_animator(self.root).pause()
+        animation_scheduler(self.root).suspend(REASON_RECORDING)
+        # A gravação assume o replay (um encoder só); ele volta a rodar sozinho ao fim dela.
+        # O início espera a thread do replay sair, sem bloquear o Tk.
+        self.state = "starting"
+        self.stop_replay(on_stopped=self._begin_recording)
+
+    def _begin_recording(self):
         preset_key = self.app_config.get("RecordingQuality", "balanced")
         self.preset = get_resolved_preset(preset_key)
         self.record_mic = self.app_config.get("RecordMicrophone", False)
@@ -85,178 +189,167 @@ class ScreenRecordingModule:
         self.root.withdraw()
         time.sleep(0.2)
 
+        self.session = None
         self.recording_thread_obj = threading.Thread(target=self._recording_thread, daemon=True)
         self.recording_thread_obj.start()
 
-        indicator_monitor = self.target_monitor or self.sct.monitors[1]
-        self.indicator.show(indicator_monitor, self.stop_event)
+        indicator_monitor = self.target_monitor or topology.primary()
+        self.indicator.show(indicator_monitor, self.stop_event, progress=self.progress)
+
+    def progress(self):
+        """(codificados, descartados) da gravação em andamento, ou None antes de o pipeline começar."""
+        return self.session.progress() if self.session else None
 
     def stop_recording(self):
         if not self.is_recording:
-            if self.is_preparing:
-                self.state = "idle"
-                if self.overlay_manager:
-                    self.overlay_manager.destroy()
-                    self.overlay_manager = None
-                self.root.deiconify()
+            self.exit_preparation_mode()
             return
 
+        # As filas e os encoders se esvaziam na thread da gravação; o Tk segue respondendo.
         self.stop_event.set()
+        self.state = "stopping"
+        self.indicator.hide()
+        self._when_finished(self.recording_thread_obj, RECORDING_STOP_TIMEOUT, self._on_recording_thread_finished)
 
-        if self.recording_thread_obj:
-            self.recording_thread_obj.join(timeout=10)
-        if self.audio_thread:
-            self.audio_thread.join(timeout=5)
+    def _on_recording_thread_finished(self):
+        session = self.session
+        audio_thread = session.audio_thread if session else None
+        self._when_finished(audio_thread, AUDIO_STOP_TIMEOUT, lambda: self._on_recording_stopped(session))
 
+    def _on_recording_stopped(self, session):
         self.state = "idle"
-        self.indicator.hide()
+        noise_animator(self.root).resume()
+        animation_scheduler(self.root).resume(REASON_RECORDING)
         self.root.deiconify()
 
-        def finalize():
-            if os.path.exists(self.output_filename) and os.path.getsize(self.output_filename) > 0:
-                show_success_dialog(self.root, "Gravação salva.", os.path.dirname(self.output_filename), self.output_filename)
-            elif os.path.exists(self.output_filename):
-                os.remove(self.output_filename)
-        self.root.after(100, finalize)
-
-    def _audio_capture_thread(self):
-        # For simplicity, we'll handle only one audio source for now: the microphone.
-        # A more complex implementation would mix or select between mic and system audio.
-        device = None
-        if self.record_mic:
-            device = sc.default_microphone()
-        elif self.record_system_audio:
-            device = sc.default_speaker(include_loopback=True)
-
-        if not device:
+        if session is None:
+            self.start_replay()
+            return
+        saved = []
+        for filename in session.output_filenames:
+            if os.path.exists(filename) and os.path.getsize(filename) > 0:
+                saved.append(filename)
+            elif os.path.exists(filename):
+                os.remove(filename)
+        if saved:
+            message = "Gravação salva." if len(saved) == 1 else f"Gravação salva ({len(saved)} arquivos, {session.output_note})."
+            show_success_dialog(self.root, message, os.path.dirname(saved[0]), saved[0])
+        self.start_replay()
+
+    def _when_finished(self, thread, timeout, callback):
+        """
+        Chama `callback` (na thread do Tk) quando `thread` terminar, consultando-a
+        com `root.after` em vez de um join que congelaria a interface. Depois de
+        `timeout` segundos, segue sem ela.
+        """
+        deadline = time.monotonic() + timeout
+
+        def poll():
+            if thread is not None and thread.is_alive():
+                if time.monotonic() < deadline:
+                    self.root.after(THREAD_POLL_MS, poll)
+                    return
+                logging.warning(f"A thread '{thread.name}' não terminou em {timeout:g}s; seguindo sem ela.")
+            callback()
+        poll()
+
+    # --- Replay instantâneo ---
+
+    def start_replay(self):
+        """Mantém o replay em memória rodando enquanto não há gravação (se ativado nas configurações)."""
+        if not self.app_config.get("ReplayEnabled", False) or self.state != "idle":
+            return
+        if self.replay_thread and self.replay_thread.is_alive():
+            if self.replay_stop_event.is_set():
+                # O replay anterior ainda está saindo: recomeça quando ele terminar.
+                self._when_finished(self.replay_thread, REPLAY_STOP_TIMEOUT, self.start_replay)
+            return
+        if calibration_runner.is_running:
+            self.root.after(REPLAY_RETRY_MS, self.start_replay)
             return
 
-        try:
-            with device.recorder(samplerate=self.preset.audio.samplerate, channels=self.preset.audio.channels) as recorder:
-                while not self.stop_event.is_set():
-                    data = recorder.record(numframes=1024)
-                    if data is not None:
-                        self.audio_queue.put(data)
-        except Exception as e:
-            print(f"Erro na captura de áudio: {e}")
-        finally:
-            self.audio_queue.put(None) # Signal completion
+        self.preset = get_resolved_preset(self.app_config.get("RecordingQuality", "balanced"))
+        self.record_mic = self.app_config.get("RecordMicrophone", False)
+        self.record_system_audio = self.app_config.get("RecordSystemAudio", False)
+        self.replay_stop_event.clear()
+        self.replay_thread = threading.Thread(target=self._replay_thread, name="Replay", daemon=True)
+        self.replay_thread.start()
+
+    def stop_replay(self, on_stopped=None):
+        """
+        Pede o fim do replay sem esperar por ele (o pipeline ainda esvazia o
+        encoder); `on_stopped` roda na thread do Tk quando a thread dele sair.
+        """
+        thread = self.replay_thread
+        if thread and thread.is_alive():
+            self.replay_stop_event.set()
+        if on_stopped:
+            self._when_finished(thread, REPLAY_STOP_TIMEOUT, on_stopped)
+
+    def update_replay(self):
+        """Liga ou desliga o replay conforme as configurações atuais."""
+        if self.app_config.get("ReplayEnabled", False):
+            self.start_replay()
+        else:
+            self.stop_replay()
+            self.replay = None
 
-    def _recording_thread(self):
-        save_path = self.app_config["DefaultSaveLocation"]
-        self.output_filename = os.path.join(save_path, f"Evidencia_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}{self.preset.container}")
+    def save_replay(self):
+        if self.replay is None or self.replay.duration <= 0:
+            logging.warning("Replay vazio ou desativado: nada para salvar.")
+            return
+        from src.core.segments import DEFAULT_OUTPUT_FORMAT, container_extension
 
-        video_settings = self.preset.video
-        width, height = video_settings.resolution
-        fps = video_settings.fps
+        output_format = self.app_config.get("OutputFormat", DEFAULT_OUTPUT_FORMAT)
+        extension = container_extension(self.preset.container, output_format)
+        filename = os.path.join(
+            self.app_config["DefaultSaveLocation"], f"Replay_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}{extension}"
+        )
+        # O remux roda fora da thread do Tk e do pipeline; a captura segue sem pausa.
+        threading.Thread(target=self._save_replay_thread, args=(self.replay, filename, output_format),
+                         name="SalvarReplay", daemon=True).start()
 
-        has_audio = self.record_mic or self.record_system_audio
+    def _save_replay_thread(self, replay, filename, output_format):
+        from src.core.replay import DEFAULT_REPLAY_SECONDS
 
         try:
-            with av.open(self.output_filename, mode='w') as container:
-                # --- Stream Setup ---
-                video_stream = container.add_stream(video_settings.codec, rate=fps)
-                video_stream.width = width
-                video_stream.height = height
-                video_stream.pix_fmt = 'yuv420p'
-                video_stream.options = {'crf': str(video_settings.crf), 'preset': video_settings.preset}
-
-                audio_stream = None
-                if has_audio:
-                    audio_settings = self.preset.audio
-                    audio_stream = container.add_stream(audio_settings.codec, rate=audio_settings.samplerate)
-                    audio_stream.bit_rate = audio_settings.bitrate
-                    audio_stream.channels = audio_settings.channels
-
-                    self.audio_queue = queue.Queue()
-                    self.audio_thread = threading.Thread(target=self._audio_capture_thread, daemon=True)
-                    self.audio_thread.start()
-
-                # --- Main Recording Loop ---
-                with mss.mss() as sct:
-                    try:
-                        cursor_img = Image.open(resource_path("assets/cursor.png")).convert("RGBA").resize((32, 32), Image.Resampling.LANCZOS)
-                    except FileNotFoundError:
-                        cursor_img = None
-                    mouse_controller = MouseController()
-
-                    frame_time = 1 / fps
-                    next_frame_time = time.time()
-                    video_pts = 0
-                    audio_pts = 0
-
-                    while not self.stop_event.is_set():
-                        loop_start_time = time.time()
-
-                        # --- Video Frame ---
-                        sct_img = sct.grab(self.target_monitor)
-                        frame_bgr = np.array(sct_img)
-                        frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGRA2RGB)
-
-                        # Resize if necessary
-                        if (frame_rgb.shape[1], frame_rgb.shape[0]) != (width, height):
-                            frame_rgb = cv2.resize(frame_rgb, (width, height), interpolation=cv2.INTER_AREA)
-
-                        # Add cursor
-                        if cursor_img:
-                            frame_pil = Image.fromarray(frame_rgb)
-                            mouse_pos = mouse_controller.position
-                            cursor_x = mouse_pos[0] - self.target_monitor['left']
-                            cursor_y = mouse_pos[1] - self.target_monitor['top']
-                            scaled_cursor_x = int(cursor_x * (width / self.target_monitor['width']))
-                            scaled_cursor_y = int(cursor_y * (height / self.target_monitor['height']))
-                            frame_pil.paste(cursor_img, (scaled_cursor_x, scaled_cursor_y), cursor_img)
-                            final_frame_rgb = np.array(frame_pil)
-                        else:
-                            final_frame_rgb = frame_rgb
-
-                        video_frame = av.VideoFrame.from_ndarray(final_frame_rgb, format='rgb24')
-                        video_frame.pts = video_pts
-                        video_pts += 1
-
-                        for packet in video_stream.encode(video_frame):
-                            container.mux(packet)
-
-                        # --- Audio Frames ---
-                        if audio_stream:
-                            try:
-                                while not self.audio_queue.empty():
-                                    audio_data = self.audio_queue.get_nowait()
-                                    if audio_data is None: # End of stream signal
-                                        break
-
-                                    # Soundcard provides 'float32' interleaved data (num_samples, num_channels), which corresponds to the 'flt' sample format in FFmpeg/PyAV.
-                                    audio_frame = av.AudioFrame.from_ndarray(
-                                        audio_data,
-                                        format='flt',
-                                        layout= 'stereo' if audio_stream.layout.name == 'stereo' else 'mono'
-                                    )
-                                    audio_frame.pts = audio_pts
-                                    audio_pts += audio_frame.samples
-
-                                    for packet in audio_stream.encode(audio_frame):
-                                        container.mux(packet)
-                            except queue.Empty:
-                                pass
-
-                        # --- Frame Rate Control & PTS Synchronization ---
-                        next_frame_time += frame_time
-                        sleep_duration = next_frame_time - time.time()
-                        if sleep_duration > 0:
-                            time.sleep(sleep_duration)
-
-                # --- Flush encoders ---
-                for packet in video_stream.encode():
-                    container.mux(packet)
-                if audio_stream:
-                    for packet in audio_stream.encode():
-                        container.mux(packet)
+            duration = replay.save(filename, self.app_config.get("ReplaySeconds", DEFAULT_REPLAY_SECONDS), output_format)
+        except Exception as e:
+            logging.error(f"Não foi possível salvar o replay em '{filename}'. Erro: {e}")
+            return
+        if duration > 0:
+            self.root.after(0, show_success_dialog, self.root, f"Replay salvo ({duration:.0f}s).",
+                            os.path.dirname(filename), filename)
+
+    def _replay_thread(self):
+        from src.core.replay import ReplayBuffer, DEFAULT_REPLAY_SECONDS, DEFAULT_REPLAY_MEGABYTES
+        from src.core.session import RecordingSession
+
+        max_seconds = self.app_config.get("ReplaySeconds", DEFAULT_REPLAY_SECONDS)
+        max_bytes = int(self.app_config.get("ReplayMaxMegabytes", DEFAULT_REPLAY_MEGABYTES) * 1024 * 1024)
+        if self.replay is None or (self.replay.max_seconds, self.replay.max_bytes) != (max_seconds, max_bytes):
+            self.replay = ReplayBuffer(max_seconds, max_bytes)
+
+        session = RecordingSession(self.app_config, self.preset, [topology.primary()],
+                                   record_mic=self.record_mic, record_system_audio=self.record_system_audio,
+                                   replay=self.replay)
+        logging.info(f"Replay instantâneo ativo: últimos {self.replay.max_seconds:g}s em memória.")
+        try:
+            session.run(self.replay_stop_event)
+        except Exception as e:
+            logging.error(f"Erro no pipeline do replay instantâneo: {e}")
+
+    def _recording_thread(self):
+        from src.core.session import RecordingSession
 
+        save_path = self.app_config["DefaultSaveLocation"]
+        base_name = os.path.join(save_path, f"Evidencia_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}")
+        try:
+            self.session = RecordingSession(self.app_config, self.preset, self.target_monitors, base_name,
+                                            self.record_mic, self.record_system_audio, replay=self.replay)
+            self.session.run(self.stop_event)
         except Exception as e:
-            print(f"Erro fatal no loop de gravação com PyAV: {e}")
-        finally:
-            if has_audio and self.audio_thread and self.audio_thread.is_alive():
-                self.audio_thread.join(timeout=2)
-            # Drain queue
-            while not self.audio_queue.empty():
-                self.audio_queue.get_nowait()
+            logging.error(f"Erro fatal no loop de gravação com PyAV: {e}")
+        if self.session:
+            self.last_summaries = self.session.summaries
+            self.last_summary = self.session.summary
@@ -0,0 +1,191 @@
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from fractions import Fraction
+
+import av
+
+from src.core.segments import SegmentedWriter, StreamTemplate, FORMAT_STANDARD
+
+DEFAULT_REPLAY_SECONDS = 30
+DEFAULT_REPLAY_MEGABYTES = 256
+
+# Quantos quadros-chave forçados cabem na janela do replay: é a granularidade do
+# descarte (um GOP inteiro sai de cada vez) e do início do arquivo salvo.
+KEYFRAMES_PER_WINDOW = 10
+MIN_KEYFRAME_INTERVAL = 1.0
+
+
+@dataclass
+class ReplayPacket:
+    """Cópia de um pacote codificado com seus timestamps, independente do libav."""
+    template: StreamTemplate
+    data: bytes
+    pts: int | None
+    dts: int | None
+    duration: int
+    time_base: Fraction
+    is_keyframe: bool
+
+    @property
+    def time(self) -> float:
+        """Instante de exibição do pacote na gravação, em segundos."""
+        timestamp = self.pts if self.pts is not None else self.dts
+        return float(timestamp * self.time_base) if timestamp is not None else 0.0
+
+    @property
+    def decode_time(self) -> float:
+        timestamp = self.dts if self.dts is not None else self.pts
+        return float(timestamp * self.time_base) if timestamp is not None else 0.0
+
+    def to_packet(self, offset: float) -> av.Packet:
+        """Pacote novo com os timestamps deslocados `offset` segundos para trás."""
+        shift = round(offset / self.time_base)
+        packet = av.Packet(self.data)
+        packet.pts = self.pts - shift if self.pts is not None else None
+        packet.dts = self.dts - shift if self.dts is not None else None
+        packet.duration = self.duration
+        packet.time_base = self.time_base
+        packet.is_keyframe = self.is_keyframe
+        return packet
+
+
+class ReplayBuffer:
+    """
+    Anel em memória com os últimos pacotes codificados de uma gravação, para
+    salvar "o que acabou de acontecer" sem recodificar.
+
+    O vídeo do anel começa sempre num quadro-chave e perde um GOP inteiro de
+    cada vez quando passa de `max_seconds` ou de `max_bytes`; o áudio (que
+    chega adiantado, sem o atraso do encoder de vídeo) fica numa fila à parte
+    e sai quando fica antes do primeiro quadro-chave; a etapa de
+    codificação força um quadro-chave a cada `keyframe_interval` segundos
+    (`take_keyframe_request`) para que esse descarte seja fino mesmo com o
+    vídeo de taxa variável. Assim a memória fica limitada durante toda a sessão.
+
+    `save` copia a lista sob o lock (rápido) e remultiplexa a cópia fora
+    dele, então o mux da gravação nunca espera pelo arquivo do replay.
+    """
+    def __init__(self, max_seconds=DEFAULT_REPLAY_SECONDS, max_bytes=DEFAULT_REPLAY_MEGABYTES * 1024 * 1024):
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.keyframe_interval = max(MIN_KEYFRAME_INTERVAL, max_seconds / KEYFRAMES_PER_WINDOW)
+        self.evicted_packets = 0
+
+        self._lock = threading.Lock()
+        self._video: deque[ReplayPacket] = deque()
+        self._audio: deque[ReplayPacket] = deque()
+        self._keyframe_times: deque[float] = deque()
+        self._bytes = 0
+        self._latest = 0.0
+        self._audio_templates: list[StreamTemplate] = []
+        self._last_forced_keyframe = None
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    @property
+    def duration(self) -> float:
+        """Segundos de vídeo disponíveis para salvar agora."""
+        with self._lock:
+            return self._latest - self._keyframe_times[0] if self._keyframe_times else 0.0
+
+    def reset(self, audio_templates: list[StreamTemplate] = ()):
+        """Esvazia o anel no início de uma gravação (os timestamps recomeçam do zero)."""
+        with self._lock:
+            self._video.clear()
+            self._audio.clear()
+            self._keyframe_times.clear()
+            self._bytes = 0
+            self._latest = 0.0
+            self._audio_templates = list(audio_templates)
+            self._last_forced_keyframe = None
+
+    def take_keyframe_request(self, frame_time) -> bool:
+        if self._last_forced_keyframe is None or frame_time - self._last_forced_keyframe >= self.keyframe_interval:
+            self._last_forced_keyframe = frame_time
+            return True
+        return False
+
+    def append(self, template: StreamTemplate, packet):
+        entry = ReplayPacket(template, bytes(packet), packet.pts, packet.dts, packet.duration or 0,
+                             packet.time_base, packet.is_keyframe)
+        with self._lock:
+            if template.type == 'audio':
+                self._audio.append(entry)
+            else:
+                if entry.is_keyframe:
+                    self._keyframe_times.append(entry.time)
+                elif not self._keyframe_times:
+                    return  # o vídeo do anel só começa num quadro-chave
+                self._video.append(entry)
+                self._latest = max(self._latest, entry.time)
+            self._bytes += len(entry.data)
+            self._evict()
+
+    def _evict(self):
+        # O GOP mais antigo sai enquanto o anel passar de um dos limites (o atual nunca sai).
+        while len(self._keyframe_times) > 1 and (
+                self._bytes > self.max_bytes or self._latest - self._keyframe_times[1] >= self.max_seconds):
+            self._keyframe_times.popleft()
+            self._pop_until(self._video, lambda head: head.is_keyframe and head.time >= self._keyframe_times[0])
+        if self._keyframe_times:
+            self._pop_until(self._audio, lambda head: head.time >= self._keyframe_times[0])
+
+    def _pop_until(self, packets, keep):
+        while packets and not keep(packets[0]):
+            self._bytes -= len(packets.popleft().data)
+            self.evicted_packets += 1
+
+    def snapshot(self, seconds=None) -> list[ReplayPacket]:
+        """
+        Os pacotes de pelo menos os últimos `seconds` segundos (ou de todo o anel),
+        a partir do quadro-chave mais recente que os cobre, em ordem de decodificação.
+        """
+        with self._lock:
+            video = list(self._video)
+            audio = list(self._audio)
+            latest = self._latest
+        # Um arquivo tem um tamanho de vídeo só: depois de uma troca de resolução
+        # (degrau de qualidade), o replay começa no primeiro quadro do tamanho novo.
+        size = (video[-1].template.width, video[-1].template.height) if video else None
+        same_size = len(video)
+        while same_size and (video[same_size - 1].template.width, video[same_size - 1].template.height) == size:
+            same_size -= 1
+        keyframes = [i for i, p in enumerate(video) if p.is_keyframe and i >= same_size]
+        if not keyframes:
+            return []
+        first = keyframes[0]
+        if seconds is not None:
+            covering = [i for i in keyframes if latest - video[i].time >= seconds]
+            first = covering[-1] if covering else first
+        start = video[first].time
+        # Áudio de antes do primeiro quadro não tem onde entrar no arquivo, e o que
+        # passa do último (o encoder de vídeo atrasa) ficaria sem imagem.
+        audio = [p for p in audio if start <= p.time <= latest]
+        return sorted(video[first:] + audio, key=lambda p: p.decode_time)
+
+    def save(self, output_filename, seconds=None, output_format=FORMAT_STANDARD) -> float:
+        """
+        Remultiplexa os últimos `seconds` segundos do anel em `output_filename`.
+        Retorna a duração salva (0 se ainda não havia vídeo no anel).
+        """
+        packets = self.snapshot(seconds)
+        if not packets:
+            return 0.0
+
+        video = [p for p in packets if p.template.type == 'video']
+        start = video[0].time
+        writer = SegmentedWriter(output_filename, output_format)
+        writer.open(video[0].template, self._audio_templates)
+        try:
+            for entry in packets:
+                writer.mux(entry.template, entry.to_packet(start))
+        finally:
+            writer.close()
+
+        duration = max(p.time for p in video) - start
+        logging.info(f"Replay salvo em '{output_filename}': {duration:.1f}s, {sum(len(p.data) for p in packets)} bytes.")
+        return duration
@@ -0,0 +1,369 @@
+import json
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from fractions import Fraction
+
+import av
+
+# Formato dos arquivos de gravação:
+# - "fragmented": MP4 fragmentado (moov vazio no início e um fragmento por segundo);
+#   um arquivo interrompido no meio continua tocável até o último fragmento gravado.
+# - "mkv": Matroska, tocável mesmo sem o índice final.
+# - "standard": MP4 comum, com o índice (moov) escrito só ao fechar o arquivo.
+# O WebM já é Matroska, então só os presets MP4 mudam de formato.
+FORMAT_FRAGMENTED = "fragmented"
+FORMAT_MKV = "mkv"
+FORMAT_STANDARD = "standard"
+OUTPUT_FORMATS = (FORMAT_FRAGMENTED, FORMAT_MKV, FORMAT_STANDARD)
+DEFAULT_OUTPUT_FORMAT = FORMAT_FRAGMENTED
+
+# Duração máxima de um fragmento do MP4 fragmentado: é o que se perde se o processo morrer.
+FRAGMENT_SECONDS = 1.0
+# O MP4 fragmentado (moov vazio) não leva lista de edição: com B-frames, o DTS
+# negativo do início empurra todo o vídeo para depois do áudio, pelo atraso de
+# reordenação do encoder (dois quadros a 30 fps, segundos com quadros esparsos).
+# Os encoders que gravam nele codificam sem B-frames.
+FRAGMENTED_ENCODER_OPTIONS = {'bf': '0'}
+
+MANIFEST_SUFFIX = "_segmentos.json"
+MANIFEST_VERSION = 1
+
+# Motivos do fim de um segmento, registrados no manifesto.
+ROTATE_TIME = "tempo"
+ROTATE_SIZE = "tamanho"
+ROTATE_RESOLUTION = "resolução"
+ROTATE_END = "fim"
+
+
+def container_extension(preset_container, output_format) -> str:
+    """Extensão dos arquivos de um preset no formato de saída escolhido."""
+    if output_format == FORMAT_MKV and preset_container == ".mp4":
+        return ".mkv"
+    return preset_container
+
+
+def segment_path(base_path, extension, index) -> str:
+    return f"{base_path}_parte{index:03d}{extension}"
+
+
+@dataclass
+class StreamTemplate:
+    """
+    Parâmetros de um encoder, o suficiente para criar streams equivalentes em
+    qualquer arquivo sem manter o encoder (e seus buffers) vivo.
+    """
+    type: str
+    codec: str
+    time_base: Fraction
+    width: int = 0
+    height: int = 0
+    pix_fmt: str = ""
+    framerate: Fraction | None = None
+    options: dict = field(default_factory=dict)
+    sample_rate: int = 0
+    bit_rate: int = 0
+    layout: str = ""
+    # Faixas de áudio: índice do stream entre as faixas de áudio e o nome exibido pelos players.
+    track: int = 0
+    title: str = ""
+
+    @classmethod
+    def from_encoder(cls, encoder, track=0, title="") -> "StreamTemplate":
+        if encoder.type == 'audio':
+            return cls('audio', encoder.codec.name, encoder.time_base, sample_rate=encoder.sample_rate,
+                       bit_rate=encoder.bit_rate, layout=encoder.layout.name, track=track, title=title)
+        return cls('video', encoder.codec.name, encoder.time_base, width=encoder.width, height=encoder.height,
+                   pix_fmt=encoder.pix_fmt, framerate=encoder.framerate, options=dict(encoder.options))
+
+    def add_stream(self, container):
+        # O libav abre um encoder próprio do stream só para tirar dele os
+        # parâmetros do cabeçalho; os pacotes vêm dos encoders do pipeline.
+        if self.type == 'audio':
+            stream = container.add_stream(self.codec, rate=self.sample_rate)
+            stream.bit_rate = self.bit_rate
+            stream.layout = self.layout
+            if self.title:
+                # "title" é o nome da faixa no Matroska; no MP4 os players mostram o "handler_name".
+                stream.metadata['title'] = self.title
+                stream.metadata['handler_name'] = self.title
+            return stream
+        stream = container.add_stream(self.codec, rate=self.framerate)
+        stream.width = self.width
+        stream.height = self.height
+        stream.pix_fmt = self.pix_fmt
+        stream.options = dict(self.options)
+        stream.codec_context.time_base = self.time_base
+        return stream
+
+
+class SegmentedWriter:
+    """
+    Grava os pacotes já codificados em um ou mais arquivos (segmentos).
+
+    Os encoders ficam fora dos arquivos: cada segmento recebe streams novos
+    a partir do StreamTemplate do encoder em uso e os pacotes são só remultiplexados,
+    com os timestamps deslocados para que todo segmento comece em zero.
+    Com `segment_seconds` ou `segment_bytes`, um novo segmento começa no
+    primeiro quadro-chave depois do limite (a etapa de codificação força um
+    conforme `take_keyframe_request`). Um quadro-chave de outra resolução (o
+    degrau de qualidade a mudou, o que o pipeline só faz com esses limites)
+    sempre abre um novo arquivo: um stream só declara um tamanho. Um manifesto JSON ao lado dos
+    arquivos lista os segmentos e onde cada um começa na gravação; ele é
+    reescrito a cada troca, então sobrevive a uma interrupção.
+
+    O áudio (uma ou mais faixas) é segurado até o vídeo alcançá-lo (o encoder
+    de vídeo atrasa alguns quadros), para que a troca de segmento corte tudo
+    no mesmo ponto.
+    """
+    def __init__(self, output_filename, output_format=DEFAULT_OUTPUT_FORMAT, segment_seconds=0, segment_bytes=0,
+                 creation_time=None):
+        self.base_path, self.extension = os.path.splitext(output_filename)
+        if output_format not in OUTPUT_FORMATS:
+            logging.error(f"Formato de saída '{output_format}' desconhecido. Usando '{DEFAULT_OUTPUT_FORMAT}'.")
+            output_format = DEFAULT_OUTPUT_FORMAT
+        self.output_format = output_format
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.creation_time = datetime.fromisoformat(creation_time) if creation_time else None
+
+        self.paths: list[str] = []
+        self.segments: list[dict] = []
+        # Áudio anterior ao início de um segmento: o de antes do primeiro quadro da gravação
+        # (normal: o vídeo começa atrasado) e o perdido num corte entre segmentos.
+        self.leading_audio_packets = 0
+        self.dropped_audio_packets = 0
+        # Pacotes de vídeo de outro tamanho que o do stream do arquivo (não deveriam existir).
+        self.mismatched_video_packets = 0
+
+        self._container = None
+        self._video_stream = None
+        self._audio_streams = []
+        self._audio_templates: list[StreamTemplate] = []
+        self._pending_audio = deque()
+        # Deslocamento (na base de tempo do encoder de vídeo) do zero do segmento atual.
+        self._video_offset = 0
+        self._segment_start = 0.0
+        self._segment_end = 0.0
+        self._segment_bytes = 0
+        self._video_time = 0.0
+        self._size_exceeded = False
+        self._keyframe_requested = False
+        self._last_forced_keyframe = 0.0
+
+    @property
+    def rotating(self) -> bool:
+        return self.segment_seconds > 0 or self.segment_bytes > 0
+
+    @property
+    def segmented(self) -> bool:
+        """Se a gravação tem (ou pode ter) mais de um arquivo: pelos limites ou por uma troca de resolução."""
+        return self.rotating or len(self.paths) > 1
+
+    @property
+    def fragmented(self) -> bool:
+        """Se os arquivos são MP4 fragmentado (o encoder de vídeo usa FRAGMENTED_ENCODER_OPTIONS)."""
+        return self.output_format == FORMAT_FRAGMENTED and self.extension == ".mp4"
+
+    @property
+    def manifest_path(self) -> str:
+        return f"{self.base_path}{MANIFEST_SUFFIX}"
+
+    def open(self, video_template: StreamTemplate, audio_templates: list[StreamTemplate] = ()):
+        """Abre o primeiro segmento com streams para os encoders descritos (áudio na ordem das faixas)."""
+        self._audio_templates = list(audio_templates)
+        if self.rotating and self.creation_time is None:
+            self.creation_time = datetime.now(timezone.utc)
+        self._open_segment(video_template)
+
+    def set_creation_time(self, creation_time):
+        """
+        Troca o `creation_time` (ISO 8601) depois de `open()` e antes do primeiro
+        pacote: o cabeçalho, que leva os metadados, só é gravado com ele.
+        """
+        self.creation_time = datetime.fromisoformat(creation_time)
+        if self._container is not None:
+            self._container.metadata['creation_time'] = (self.creation_time + timedelta(seconds=self._segment_start)).isoformat()
+        if self.segmented:
+            self._write_manifest()
+
+    def take_keyframe_request(self, frame_time) -> bool:
+        """
+        Chamado pela etapa de codificação a cada quadro (`frame_time` em segundos
+        da gravação): True quando ele deve ser um quadro-chave para abrir o próximo
+        segmento. O limite de tempo é decidido aqui, antes do atraso do encoder;
+        o de tamanho só é conhecido no mux e pede um quadro-chave uma única vez.
+        """
+        if self.segment_seconds and frame_time - self._last_forced_keyframe >= self.segment_seconds:
+            self._last_forced_keyframe = frame_time
+            return True
+        if self._size_exceeded and not self._keyframe_requested:
+            self._keyframe_requested = True
+            return True
+        return False
+
+    def mux(self, template: StreamTemplate, packet):
+        """Grava um pacote vindo do encoder descrito por `template` (o de vídeo em uso ou o de uma faixa de áudio)."""
+        if template.type == 'audio':
+            self._pending_audio.append((template, packet))
+            self._write_pending_audio(self._video_time)
+            return
+
+        if packet.is_keyframe:
+            reason = None
+            if (template.width, template.height) != (self._video_stream.width, self._video_stream.height):
+                reason = ROTATE_RESOLUTION
+            elif self.rotating:
+                if self.segment_seconds and packet.pts * packet.time_base - self._segment_start >= self.segment_seconds:
+                    reason = ROTATE_TIME
+                elif self._size_exceeded:
+                    reason = ROTATE_SIZE
+            if reason:
+                self._rotate(template, packet, reason)
+        if (template.width, template.height) != (self._video_stream.width, self._video_stream.height):
+            # Sem um quadro-chave não há como abrir outro arquivo, e o quadro não cabe no stream deste.
+            self.mismatched_video_packets += 1
+            return
+
+        if packet.dts is not None:
+            self._video_time = float(packet.dts * packet.time_base)
+            packet.dts -= self._video_offset
+        if packet.pts is not None:
+            self._segment_end = max(self._segment_end, float(packet.pts * packet.time_base))
+            packet.pts -= self._video_offset
+        self._write(packet, self._video_stream)
+        self._write_pending_audio(self._video_time)
+        if self.segment_bytes and self._segment_bytes >= self.segment_bytes:
+            self._size_exceeded = True
+
+    def close(self):
+        if self._container is None:
+            return
+        self._write_pending_audio(None)
+        self._close_segment(ROTATE_END)
+        if self.leading_audio_packets:
+            logging.debug(f"{self.leading_audio_packets} pacotes de áudio anteriores ao primeiro quadro descartados.")
+        if self.dropped_audio_packets:
+            logging.warning(f"{self.dropped_audio_packets} pacotes de áudio anteriores ao início do segmento descartados.")
+        if self.mismatched_video_packets:
+            logging.error(f"{self.mismatched_video_packets} pacotes de vídeo com tamanho diferente do stream descartados.")
+
+    def discard(self):
+        """Fecha o segmento atual sem finalizá-lo e apaga os arquivos: a gravação foi cancelada antes de começar."""
+        if self._container is not None:
+            self._container.close()
+            self._container = None
+        paths = self.paths + [self.manifest_path] if self.segmented else self.paths
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.error(f"Não foi possível apagar o arquivo '{path}' da gravação cancelada. Erro: {e}")
+        self.paths = []
+        self.segments = []
+
+    # --- Segmentos ---
+
+    def _open_segment(self, video_template):
+        index = len(self.paths) + 1
+        # Sem limites, o primeiro arquivo fica com o nome pedido; os abertos por troca de resolução ganham "_parteNNN".
+        path = segment_path(self.base_path, self.extension, index) if self.rotating or index > 1 \
+            else self.base_path + self.extension
+        options = {}
+        if self.fragmented:
+            options = {
+                'movflags': 'frag_keyframe+empty_moov+default_base_moof',
+                'frag_duration': str(int(FRAGMENT_SECONDS * 1_000_000)),
+            }
+        container = av.open(path, mode='w', options=options)
+        if self.creation_time:
+            container.metadata['creation_time'] = (self.creation_time + timedelta(seconds=self._segment_start)).isoformat()
+
+        self._video_stream = video_template.add_stream(container)
+        self._audio_streams = [template.add_stream(container) for template in self._audio_templates]
+
+        self._container = container
+        self._segment_bytes = 0
+        self.paths.append(path)
+        self.segments.append({"file": os.path.basename(path), "start": round(self._segment_start, 3), "complete": False})
+        if self.segmented:
+            self._write_manifest()
+
+    def _close_segment(self, reason):
+        self._container.close()
+        self._container = None
+        self.segments[-1].update({
+            "duration": round(max(0.0, self._segment_end - self._segment_start), 3),
+            "bytes": os.path.getsize(self.paths[-1]),
+            "end_reason": reason,
+            "complete": True,
+        })
+        if self.segmented:
+            self._write_manifest()
+
+    def _rotate(self, video_template, keyframe, reason):
+        """Fecha o segmento atual e abre o próximo começando em `keyframe`."""
+        # O quadro-chave vira o instante zero do segmento; com B-frames o DTS dele
+        # fica negativo, o que a lista de edição do MP4 comum e do MKV resolve (o
+        # fragmentado não tem uma; seus encoders não usam B-frames).
+        boundary = float(keyframe.pts * keyframe.time_base)
+        # O áudio de antes do corte fecha o segmento atual; o resto vai para o próximo.
+        self._write_pending_audio(boundary)
+        self._close_segment(reason)
+        logging.info(f"Segmento {len(self.paths)} fechado ({reason}); iniciando o segmento {len(self.paths) + 1}.")
+
+        self._segment_start = boundary
+        self._segment_end = boundary
+        self._video_offset = keyframe.pts
+        self._size_exceeded = False
+        self._keyframe_requested = False
+        self._last_forced_keyframe = boundary
+        self._open_segment(video_template)
+
+    # --- Pacotes ---
+
+    def _write_pending_audio(self, until):
+        """Grava o áudio retido que começa antes de `until` (em segundos); None grava tudo."""
+        while self._pending_audio:
+            template, packet = self._pending_audio[0]
+            if until is not None and packet.pts is not None and packet.pts * packet.time_base >= until:
+                break
+            self._pending_audio.popleft()
+            offset = round(self._segment_start / template.time_base)
+            if packet.pts is not None:
+                packet.pts -= offset
+                if packet.pts < 0:
+                    if len(self.paths) > 1:
+                        self.dropped_audio_packets += 1
+                    else:
+                        self.leading_audio_packets += 1
+                    continue
+            if packet.dts is not None:
+                packet.dts -= offset
+            self._write(packet, self._audio_streams[template.track])
+
+    def _write(self, packet, stream):
+        packet.stream = stream
+        self._segment_bytes += packet.size
+        self._container.mux(packet)
+
+    def _write_manifest(self):
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "format": self.output_format,
+            "creation_time": self.creation_time.isoformat() if self.creation_time else None,
+            "segment_seconds": self.segment_seconds,
+            "segment_bytes": self.segment_bytes,
+            "segments": self.segments,
+        }
+        temp_path = self.manifest_path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.manifest_path)
+        except OSError as e:
+            logging.error(f"Não foi possível salvar o manifesto de segmentos '{self.manifest_path}'. Erro: {e}")
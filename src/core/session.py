@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+from dataclasses import replace
+
+from src.core.audio import (
+    AudioCapture, AudioRingBuffer, DEFAULT_AUDIO_MODE, SOURCE_MICROPHONE, SOURCE_SYSTEM, default_sources, track_names,
+    AUDIO_RING_SECONDS, DEFAULT_AUDIO_OVERFLOW_POLICY
+)
+from src.core.backends import DEFAULT_CAPTURE_BACKEND
+from src.core.canvas import MonitorCanvas
+from src.core.clock import MediaClock
+from src.core.metrics import RecordingSummary
+from src.core.multimonitor import MonitorWorkers, LAYOUT_SEPARATE, DEFAULT_MULTI_MONITOR_LAYOUT
+from src.core.pipeline import RecordingPipeline, DEFAULT_QUEUE_DEPTH, DEFAULT_CONVERSION_PATH, DEFAULT_LATE_FRAME_POLICY
+from src.core.presets import fit_resolution, RecordingPreset
+from src.core.replay import ReplayBuffer
+from src.core.segments import DEFAULT_OUTPUT_FORMAT, container_extension, segment_path
+from src.core.targets import WindowTarget
+
+
+class RecordingSession:
+    """
+    Uma gravação, sem nada de interface: escolhe os arquivos, abre a captura de
+    áudio, roda o pipeline (ou um processo por tela) até `stop_event` e junta
+    os resumos. O ScreenRecordingModule a roda numa thread a partir do Tk; a
+    linha de comando (src.cli), direto.
+
+    `base_name` é o caminho dos arquivos sem extensão; sem ele, a sessão só
+    alimenta o `replay` em memória.
+    """
+    def __init__(self, app_config, preset: RecordingPreset, target_monitors, base_name=None,
+                 record_mic=False, record_system_audio=False, replay: ReplayBuffer = None):
+        self.app_config = app_config
+        self.preset = preset
+        self.target_monitors = list(target_monitors)
+        self.base_name = base_name
+        self.record_mic = record_mic
+        self.record_system_audio = record_system_audio
+        self.replay = replay
+
+        self.options = self.pipeline_options()
+        self.multi_monitor = len(self.target_monitors) > 1
+        self.separate = self.multi_monitor and \
+            app_config.get("MultiMonitorLayout", DEFAULT_MULTI_MONITOR_LAYOUT) == LAYOUT_SEPARATE
+        self.segmented = self.options["segment_seconds"] > 0 or self.options["segment_bytes"] > 0
+
+        extension = container_extension(preset.container, self.options["output_format"])
+        if base_name is None:
+            filenames = [None]
+        elif self.separate:
+            filenames = [f"{base_name}_tela{index}{extension}" for index in range(1, len(self.target_monitors) + 1)]
+        else:
+            filenames = [f"{base_name}{extension}"]
+        self.filenames = filenames
+        self.output_filename = filenames[0]
+        self.output_note = ", ".join(
+            note for note, active in (("um por tela", self.separate), ("em segmentos", self.segmented)) if active
+        )
+        # Os nomes reais só são conhecidos ao fim; até lá, o primeiro segmento de cada arquivo.
+        self.output_filenames = [
+            segment_path(*os.path.splitext(filename), 1) if self.segmented else filename
+            for filename in filenames if filename
+        ]
+
+        self.audio_thread = None
+        self.audio_queue = None
+        self.pipeline: RecordingPipeline = None
+        self.workers: MonitorWorkers = None
+        self.summaries: dict[str, RecordingSummary | None] = {}
+
+    @property
+    def has_audio(self) -> bool:
+        return self.record_mic or self.record_system_audio
+
+    @property
+    def summary(self) -> RecordingSummary | None:
+        return self.summaries.get(self.output_filename)
+
+    def progress(self):
+        """(codificados, descartados) até agora, ou None antes de o pipeline começar."""
+        source = self.workers or self.pipeline
+        return source.progress() if source else None
+
+    def run(self, stop_event):
+        """Grava até `stop_event` ser acionado (ou o pipeline falhar)."""
+        # Um relógio para o vídeo e o áudio; os processos por tela recebem o mesmo instante de largada.
+        clock = MediaClock()
+        try:
+            if self.separate:
+                jobs = [
+                    (self.preset_for_monitor(monitor), monitor, filename)
+                    for monitor, filename in zip(self.target_monitors, self.filenames)
+                ]
+                self.workers = MonitorWorkers(jobs, self.options, with_audio=self.has_audio)
+
+            if self.has_audio:
+                # No modo de um processo por tela, o áudio atravessa para o processo da primeira tela.
+                self.audio_queue = self.workers.audio_queue if self.workers else self.audio_ring()
+                self.audio_thread = self.start_audio_capture(stop_event, self.audio_queue, clock)
+                if self.workers and not self.audio_thread:
+                    self.workers.audio_queue = None
+
+            if self.workers:
+                self.workers.run(stop_event)
+                self.summaries = self.workers.summaries
+            else:
+                monitor = self.target_monitors[0]
+                preset = self.preset_for_monitor(monitor)
+                if self.multi_monitor:
+                    monitor = MonitorCanvas(self.target_monitors, self.preset.video.resolution[1])
+                    preset = replace(self.preset, video=replace(self.preset.video, resolution=(monitor.width, monitor.height)))
+
+                self.pipeline = RecordingPipeline(
+                    preset,
+                    monitor,
+                    self.output_filename,
+                    stop_event,
+                    audio_queue=self.audio_queue if self.audio_thread else None,
+                    replay=self.replay,
+                    clock=clock,
+                    **self.options,
+                )
+                self.pipeline.run()
+                self.summaries = {self.output_filename: self.pipeline.summary}
+            recorded = [f for summary in self.summaries.values() if summary for f in summary.output_files]
+            if recorded:
+                self.output_filenames = recorded
+        finally:
+            stop_event.set()
+            if self.audio_thread and self.audio_thread.is_alive():
+                self.audio_thread.join(timeout=2)
+            # O anel é limitado e a fila entre processos morre com os processos: basta soltá-los.
+            self.audio_queue = None
+
+    def start_audio_capture(self, stop_event, audio_queue, clock):
+        """
+        Inicia a captura do microfone e/ou do áudio do sistema numa thread que
+        alimenta `audio_queue`, carimbando os blocos em `clock` (o relógio do
+        vídeo). Retorna a thread, ou None se nenhuma fonte abriu (a gravação
+        segue sem áudio).
+        """
+        try:
+            sources = default_sources(self.record_mic, self.record_system_audio)
+        except Exception as e:
+            logging.error(f"Não foi possível abrir os dispositivos de áudio. Gravando sem áudio. Erro: {e}")
+            return None
+        if not sources:
+            return None
+
+        gains = {
+            SOURCE_MICROPHONE: self.app_config.get("MicrophoneGain", 1.0),
+            SOURCE_SYSTEM: self.app_config.get("SystemAudioGain", 1.0),
+        }
+        capture = AudioCapture(self.preset.audio, sources, audio_queue, stop_event,
+                               mode=self.app_config.get("AudioMode", DEFAULT_AUDIO_MODE), gains=gains, clock=clock)
+        thread = threading.Thread(target=capture.run, name="CapturaAudio", daemon=True)
+        thread.start()
+        return thread
+
+    def pipeline_options(self):
+        return {
+            "queue_depth": self.app_config.get("PipelineQueueDepth", DEFAULT_QUEUE_DEPTH),
+            "highlight_clicks": self.app_config.get("HighlightClicks", False),
+            "conversion": self.app_config.get("ConversionPath", DEFAULT_CONVERSION_PATH),
+            "damage_detection": self.app_config.get("DamageDetection", True),
+            "late_frame_policy": self.app_config.get("LateFramePolicy", DEFAULT_LATE_FRAME_POLICY),
+            "adaptive_quality": self.app_config.get("AdaptiveQuality", True),
+            "output_format": self.app_config.get("OutputFormat", DEFAULT_OUTPUT_FORMAT),
+            "segment_seconds": self.app_config.get("SegmentMinutes", 0) * 60,
+            "segment_bytes": int(self.app_config.get("SegmentMegabytes", 0) * 1024 * 1024),
+            "audio_tracks": self.audio_tracks(),
+            "audio_overflow": self.app_config.get("AudioOverflowPolicy", DEFAULT_AUDIO_OVERFLOW_POLICY),
+            "audio_buffer_seconds": self.app_config.get("AudioBufferSeconds", AUDIO_RING_SECONDS),
+            "capture_backend": self.app_config.get("CaptureBackend", DEFAULT_CAPTURE_BACKEND),
+        }
+
+    def audio_ring(self):
+        return AudioRingBuffer(len(self.options["audio_tracks"]), self.preset.audio, self.options["audio_buffer_seconds"],
+                               self.options["audio_overflow"])
+
+    def audio_tracks(self):
+        names = [name for name, active in ((SOURCE_MICROPHONE, self.record_mic),
+                                           (SOURCE_SYSTEM, self.record_system_audio)) if active]
+        return track_names(names, self.app_config.get("AudioMode", DEFAULT_AUDIO_MODE))
+
+    def preset_for_monitor(self, monitor):
+        """Preset com a resolução ajustada ao aspect ratio do alvo (nativa, nos presets nativos)."""
+        if isinstance(monitor, WindowTarget):
+            size = (monitor.width, monitor.height)
+        else:
+            size = (monitor['width'], monitor['height'])
+        max_size = size if self.preset.is_native else self.preset.video.resolution
+        return replace(self.preset, video=replace(self.preset.video, resolution=fit_resolution(size, max_size)))
@@ -0,0 +1,169 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Cores (BGRA) da área de trabalho sintética.
+DESKTOP_TOP = (120, 72, 30, 255)
+DESKTOP_BOTTOM = (60, 36, 15, 255)
+WINDOW_BACKGROUND = (250, 250, 250, 255)
+TITLE_BAR = (110, 90, 0, 255)
+TEXT_COLOR = (40, 40, 40, 255)
+
+# Movimento por quadro: rolagem do documento e arrasto da janela flutuante, em pixels.
+SCROLL_SPEED = 3
+DRAG_SPEED = 4
+
+# Tom do áudio sintético: frequência (Hz) e amplitude; cada faixa soa uma oitava acima da anterior.
+TONE_FREQUENCY = 440.0
+TONE_AMPLITUDE = 0.2
+
+
+class SyntheticScreen:
+    """
+    Conteúdo de tela sintético e determinístico, parecido com uma área de
+    trabalho real: fundo em degradê, uma janela de texto que rola, uma janela
+    que é arrastada e um pequeno painel de "vídeo" que muda a cada quadro.
+
+    Serve para medir o encoder (e, mais adiante, o pipeline) sem depender do
+    que está aberto na tela do usuário.
+    """
+    def __init__(self, width, height, seed=0):
+        self.width = width
+        self.height = height
+        self._rng = np.random.default_rng(seed)
+        self._unit = max(1, min(width, height) // 60)
+
+        self._background = self._render_desktop()
+        self._document = self._render_document(width // 2, height * 2)
+        self._floating = self._render_window(width // 4, height // 4, lines=6)
+        self._video_size = (max(2, height // 5), max(2, width // 5))
+        self._video_texture = self._render_texture(self._video_size[0] * 2, self._video_size[1] * 2)
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return (self.height, self.width, 4)
+
+    def _render_desktop(self) -> np.ndarray:
+        ramp = np.linspace(0.0, 1.0, self.height, dtype=np.float32)[:, None]
+        top = np.array(DESKTOP_TOP, dtype=np.float32)
+        bottom = np.array(DESKTOP_BOTTOM, dtype=np.float32)
+        column = (top * (1 - ramp) + bottom * ramp).astype(np.uint8)
+        desktop = np.ascontiguousarray(np.broadcast_to(column[:, None, :], (self.height, self.width, 4)))
+
+        taskbar = max(2, self._unit * 2)
+        desktop[-taskbar:] = (48, 48, 48, 255)
+        return desktop
+
+    def _random_line(self, max_chars) -> str:
+        words = []
+        length = 0
+        target = int(self._rng.integers(max_chars // 3, max_chars + 1))
+        while length < target:
+            word = "".join(chr(c) for c in self._rng.integers(97, 123, size=int(self._rng.integers(2, 10))))
+            words.append(word)
+            length += len(word) + 1
+        return " ".join(words)
+
+    def _render_text(self, canvas, top, lines):
+        line_height = self._unit * 2
+        scale = line_height / 40
+        max_chars = max(4, int(canvas.shape[1] / (line_height * 0.55)))
+        for index in range(lines):
+            y = top + (index + 1) * line_height
+            if y >= canvas.shape[0]:
+                break
+            cv2.putText(canvas, self._random_line(max_chars), (self._unit, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, scale, TEXT_COLOR, 1, cv2.LINE_AA)
+
+    def _render_window(self, width, height, lines) -> np.ndarray:
+        window = np.empty((max(2, height), max(2, width), 4), dtype=np.uint8)
+        window[:] = WINDOW_BACKGROUND
+        title = self._unit * 2
+        window[:title] = TITLE_BAR
+        self._render_text(window, title, lines)
+        return window
+
+    def _render_texture(self, height, width) -> np.ndarray:
+        # Ruído suavizado: textura com detalhe de "foto", que o painel de vídeo percorre.
+        noise = self._rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+        smooth = cv2.normalize(cv2.GaussianBlur(noise, (0, 0), self._unit), None, 0, 255, cv2.NORM_MINMAX)
+        texture = np.empty((height, width, 4), dtype=np.uint8)
+        texture[..., :3] = smooth
+        texture[..., 3] = 255
+        return texture
+
+    def _render_document(self, width, height) -> np.ndarray:
+        document = np.empty((height, width, 4), dtype=np.uint8)
+        document[:] = WINDOW_BACKGROUND
+        self._render_text(document, 0, height // (self._unit * 2))
+        return document
+
+    def frame(self, index, out=None) -> np.ndarray:
+        """Gera o quadro `index` (BGRA). Com `out`, escreve no buffer dado em vez de alocar."""
+        if out is None:
+            out = np.empty(self.shape, dtype=np.uint8)
+        np.copyto(out, self._background)
+
+        # Janela de texto rolando, ocupando a metade esquerda.
+        doc_h = self.height - self._unit * 4
+        doc_w = self._document.shape[1]
+        offset = (index * SCROLL_SPEED) % (self._document.shape[0] - doc_h)
+        out[self._unit:self._unit + doc_h, self._unit:self._unit + doc_w] = self._document[offset:offset + doc_h]
+
+        # Janela flutuante sendo arrastada em zigue-zague pela metade direita.
+        win_h, win_w = self._floating.shape[:2]
+        span_x = max(1, self.width - doc_w - win_w - self._unit * 3)
+        span_y = max(1, self.height - win_h - self._unit * 4)
+        travel = index * DRAG_SPEED
+        x = doc_w + self._unit * 2 + abs((travel % (2 * span_x)) - span_x)
+        y = self._unit + abs(((travel // 2) % (2 * span_y)) - span_y)
+        out[y:y + win_h, x:x + win_w] = self._floating
+
+        # Painel de vídeo com conteúdo diferente a cada quadro, no canto inferior direito.
+        video_h, video_w = self._video_size
+        pan_y = abs(((index * 2) % (2 * video_h)) - video_h)
+        pan_x = abs(((index * 3) % (2 * video_w)) - video_w)
+        vy = self.height - video_h - self._unit * 3
+        vx = self.width - video_w - self._unit
+        out[vy:vy + video_h, vx:vx + video_w] = self._video_texture[pan_y:pan_y + video_h, pan_x:pan_x + video_w]
+        return out
+
+
+class SyntheticAudio(threading.Thread):
+    """
+    Fonte de áudio sintética no lugar da AudioCapture: um tom contínuo por
+    faixa, entregue em blocos de `chunk_frames` no ritmo do relógio e
+    carimbados em `clock`, com os mesmos itens da captura real
+    (`(faixa, captured_at, amostras)` e None no fim). Dispensa placa de som.
+    """
+    def __init__(self, settings, output, stop_event, clock, tracks=1, chunk_frames=1024):
+        super().__init__(name="audio-sintetico", daemon=True)
+        self.settings = settings
+        self.output = output
+        self.stop_event = stop_event
+        self.clock = clock
+        self.tracks = tracks
+        self.chunk_frames = chunk_frames
+
+    def run(self):
+        rate = self.settings.samplerate
+        period = self.chunk_frames / rate
+        frequencies = [TONE_FREQUENCY * 2 ** track for track in range(self.tracks)]
+        position = 0
+        deadline = self.clock.now()
+        try:
+            while not self.stop_event.is_set():
+                deadline += period
+                delay = deadline - self.clock.now()
+                if delay > 0:
+                    time.sleep(delay)
+                t = (position + np.arange(self.chunk_frames)) / rate
+                for track, frequency in enumerate(frequencies):
+                    tone = (TONE_AMPLITUDE * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+                    data = np.repeat(tone[:, None], self.settings.channels, axis=1)
+                    self.output.put((track, self.clock.now(), data))
+                position += self.chunk_frames
+        finally:
+            self.output.put(None)
@@ -0,0 +1,188 @@
+import logging
+import os
+import time
+
+from PIL import Image
+
+# O que é capturado/gravado: o monitor inteiro, a janela sob o cursor ou uma região desenhada.
+TARGET_MONITOR = "monitor"
+TARGET_WINDOW = "window"
+TARGET_REGION = "region"
+CAPTURE_TARGETS = (TARGET_MONITOR, TARGET_WINDOW, TARGET_REGION)
+DEFAULT_CAPTURE_TARGET = TARGET_MONITOR
+
+# Intervalo entre leituras da geometria da janela seguida durante a gravação.
+GEOMETRY_POLL_INTERVAL = 0.25
+# Regiões menores que isto (em pixels) são tratadas como um clique sem arrasto.
+MIN_REGION_SIZE = 16
+
+
+def even_region(left, top, width, height) -> dict:
+    """Retângulo no formato do mss, com largura e altura pares (exigência do yuv420p)."""
+    return {
+        'left': int(left),
+        'top': int(top),
+        'width': max(2, int(width) // 2 * 2),
+        'height': max(2, int(height) // 2 * 2),
+    }
+
+
+def clip_region(region, bounds) -> dict | None:
+    """Recorta a região à área de trabalho (`bounds`); None se não sobrar nada."""
+    left = max(region['left'], bounds['left'])
+    top = max(region['top'], bounds['top'])
+    right = min(region['left'] + region['width'], bounds['left'] + bounds['width'])
+    bottom = min(region['top'] + region['height'], bounds['top'] + bounds['height'])
+    if right - left < 2 or bottom - top < 2:
+        return None
+    return even_region(left, top, right - left, bottom - top)
+
+
+def grab_image(backend, region) -> Image.Image:
+    """Captura a região com o backend de captura e devolve uma imagem RGB do Pillow."""
+    image = backend.grab(region)
+    return Image.frombuffer("RGB", (image.shape[1], image.shape[0]), image, "raw", "BGRX", 0, 1)
+
+
+def capture_region(backend, region) -> Image.Image:
+    """Screenshot da região, recortada à área de trabalho (uma janela pode passar da borda da tela)."""
+    region = clip_region(region, backend.monitors[0]) or region
+    return grab_image(backend, region)
+
+
+# --- Janelas ---
+
+def _import_pygetwindow():
+    try:
+        import pygetwindow
+        return pygetwindow
+    except Exception as e:  # NotImplementedError fora do Windows/macOS
+        logging.warning(f"Captura de janela indisponível nesta plataforma: {e}")
+        return None
+
+
+def _is_own_window(window) -> bool:
+    """Janelas do próprio Sentinela (sobreposições, indicador) não são alvos."""
+    hwnd = getattr(window, "_hWnd", None)
+    if hwnd is None:
+        return False
+    try:
+        import ctypes
+        pid = ctypes.c_ulong()
+        ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        return pid.value == os.getpid()
+    except Exception:
+        return False
+
+
+def find_window_at(x, y):
+    """A janela de aplicativo mais ao topo sob o ponto, ignorando as do próprio Sentinela."""
+    gw = _import_pygetwindow()
+    if gw is None:
+        return None
+    try:
+        windows = gw.getWindowsAt(x, y)
+    except Exception as e:
+        logging.error(f"Não foi possível listar as janelas sob o cursor. Erro: {e}")
+        return None
+    for window in windows:
+        if window.title and not _is_own_window(window) and not window.isMinimized:
+            return window
+    return None
+
+
+def window_rect(window) -> dict | None:
+    """
+    Geometria visível da janela. No Windows 10+ usa os limites do DWM, que
+    excluem a borda invisível de redimensionamento incluída pelo GetWindowRect.
+    """
+    hwnd = getattr(window, "_hWnd", None)
+    if hwnd is not None:
+        try:
+            import ctypes
+            from ctypes import wintypes
+            rect = wintypes.RECT()
+            DWMWA_EXTENDED_FRAME_BOUNDS = 9
+            if ctypes.windll.dwmapi.DwmGetWindowAttribute(
+                    wintypes.HWND(hwnd), DWMWA_EXTENDED_FRAME_BOUNDS, ctypes.byref(rect), ctypes.sizeof(rect)) == 0:
+                return even_region(rect.left, rect.top, rect.right - rect.left, rect.bottom - rect.top)
+        except Exception:
+            pass
+    try:
+        box = window.box
+        return even_region(box.left, box.top, box.width, box.height)
+    except Exception:
+        return None
+
+
+class WindowTarget:
+    """
+    Janela seguida durante uma gravação.
+
+    A geometria é lida no máximo a cada `poll_interval` segundos (uma chamada
+    ao sistema) e reaproveitada nos quadros entre as leituras. A região
+    capturada mantém o aspect ratio inicial da janela: quando ela é
+    redimensionada, o retângulo é ampliado em volta dela em vez de deformar o
+    vídeo, e fica sempre dentro da área de trabalho (`bounds`).
+    """
+    def __init__(self, window, bounds, poll_interval=GEOMETRY_POLL_INTERVAL):
+        self.window = window
+        self.title = window.title
+        self.bounds = bounds
+        self.poll_interval = poll_interval
+
+        rect = window_rect(window)
+        if rect is None:
+            raise ValueError(f"Janela '{self.title}' sem geometria válida.")
+        self._rect = rect
+        self._polled_at = time.perf_counter()
+        self._minimized = False
+        self.moves = 0
+
+        initial = clip_region(rect, bounds) or rect
+        self.width = initial['width']
+        self.height = initial['height']
+        self.aspect = self.width / self.height
+        self._region = self._fit(rect)
+
+    def region(self, now=None) -> dict:
+        """Retângulo a capturar agora, a partir da última geometria lida."""
+        now = time.perf_counter() if now is None else now
+        if now - self._polled_at >= self.poll_interval:
+            self._polled_at = now
+            self._poll()
+        return self._region
+
+    def _poll(self):
+        try:
+            minimized = self.window.isMinimized
+        except Exception:
+            minimized = True
+        if minimized != self._minimized:
+            self._minimized = minimized
+            if minimized:
+                logging.warning(f"Janela '{self.title}' minimizada ou fechada; mantendo a última posição.")
+        if minimized:
+            return
+
+        rect = window_rect(self.window)
+        if rect is not None and rect != self._rect:
+            self._rect = rect
+            self._region = self._fit(rect)
+            self.moves += 1
+
+    def _fit(self, rect) -> dict:
+        width, height = rect['width'], rect['height']
+        if width / height > self.aspect:
+            height = width / self.aspect
+        else:
+            width = height * self.aspect
+        # Maior que a área de trabalho: reduz mantendo o aspect ratio.
+        shrink = min(1.0, self.bounds['width'] / width, self.bounds['height'] / height)
+        width, height = width * shrink, height * shrink
+
+        center_x = rect['left'] + rect['width'] / 2
+        center_y = rect['top'] + rect['height'] / 2
+        left = min(max(center_x - width / 2, self.bounds['left']), self.bounds['left'] + self.bounds['width'] - width)
+        top = min(max(center_y - height / 2, self.bounds['top']), self.bounds['top'] + self.bounds['height'] - height)
+        return even_region(left, top, width, height)
@@ -16,19 +16,64 @@ sys.path.insert(0, project_root)
 
 # --- O RESTANTE DOS IMPORTS VEM DEPOIS DESTE BLOCO ---
 # Exemplo: from src.app.main_window import MainApplication
+
+# Com --profile-startup, cada importação daqui em diante é medida; o relatório sai quando a janela aparece.
+from src.app.startup_profile import StartupProfiler
+startup_profiler = StartupProfiler.from_argv(sys.argv)
+
 import tkinter as tk
 import threading
+import importlib
+import multiprocessing
 import ctypes
+import logging
+import numpy as np
 from src.app.main_window import MainApplication
 from src.core.capture import ScreenCaptureModule
 from src.core.recording import ScreenRecordingModule
 from src.core.hotkeys import key_listener_thread_proc
+from src.core.loop_probe import event_loop_probe
 from src.app.tray_icon import setup_tray_icon
 from src.config.settings import load_app_config
-from src.ui.settings_window import SettingsWindow
+from src.core.assets import assets
+from src.core.backends import grabber
+from src.core.calibration import calibration_runner, is_calibrated
+from src.core.monitors import topology
+from src.core.presets import calibration_targets
+from src.app.main_window import LOGO_BOX
+from src.ui.preparation_mode import overlay_pool
 from src.utils import resource_path
 
+# A pilha de mídia (PyAV, OpenCV, soundcard) fica fora da abertura: estes módulos são
+# importados numa thread depois que a janela aparece, para a primeira gravação não esperar.
+WARMUP_MODULES = ("src.core.session", "src.ui.settings_window")
+# Espera (ms) depois da janela visível antes da calibração, do replay e do aquecimento.
+DEFERRED_STARTUP_MS = 500
+
+def startup_assets():
+    """Recursos decodificados (e redimensionados) em segundo plano enquanto a janela abre."""
+    return [
+        ("thumbnail", resource_path("assets/logo_guara.png"), {"box": LOGO_BOX}),
+        ("image", resource_path("assets/sentinela.ico"), {}),
+        # O cursor da gravação, como a CursorCompositor o lê.
+        ("array", resource_path("assets/cursor.png"), {"mode": "RGBA", "dtype": np.float32}),
+    ]
+
+def warm_up_imports():
+    for name in WARMUP_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logging.error(f"Não foi possível pré-carregar o módulo '{name}'. Erro: {e}")
+
 def main():
+    logging.basicConfig(
+        filename="app.log",
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(threadName)s: %(message)s"
+    )
+    assets.warm(startup_assets())
+
     try:
         ctypes.windll.shcore.SetProcessDpiAwareness(2)
     except AttributeError:
@@ -62,9 +107,11 @@ def main():
 
     app_config = load_app_config()
     save_path = app_config["DefaultSaveLocation"]
+    grabber.configure(app_config["CaptureBackend"])
 
     # --- First Run Check ---
     if not app_config.get("HasRunBefore", False):
+        from src.ui.settings_window import SettingsWindow
         settings_window = SettingsWindow(root, app_config, is_first_run=True)
 
         # O Feitiço de Centralização
@@ -81,7 +128,7 @@ def main():
         save_path = app_config["DefaultSaveLocation"]
 
 
-    capture_module = ScreenCaptureModule(root, save_path)
+    capture_module = ScreenCaptureModule(root, save_path, app_config)
     recording_module = ScreenRecordingModule(root, app_config)
     main_app = MainApplication(root, capture_module, recording_module, app_config)
     main_app.pack(side="top", fill="both", expand=True)
@@ -93,6 +140,21 @@ def main():
     )
     listener_thread.start()
 
+    def deferred_startup():
+        # --- Calibração do encoder (em segundo plano, só quando esta máquina ainda não foi medida) ---
+        targets = calibration_targets()
+        if not is_calibrated(targets):
+            calibration_runner.start(targets)
+
+        # Replay instantâneo: fica gravando em memória enquanto não há gravação.
+        recording_module.start_replay()
+        threading.Thread(target=warm_up_imports, name="PreCarga", daemon=True).start()
+        # Latência do loop do Tk (a mesma que os atalhos enfrentam), no app.log.
+        event_loop_probe.start(root)
+        # As camadas das telas inativas ficam prontas (ocultas) para o primeiro F9/F10;
+        # os logos delas são redimensionados fora da thread do Tk.
+        overlay_pool(root).prepare_in_background(topology.screens())
+
     tray_thread = threading.Thread(
         target=setup_tray_icon,
         args=(root, capture_module, recording_module, app_config),
@@ -101,7 +163,12 @@ def main():
     tray_thread.start()
 
     root.deiconify()  # Re-exibe a janela principal antes do loop
+    if startup_profiler:
+        root.after_idle(startup_profiler.finish)
+    root.after(DEFERRED_STARTUP_MS, deferred_startup)
     root.mainloop()
 
 if __name__ == "__main__":
+    # Necessário para os processos de gravação por monitor no executável do PyInstaller.
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,140 @@
+import time
+
+# O intervalo de uma animação pode crescer até este múltiplo do intervalo base enquanto
+# o loop do Tk atrasa; ele volta (×ANIMATION_RECOVERY por tick) quando o loop se recupera.
+ANIMATION_MAX_SLOWDOWN = 8
+ANIMATION_RECOVERY = 0.9
+
+# Motivos para suspender as animações: os dois primeiros vêm do próprio agendador,
+# os outros dos módulos de captura e de gravação enquanto as sessões deles rodam.
+REASON_HIDDEN = "hidden"
+REASON_OCCLUDED = "occluded"
+REASON_CAPTURE = "capture"
+REASON_RECORDING = "recording"
+
+
+class Animation:
+    """Uma animação decorativa: `step(scale)` desenha um quadro a cada `interval_ms`."""
+    def __init__(self, step, interval_ms, budget_ms):
+        self.step = step
+        self.base_interval = interval_ms
+        self.interval = interval_ms
+        self.budget = budget_ms / 1000
+        self.after_id = None
+        self.due = 0.0
+
+    @property
+    def scale(self) -> float:
+        """Quantas vezes o intervalo base um quadro dura agora (cada passo anda essa proporção a mais)."""
+        return self.interval / self.base_interval
+
+
+class AnimationScheduler:
+    """
+    Roda as animações decorativas da janela principal e para todas enquanto
+    elas não podem ser vistas ou disputariam o loop com o que importa: a
+    janela raiz oculta, minimizada ou totalmente coberta (onde o sistema de
+    janelas informa), ou uma sessão de captura ou de gravação ativa.
+
+    Cada animação tem um orçamento de tempo por quadro. Um quadro que passa
+    do orçamento, ou que dispara depois do seu intervalo, dobra o intervalo
+    (até ANIMATION_MAX_SLOWDOWN); `step` recebe a desaceleração em `scale`
+    para que o movimento mantenha a velocidade com menos quadros.
+    """
+    def __init__(self, root):
+        self.root = root
+        self._animations = {}
+        self._reasons = set()
+        if self.root.state() in ("withdrawn", "iconic"):
+            self._reasons.add(REASON_HIDDEN)  # o <Map> do primeiro deiconify as inicia
+        self.root.bind("<Map>", self._on_map, add="+")
+        self.root.bind("<Unmap>", self._on_unmap, add="+")
+        self.root.bind("<Visibility>", self._on_visibility, add="+")
+
+    @property
+    def running(self) -> bool:
+        return not self._reasons
+
+    def add(self, name, step, interval_ms, budget_ms=None):
+        """Registra (ou substitui) a animação `name`; por padrão, o orçamento é metade do intervalo."""
+        self.remove(name)
+        self._animations[name] = Animation(step, interval_ms, budget_ms if budget_ms is not None else interval_ms / 2)
+        if self.running:
+            self._schedule(self._animations[name], interval_ms)
+
+    def remove(self, name):
+        animation = self._animations.pop(name, None)
+        if animation:
+            self._cancel(animation)
+
+    def suspend(self, reason):
+        """Para todas as animações até que todos os motivos sejam retomados."""
+        self._reasons.add(reason)
+        for animation in self._animations.values():
+            self._cancel(animation)
+
+    def resume(self, reason):
+        if reason not in self._reasons:
+            return
+        self._reasons.discard(reason)
+        if self.running:
+            for animation in self._animations.values():
+                # De volta à taxa cheia; um loop ocupado a reduz de novo em poucos quadros.
+                animation.interval = animation.base_interval
+                self._schedule(animation, animation.interval)
+
+    def _schedule(self, animation, delay_ms):
+        if animation.after_id is None:
+            animation.due = time.perf_counter() + delay_ms / 1000
+            animation.after_id = self.root.after(int(delay_ms), self._tick, animation)
+
+    def _cancel(self, animation):
+        if animation.after_id is not None:
+            self.root.after_cancel(animation.after_id)
+            animation.after_id = None
+
+    def _tick(self, animation):
+        animation.after_id = None
+        if not self.running:
+            return
+
+        started = time.perf_counter()
+        late = started - animation.due
+        animation.step(animation.scale)
+        cost = time.perf_counter() - started
+
+        if cost > animation.budget or late > animation.interval / 1000:
+            animation.interval = min(animation.base_interval * ANIMATION_MAX_SLOWDOWN, animation.interval * 2)
+        elif animation.interval > animation.base_interval:
+            animation.interval = max(animation.base_interval, animation.interval * ANIMATION_RECOVERY)
+        self._schedule(animation, animation.interval)
+
+    # --- Visibilidade da janela raiz ---
+    # Os widgets filhos herdam a binding tag da raiz: só contam os eventos da própria raiz.
+
+    def _on_map(self, event):
+        if event.widget is self.root:
+            self.resume(REASON_HIDDEN)
+
+    def _on_unmap(self, event):
+        if event.widget is self.root:
+            self.suspend(REASON_HIDDEN)
+
+    def _on_visibility(self, event):
+        if event.widget is not self.root:
+            return
+        if event.state == "VisibilityFullyObscured":
+            self.suspend(REASON_OCCLUDED)
+        else:
+            self.resume(REASON_OCCLUDED)
+
+
+_scheduler = None
+
+
+def animation_scheduler(root) -> AnimationScheduler:
+    """O agendador do aplicativo (um por raiz do Tk), criado no primeiro uso."""
+    global _scheduler
+    if _scheduler is None or _scheduler.root is not root:
+        _scheduler = AnimationScheduler(root)
+    return _scheduler
@@ -10,6 +10,8 @@ class PreparationIndicator(Toplevel):
         self._timer_job = None
         self.start_time = None
         self.stop_event = None
+        self.progress = None
+        self._last_progress = None
 
         self.overrideredirect(True)
         self.wm_attributes("-topmost", True)
@@ -17,10 +19,17 @@ class PreparationIndicator(Toplevel):
 
         self.container = tk.Frame(self)
         self.container.pack(fill="both", expand=True)
+        # Each mode's labels are built on first use and then only packed, unpacked and reconfigured.
+        self.prep_view = None
+        self.rec_view = None
 
-    def _clear_container(self):
-        for widget in self.container.winfo_children():
-            widget.destroy()
+    def _switch_view(self, view):
+        self.container.configure(bg=theme["indicator_bg"], padx=10, pady=5)
+        for other in (self.prep_view, self.rec_view):
+            if other is not None and other is not view:
+                other.pack_forget()
+        if not view.winfo_manager():
+            view.pack(side="left")
 
     def _display_window(self, monitor_geom):
         if not monitor_geom: return
@@ -42,20 +51,26 @@ class PreparationIndicator(Toplevel):
 
     # --- ScreenRecordingModule specific methods ---
 
-    def show(self, monitor_geom, stop_event):
-        """Prepares and shows the indicator for recording mode."""
+    def show(self, monitor_geom, stop_event, progress=None):
+        """
+        Prepares and shows the indicator for recording mode. `progress()` returns
+        (frames encoded, frames dropped) so far, or None while the pipeline is
+        still starting; with it, the encoded fps and the drops are shown live.
+        """
         self.stop_event = stop_event
-        self._clear_container()
-        self.container.configure(bg=theme["indicator_bg"], padx=10, pady=5)
-
-        self.rec_label = tk.Label(self.container, text="REC", font=("Segoe UI", 12, "bold"), fg=theme["recording_dot"], bg=self.container.cget('bg'))
-        self.rec_label.pack(side="left", padx=(0, 10))
-
-        self.time_label = tk.Label(self.container, text="00:00:00", font=("Segoe UI", 12, "bold"), fg=theme["indicator_text"], bg=self.container.cget('bg'))
-        self.time_label.pack(side="left", padx=(0, 10))
-
-        self.info_label = tk.Label(self.container, text="F10 para parar", font=("Segoe UI", 10), fg=theme["indicator_text"], bg=self.container.cget('bg'))
-        self.info_label.pack(side="left", padx=(0, 15))
+        self.progress = progress
+        self._last_progress = None
+        if self.rec_view is None:
+            self._build_recording_view()
+        self._switch_view(self.rec_view)
+
+        self.rec_label.config(fg=theme["recording_dot"])
+        self.time_label.config(text="00:00:00")
+        self.stats_label.config(text="")
+        if progress:
+            self.stats_label.pack(side="left", padx=(0, 10), before=self.info_label)
+        else:
+            self.stats_label.pack_forget()
 
         self._display_window(monitor_geom)
 
@@ -64,6 +79,21 @@ class PreparationIndicator(Toplevel):
         self._update_timer()
         self._animate_rec()
 
+    def _build_recording_view(self):
+        bg = theme["indicator_bg"]
+        self.rec_view = tk.Frame(self.container, bg=bg)
+
+        self.rec_label = tk.Label(self.rec_view, text="REC", font=("Segoe UI", 12, "bold"), fg=theme["recording_dot"], bg=bg)
+        self.rec_label.pack(side="left", padx=(0, 10))
+
+        self.time_label = tk.Label(self.rec_view, text="00:00:00", font=("Segoe UI", 12, "bold"), fg=theme["indicator_text"], bg=bg)
+        self.time_label.pack(side="left", padx=(0, 10))
+
+        self.stats_label = tk.Label(self.rec_view, text="", font=("Segoe UI", 10), fg=theme["indicator_text"], bg=bg)
+
+        self.info_label = tk.Label(self.rec_view, text="F10 para parar", font=("Segoe UI", 10), fg=theme["indicator_text"], bg=bg)
+        self.info_label.pack(side="left", padx=(0, 15))
+
     def _animate_rec(self):
         """Animates the 'REC' label by toggling its color."""
         if not self.winfo_exists() or (self.stop_event and self.stop_event.is_set()):
@@ -95,45 +125,63 @@ class PreparationIndicator(Toplevel):
         time_str = f"{hours:02}:{minutes:02}:{seconds:02}"
 
         self.time_label.config(text=time_str)
+        self._update_stats()
 
         self._timer_job = self.after(1000, self._update_timer)
 
+    def _update_stats(self):
+        """Encoded fps over the last timer tick and total dropped frames."""
+        current = self.progress() if self.progress else None
+        if current is None:
+            return
+        now = datetime.now()
+        if self._last_progress is not None:
+            (encoded, _), at = self._last_progress
+            seconds = (now - at).total_seconds()
+            fps = (current[0] - encoded) / seconds if seconds > 0 else 0.0
+            self.stats_label.config(text=f"{fps:.0f} fps · {current[1]} perdidos")
+        self._last_progress = (current, now)
+
     # --- Legacy/Other methods ---
     # These methods are not directly part of the recording timer but are kept for other functionalities.
 
     def show_preparation_mode(self, monitor_geom, text=""):
-        self._clear_container()
-        self.container.configure(bg=theme["indicator_bg"], padx=10, pady=5)
+        if self.prep_view is None:
+            self._build_preparation_view()
+        self._switch_view(self.prep_view)
+        if self.prep_info_label.cget('text') != text:
+            self.prep_info_label.config(text=text)
 
-        prep_label = tk.Label(self.container, text="● Preparando", font=("Segoe UI", 12, "bold"), fg=theme["preparation_text"], bg=self.container.cget('bg'))
-        prep_label.pack(side="left", padx=(0, 10))
+        self._display_window(monitor_geom)
 
-        info_label = tk.Label(self.container, text=text, font=("Segoe UI", 10), fg=theme["indicator_text"], bg=self.container.cget('bg'))
-        info_label.pack(side="left", padx=(0, 15))
+    def _build_preparation_view(self):
+        bg = theme["indicator_bg"]
+        self.prep_view = tk.Frame(self.container, bg=bg)
 
-        self._display_window(monitor_geom)
+        self.prep_label = tk.Label(self.prep_view, text="● Preparando", font=("Segoe UI", 12, "bold"), fg=theme["preparation_text"], bg=bg)
+        self.prep_label.pack(side="left", padx=(0, 10))
+
+        self.prep_info_label = tk.Label(self.prep_view, text="", font=("Segoe UI", 10), fg=theme["indicator_text"], bg=bg)
+        self.prep_info_label.pack(side="left", padx=(0, 15))
 
     def hide_preparation_mode(self):
         self.withdraw()
 
     def flash_success(self):
         """Flashes the indicator green to show a successful capture."""
-        if not self.winfo_exists():
+        if not self.winfo_exists() or self.prep_view is None:
             return
 
         original_bg = self.container.cget('bg')
-        original_prep_fg = self.container.winfo_children()[0].cget('fg')
+        widgets = (self.container, self.prep_view, *self.prep_view.winfo_children())
 
         success_color = theme["success"]
-        self.container.configure(bg=success_color)
-        for widget in self.container.winfo_children():
+        for widget in widgets:
             widget.configure(bg=success_color)
 
         def restore_colors():
             if self.winfo_exists():
-                self.container.configure(bg=original_bg)
-                self.container.winfo_children()[0].configure(fg=original_prep_fg, bg=original_bg)
-                for child in self.container.winfo_children()[1:]:
-                    child.configure(bg=original_bg)
+                for widget in widgets:
+                    widget.configure(bg=original_bg)
 
         self.after(150, restore_colors)
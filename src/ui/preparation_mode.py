@@ -1,29 +1,166 @@
 import tkinter as tk
 from tkinter import Toplevel
-import mss
-import numpy as np
-from PIL import Image, ImageTk
-from pynput.mouse import Controller as MouseController
+from src.core.assets import assets
+from src.core.monitors import topology
+from src.ui.static_noise import noise_animator
 from src.utils import resource_path
 
+DEFAULT_LOGO_PATH = "assets/logo_guara.png"
+
+
+class InactiveOverlay:
+    """
+    The dark, noisy full-screen window of one inactive monitor. It is built
+    once and then only hidden and shown; the logo and text are laid out again
+    only when the monitor geometry (or the text) changes.
+    """
+    def __init__(self, root, monitor):
+        self.window = Toplevel(root)
+        self.window.overrideredirect(True)
+        self.window.wm_attributes("-topmost", True)
+        self.window.wm_attributes("-alpha", 0.7)
+        self.window.withdraw()
+
+        self.canvas = tk.Canvas(self.window, bg="black", highlightthickness=0)
+        self.canvas.pack(fill="both", expand=True)
+        self.image_item = self.canvas.create_image(0, 0, anchor="nw")
+        self.logo_item = self.canvas.create_image(0, 0)
+        self.text_item = self.canvas.create_text(0, 0, fill="white", font=("Segoe UI", 16, "bold"), justify="center")
+
+        self.size = None
+        self.geometry = None
+        self.logo_path = None
+        self.visible = False
+        self.layout(monitor)
+
+    def layout(self, monitor, text=None, logo_path=None):
+        """Fits the window to `monitor`; a no-op when nothing changed since the last call."""
+        geometry = f"{monitor['width']}x{monitor['height']}+{monitor['left']}+{monitor['top']}"
+        if geometry != self.geometry:
+            self.window.geometry(geometry)
+            self.geometry = geometry
+        if text is not None and self.canvas.itemcget(self.text_item, "text") != text:
+            self.canvas.itemconfig(self.text_item, text=text)
+
+        size = (monitor['width'], monitor['height'])
+        logo_path = logo_path or resource_path(DEFAULT_LOGO_PATH)
+        if size == self.size and logo_path == self.logo_path:
+            return
+        self.size, self.logo_path = size, logo_path
+        w, h = size
+
+        # Logo at 20% of the monitor's height, aspect ratio kept, centered above the text.
+        target_height = _logo_height(monitor)
+        logo_tk = _logo_photo(logo_path, target_height)
+        self.canvas.itemconfig(self.logo_item, image=logo_tk or "")
+        self.canvas.coords(self.logo_item, w / 2, h / 2 - (target_height / 2))
+        self.canvas.logo_ref = logo_tk
+        self.canvas.coords(self.text_item, w / 2, h / 2 + 40)
+
+    def show(self, noise):
+        if not self.visible:
+            self.window.deiconify()
+            self.window.lift()
+            noise.add(self.canvas, self.image_item, self.size)
+            self.visible = True
+
+    def hide(self, noise):
+        if self.visible:
+            noise.remove(self.canvas)
+            self.window.withdraw()
+            self.visible = False
+
+    def destroy(self, noise):
+        noise.remove(self.canvas)
+        self.window.destroy()
+
+
+def _logo_height(monitor):
+    return int(monitor['height'] * 0.20)
+
+
+def _logo_photo(path, height):
+    """The logo resized to `height`, from the shared asset cache."""
+    try:
+        return assets.photo(path, (None, height))
+    except Exception as e:
+        print(f"Could not load logo for overlay: {e}")
+        return None
+
+
+class OverlayPool:
+    """
+    One hidden InactiveOverlay per monitor, kept for the whole session so a
+    focus swap (or the first F9/F10) only hides and shows windows. `prepare`
+    builds them ahead of time; monitors that disappear lose their window.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.noise = noise_animator(root)
+        self._overlays = {}  # monitor id -> InactiveOverlay
+
+    def prepare(self, monitors):
+        """Builds (hidden) the overlays of `monitors` and starts rendering their noise."""
+        ids = {monitor['id'] for monitor in monitors}
+        for monitor_id in [monitor_id for monitor_id in self._overlays if monitor_id not in ids]:
+            self._overlays.pop(monitor_id).destroy(self.noise)
+        for monitor in monitors:
+            self.get(monitor)
+            self.noise.prepare((monitor['width'], monitor['height']))
+
+    def prepare_in_background(self, monitors, logo_path=None):
+        """Resizes the logos off the Tk thread, then builds the overlays on it."""
+        logo_path = logo_path or resource_path(DEFAULT_LOGO_PATH)
+        requests = [("image", logo_path, {"size": (None, _logo_height(monitor))}) for monitor in monitors]
+        assets.warm(requests, on_done=lambda: self.root.after(0, self.prepare, monitors))
+
+    def get(self, monitor, text=None, logo_path=None) -> InactiveOverlay:
+        overlay = self._overlays.get(monitor['id'])
+        if overlay is None:
+            overlay = self._overlays[monitor['id']] = InactiveOverlay(self.root, monitor)
+        overlay.layout(monitor, text, logo_path)
+        return overlay
+
+    def show(self, monitor, text, logo_path=None):
+        self.get(monitor, text, logo_path).show(self.noise)
+
+    def hide(self, monitor):
+        overlay = self._overlays.get(monitor['id'])
+        if overlay:
+            overlay.hide(self.noise)
+
+    def hide_all(self):
+        for overlay in self._overlays.values():
+            overlay.hide(self.noise)
+
+
+_pool = None
+
+
+def overlay_pool(root) -> OverlayPool:
+    """The application's overlay pool (one per Tk root), created on first use."""
+    global _pool
+    if _pool is None or _pool.root is not root:
+        _pool = OverlayPool(root)
+    return _pool
+
+
 class PreparationOverlayManager:
     """
     Manages the visual preparation mode for screen capture and recording.
-    This includes creating overlays on inactive screens, managing focus
+    This includes showing overlays on inactive screens, managing focus
     switching between monitors, and showing a readiness indicator on the
-    active screen.
+    active screen. The overlay windows come from the shared OverlayPool.
     """
     def __init__(self, root, indicator, indicator_text, inactive_text="This screen will not be used.", logo_path=None):
         self.root = root
         self.indicator = indicator
         self.indicator_text = indicator_text
         self.inactive_text = inactive_text
-        self.logo_path = logo_path if logo_path is not None else resource_path("assets/logo_guara.png")
+        self.logo_path = logo_path if logo_path is not None else resource_path(DEFAULT_LOGO_PATH)
 
-        self.sct = mss.mss()
-        self.overlays = {}
+        self.pool = overlay_pool(root)
         self.active_monitor = None
-        self.focus_check_id = None
         self.is_running = False
 
     def get_active_monitor(self):
@@ -37,165 +174,55 @@ class PreparationOverlayManager:
         self.is_running = True
         self.root.withdraw()
 
-        mouse_pos = MouseController().position
-        monitors = [{**m, 'id': i} for i, m in enumerate(self.sct.monitors[1:])]
-
-        # Determine initial active monitor
-        initial_active_monitor = None
-        for m in monitors:
-            if m['left'] <= mouse_pos[0] < m['left'] + m['width'] and \
-               m['top'] <= mouse_pos[1] < m['top'] + m['height']:
-                initial_active_monitor = m
-                break
-
-        if not initial_active_monitor and monitors:
-            initial_active_monitor = monitors[0]
-
-        self.active_monitor = initial_active_monitor
+        # A configuration change (a monitor plugged in) is picked up here, not polled for.
+        topology.refresh()
+        monitors = topology.screens()
+        self.pool.prepare(monitors)
+        self.active_monitor = topology.pointer_monitor()
 
-        # Create overlays for all monitors
         for monitor in monitors:
             if self.active_monitor and monitor['id'] == self.active_monitor['id']:
                 # Active monitor gets the preparation indicator
                 self.indicator.show_preparation_mode(monitor, self.indicator_text)
             else:
                 # Inactive monitors get the dark, noisy overlay
-                self._create_inactive_overlay(monitor)
+                self.pool.show(monitor, self.inactive_text, self.logo_path)
 
-        # Start tracking mouse movement
-        self.focus_check_id = self.root.after(250, self._update_active_screen_focus)
+        # Monitor changes are pushed by the topology's mouse listener; nothing polls while idle.
+        topology.track(self._on_active_monitor_changed)
 
     def destroy(self):
-        """Destroys all preparation UI elements and stops loops."""
+        """Hides all preparation UI elements and stops loops; the pooled windows are kept."""
         if not self.is_running:
             return
         self.is_running = False
 
-        if self.focus_check_id:
-            self.root.after_cancel(self.focus_check_id)
-            self.focus_check_id = None
-
-        for monitor_id, overlay_info in list(self.overlays.items()):
-            if overlay_info.get('animation_id'):
-                self.root.after_cancel(overlay_info['animation_id'])
-            overlay_info['window'].destroy()
-        self.overlays.clear()
+        topology.untrack(self._on_active_monitor_changed)
+        self.pool.hide_all()
 
         self.indicator.hide_preparation_mode()
         # We don't deiconify the root window here, the calling module should do that.
 
-    def _update_active_screen_focus(self):
+    def _on_active_monitor_changed(self, monitor):
+        # Called from the mouse listener thread; Tk is only touched on its own thread.
+        self.root.after(0, self._focus_monitor, monitor)
+
+    def _focus_monitor(self, monitor):
         if not self.is_running:
             return
-
-        mouse_pos = MouseController().position
-        monitors = [{**m, 'id': i} for i, m in enumerate(self.sct.monitors[1:])]
-
-        new_active_monitor = None
-        for m in monitors:
-            if m['left'] <= mouse_pos[0] < m['left'] + m['width'] and \
-               m['top'] <= mouse_pos[1] < m['top'] + m['height']:
-                new_active_monitor = m
-                break
-
-        if new_active_monitor and self.active_monitor and new_active_monitor['id'] != self.active_monitor['id']:
-            self._swap_focus(new_active_monitor)
-
-        self.focus_check_id = self.root.after(250, self._update_active_screen_focus)
+        if self.active_monitor and monitor['id'] != self.active_monitor['id']:
+            self._swap_focus(monitor)
 
     def _swap_focus(self, new_monitor):
         old_monitor = self.active_monitor
 
-        # Deactivate the old monitor: hide indicator and create inactive overlay
+        # Deactivate the old monitor: hide indicator and show its inactive overlay
         self.indicator.hide_preparation_mode()
         if old_monitor:
-            self._create_inactive_overlay(old_monitor)
+            self.pool.show(old_monitor, self.inactive_text, self.logo_path)
 
-        # Activate the new monitor: destroy inactive overlay and show indicator
-        if new_monitor['id'] in self.overlays:
-            overlay_info = self.overlays.pop(new_monitor['id'])
-            if overlay_info.get('animation_id'):
-                self.root.after_cancel(overlay_info['animation_id'])
-            overlay_info['window'].destroy()
+        # Activate the new monitor: hide its inactive overlay and show indicator
+        self.pool.hide(new_monitor)
 
         self.active_monitor = new_monitor
         self.indicator.show_preparation_mode(new_monitor, self.indicator_text)
-
-
-    def _create_inactive_overlay(self, monitor):
-        overlay = Toplevel(self.root)
-        overlay.overrideredirect(True)
-        overlay.geometry(f"{monitor['width']}x{monitor['height']}+{monitor['left']}+{monitor['top']}")
-        overlay.wm_attributes("-topmost", True)
-        overlay.wm_attributes("-alpha", 0.7)
-
-        canvas = tk.Canvas(overlay, bg="black", highlightthickness=0)
-        canvas.pack(fill="both", expand=True)
-
-        w, h = monitor['width'], monitor['height']
-        image_item = canvas.create_image(0, 0, anchor="nw")
-
-        try:
-            # --- Enhanced Logo Resizing ---
-            logo_original = Image.open(self.logo_path)
-            original_width, original_height = logo_original.size
-
-            # Calculate new height to be 20% of the monitor's height
-            target_height = int(h * 0.20)
-
-            # Maintain aspect ratio
-            aspect_ratio = original_width / original_height
-            target_width = int(target_height * aspect_ratio)
-
-            # Resize with high-quality downsampling
-            logo_resized = logo_original.resize((target_width, target_height), Image.Resampling.LANCZOS)
-
-            logo_tk = ImageTk.PhotoImage(logo_resized)
-            canvas.create_image(w/2, h/2 - (target_height / 2), image=logo_tk) # Adjust vertical position based on new size
-            canvas.logo_ref = logo_tk
-        except Exception as e:
-            print(f"Could not load logo for overlay: {e}")
-
-        canvas.create_text(w/2, h/2 + 40, text=self.inactive_text,
-                            fill="white", font=("Segoe UI", 16, "bold"), justify="center")
-
-        self.overlays[monitor['id']] = {
-            'window': overlay,
-            'canvas': canvas,
-            'image_item': image_item,
-            'animation_id': None
-        }
-        self.root.after(10, self._animate_static_effect, monitor['id'])
-
-    def _animate_static_effect(self, monitor_id):
-        if not self.is_running or monitor_id not in self.overlays:
-            return
-
-        overlay_info = self.overlays[monitor_id]
-        canvas = overlay_info['canvas']
-
-        if not canvas.winfo_exists():
-            return
-
-        w, h = overlay_info['window'].winfo_width(), overlay_info['window'].winfo_height()
-        if w <= 1 or h <= 1:
-            self.root.after(50, self._animate_static_effect, monitor_id)
-            return
-
-        try:
-            tile_size = 128
-            noise_pattern = np.random.randint(0, 35, (tile_size, tile_size), dtype=np.uint8)
-            noise_pil = Image.fromarray(noise_pattern, 'L')
-            full_img = Image.new('L', (w, h))
-            for y in range(0, h, tile_size):
-                for x in range(0, w, tile_size):
-                    full_img.paste(noise_pil, (x, y))
-
-            new_photo = ImageTk.PhotoImage(image=full_img)
-            canvas.itemconfig(overlay_info['image_item'], image=new_photo)
-            canvas.image_ref = new_photo
-
-            animation_id = self.root.after(100, self._animate_static_effect, monitor_id)
-            self.overlays[monitor_id]['animation_id'] = animation_id
-        except Exception as e:
-            print(f"Error during static animation: {e}")
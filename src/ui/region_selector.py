@@ -0,0 +1,71 @@
+import tkinter as tk
+from tkinter import Toplevel
+
+from src.core.targets import MIN_REGION_SIZE, even_region
+from src.ui.theme import theme
+
+
+class RegionSelector(Toplevel):
+    """
+    Camada semitransparente sobre toda a área de trabalho em que o usuário
+    arrasta um retângulo. Ao soltar o mouse, `on_selected(region)` recebe a
+    região em coordenadas globais (formato do mss); ESC chama `on_cancel()`.
+    """
+    def __init__(self, parent, desktop, on_selected, on_cancel=None, text="Arraste para marcar a região. ESC para cancelar."):
+        super().__init__(parent)
+        self.desktop = desktop
+        self.on_selected = on_selected
+        self.on_cancel = on_cancel
+        self._start = None
+        self._rect_id = None
+
+        self.overrideredirect(True)
+        self.wm_attributes("-topmost", True)
+        self.wm_attributes("-alpha", 0.35)
+        self.geometry(f"{desktop['width']}x{desktop['height']}+{desktop['left']}+{desktop['top']}")
+
+        self.canvas = tk.Canvas(self, bg="black", highlightthickness=0, cursor="crosshair")
+        self.canvas.pack(fill="both", expand=True)
+        self.canvas.create_text(desktop['width'] / 2, 40, text=text, fill="white", font=("Segoe UI", 16, "bold"))
+
+        self.canvas.bind("<ButtonPress-1>", self._on_press)
+        self.canvas.bind("<B1-Motion>", self._on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self._on_release)
+        self.bind("<Escape>", self._on_escape)
+
+        self.focus_force()
+        self.grab_set()
+
+    def _on_press(self, event):
+        self._start = (event.x, event.y)
+        if self._rect_id:
+            self.canvas.delete(self._rect_id)
+        self._rect_id = self.canvas.create_rectangle(event.x, event.y, event.x, event.y,
+                                                     outline=theme["primary"], width=3)
+
+    def _on_drag(self, event):
+        if self._start and self._rect_id:
+            self.canvas.coords(self._rect_id, self._start[0], self._start[1], event.x, event.y)
+
+    def _on_release(self, event):
+        if not self._start:
+            return
+        x0, y0 = self._start
+        left, top = min(x0, event.x), min(y0, event.y)
+        width, height = abs(event.x - x0), abs(event.y - y0)
+        self._start = None
+        if width < MIN_REGION_SIZE or height < MIN_REGION_SIZE:
+            # Clique sem arrasto: continua esperando uma região.
+            if self._rect_id:
+                self.canvas.delete(self._rect_id)
+                self._rect_id = None
+            return
+
+        region = even_region(self.desktop['left'] + left, self.desktop['top'] + top, width, height)
+        self.destroy()
+        self.on_selected(region)
+
+    def _on_escape(self, _event=None):
+        self.destroy()
+        if self.on_cancel:
+            self.on_cancel()
@@ -3,8 +3,10 @@ from tkinter import Toplevel, filedialog, messagebox, ttk
 import os
 from tkinter import font as tkfont
 
-from src.config.settings import save_app_config
-from src.core.presets import PRESET_DISPLAY_NAMES, PRESET_OPTIONS_ORDER
+from src.config.settings import save_app_config, save_replay_enabled, save_audio_mode
+from src.core.audio import AUDIO_MODE_MIX, AUDIO_MODE_SEPARATE, DEFAULT_AUDIO_MODE
+from src.core.calibration import calibration_runner, estimate_preset
+from src.core.presets import PRESET_DISPLAY_NAMES, PRESET_OPTIONS_ORDER, calibration_targets, get_resolved_preset
 
 COR_FUNDO_JANELA = "#f0f5f0"
 COR_TEXTO_PRINCIPAL = "#005a36"
@@ -18,7 +20,7 @@ class SettingsWindow(Toplevel):
         self.is_first_run = is_first_run
 
         self.title("Configurações do Sentinela Guará")
-        self.geometry("520x550")
+        self.geometry("520x685")
         self.configure(bg=COR_FUNDO_JANELA)
         self.resizable(False, False)
         self.transient(parent)
@@ -44,11 +46,23 @@ class SettingsWindow(Toplevel):
         # Mapeia o valor salvo (e.g., 'high') para o índice da lista de exibição
         current_quality_index = PRESET_OPTIONS_ORDER.index(self.quality_var.get())
 
-        self.quality_combo = ttk.Combobox(main_frame, values=PRESET_DISPLAY_NAMES, state="readonly", width=40)
-        self.quality_combo.grid(row=current_row, column=0, columnspan=3, sticky="ew", pady=(0, 15))
+        self.quality_combo = ttk.Combobox(main_frame, values=self._quality_display_names(), state="readonly", width=40)
+        self.quality_combo.grid(row=current_row, column=0, columnspan=3, sticky="ew", pady=(0, 5))
         self.quality_combo.current(current_quality_index)
         current_row += 1
 
+        # --- Calibration ---
+        calibration_frame = tk.Frame(main_frame, bg=COR_FUNDO_JANELA)
+        calibration_frame.grid(row=current_row, column=0, columnspan=3, sticky="ew", pady=(0, 15))
+        current_row += 1
+        self.calibrate_button = tk.Button(calibration_frame, text="Calibrar desempenho", command=self.start_calibration, font=("Segoe UI", 9))
+        self.calibrate_button.pack(side="left")
+        self.calibration_status_var = tk.StringVar(value=self._calibration_status())
+        tk.Label(calibration_frame, textvariable=self.calibration_status_var, font=("Segoe UI", 9), bg=COR_FUNDO_JANELA, fg=COR_TEXTO_SECUNDARIO).pack(side="left", padx=10)
+        if calibration_runner.is_running:
+            self.calibrate_button.config(state="disabled")
+            self.after(500, self._poll_calibration)
+
         ttk.Separator(main_frame, orient='horizontal').grid(row=current_row, column=0, columnspan=3, sticky='ew', pady=15)
         current_row += 1
 
@@ -68,6 +82,16 @@ class SettingsWindow(Toplevel):
 
         ttk.Checkbutton(audio_frame, text="Gravar Microfone", variable=self.record_mic_var, style="TCheckbutton").pack(anchor="w")
         ttk.Checkbutton(audio_frame, text="Gravar Áudio do Sistema (Loopback)", variable=self.record_system_audio_var, style="TCheckbutton").pack(anchor="w")
+        # Com as duas fontes ativas: uma faixa mixada (padrão) ou uma faixa por fonte.
+        self.separate_tracks_var = tk.BooleanVar(value=self.app_config.get("AudioMode", DEFAULT_AUDIO_MODE) == AUDIO_MODE_SEPARATE)
+        ttk.Checkbutton(audio_frame, text="Faixas separadas (microfone e sistema)", variable=self.separate_tracks_var, style="TCheckbutton").pack(anchor="w")
+
+        # --- Replay ---
+        self.replay_enabled_var = tk.BooleanVar(value=self.app_config.get("ReplayEnabled", False))
+        replay_seconds = self.app_config.get("ReplaySeconds", 30)
+        ttk.Checkbutton(main_frame, text=f"Replay instantâneo (manter os últimos {replay_seconds:g}s em memória)",
+                        variable=self.replay_enabled_var, style="TCheckbutton").grid(row=current_row, column=0, columnspan=3, sticky="w", pady=(10, 0))
+        current_row += 1
 
         ttk.Separator(main_frame, orient='horizontal').grid(row=current_row, column=0, columnspan=3, sticky='ew', pady=15)
         current_row += 1
@@ -84,6 +108,10 @@ class SettingsWindow(Toplevel):
         self.record_hotkey_var = tk.StringVar(value=self.app_config.get("RecordHotkey", "F10"))
         tk.Entry(main_frame, textvariable=self.record_hotkey_var, state="readonly", width=20).grid(row=current_row, column=1, sticky="ew", padx=5)
         current_row += 1
+        tk.Label(main_frame, text="Salvar Replay:", font=("Segoe UI", 10), bg=COR_FUNDO_JANELA, fg=COR_TEXTO_SECUNDARIO).grid(row=current_row, column=0, sticky="w", pady=(0, 5))
+        self.replay_hotkey_var = tk.StringVar(value=self.app_config.get("ReplayHotkey", "F8"))
+        tk.Entry(main_frame, textvariable=self.replay_hotkey_var, state="readonly", width=20).grid(row=current_row, column=1, sticky="ew", padx=5)
+        current_row += 1
         ttk.Separator(main_frame, orient='horizontal').grid(row=current_row, column=0, columnspan=3, sticky='ew', pady=15)
         current_row += 1
         tk.Label(main_frame, text="Pasta Padrão", font=title_font, bg=COR_FUNDO_JANELA, fg=COR_TEXTO_PRINCIPAL).grid(row=current_row, column=0, sticky="w", pady=(0, 5))
@@ -103,6 +131,38 @@ class SettingsWindow(Toplevel):
         tk.Button(buttons_frame, text="Fechar", command=self.destroy, font=("Segoe UI", 10)).pack(side="left", padx=10)
         main_frame.columnconfigure(1, weight=1)
 
+    def _quality_display_names(self):
+        """Nomes dos presets com a carga de CPU e o bitrate estimados pela calibração, quando houver."""
+        names = []
+        for key, name in zip(PRESET_OPTIONS_ORDER, PRESET_DISPLAY_NAMES):
+            estimate = estimate_preset(get_resolved_preset(key))
+            names.append(f"{name} — {estimate.describe()}" if estimate else name)
+        return names
+
+    def _calibration_status(self):
+        if calibration_runner.is_running or calibration_runner.progress:
+            return calibration_runner.progress
+        if any(estimate_preset(get_resolved_preset(key)) for key in PRESET_OPTIONS_ORDER):
+            return "Estimativas medidas nesta máquina."
+        return "Ainda não calibrado."
+
+    def start_calibration(self):
+        calibration_runner.start(calibration_targets())
+        self.calibrate_button.config(state="disabled")
+        self._poll_calibration()
+
+    def _poll_calibration(self):
+        if not self.winfo_exists():
+            return
+        self.calibration_status_var.set(calibration_runner.progress)
+        if calibration_runner.is_running:
+            self.after(500, self._poll_calibration)
+            return
+        self.calibrate_button.config(state="normal")
+        selected_index = self.quality_combo.current()
+        self.quality_combo.config(values=self._quality_display_names())
+        self.quality_combo.current(selected_index)
+
     def browse_save_path(self):
         new_path = filedialog.askdirectory(initialdir=self.save_path_var.get(), parent=self)
         if new_path:
@@ -142,6 +202,11 @@ class SettingsWindow(Toplevel):
             new_record_system_audio
         )
 
+        new_replay_enabled = self.replay_enabled_var.get()
+        save_replay_enabled(config_parser_obj, new_replay_enabled)
+        new_audio_mode = AUDIO_MODE_SEPARATE if self.separate_tracks_var.get() else AUDIO_MODE_MIX
+        save_audio_mode(config_parser_obj, new_audio_mode)
+
         # Update the live app_config dictionary
         self.app_config["DefaultSaveLocation"] = new_save_path
         self.app_config["RecordingQuality"] = new_quality_key
@@ -149,6 +214,8 @@ class SettingsWindow(Toplevel):
         self.app_config["RecordSystemAudio"] = new_record_system_audio
         self.app_config["CaptureHotkey"] = new_capture_hotkey
         self.app_config["RecordHotkey"] = new_record_hotkey
+        self.app_config["ReplayEnabled"] = new_replay_enabled
+        self.app_config["AudioMode"] = new_audio_mode
         self.app_config["HasRunBefore"] = True
 
         if self.on_close_callback:
@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+
+import numpy as np
+from PIL import Image, ImageTk
+
+# O ruído é um tile aleatório repetido pelo quadro; a cada tick o quadro também é
+# deslocado por um offset aleatório dentro de um tile, e um anel curto nunca parece repetido.
+NOISE_TILE = 128
+NOISE_LEVEL = 35  # cinza mais claro da estática (0-255)
+NOISE_FRAMES = 4
+# O Tk guarda uma foto em RGBA de 32 bits: o anel de um tamanho fica limitado a este
+# orçamento (um anel 4K tem 2 quadros, um 1080p os NOISE_FRAMES inteiros).
+NOISE_CACHE_MEGABYTES = 96
+
+# Intervalo dos ticks; ele aumenta enquanto o loop do Tk atrasa e volta quando o loop se recupera.
+NOISE_INTERVAL_MS = 100
+NOISE_MAX_INTERVAL_MS = 500
+
+
+class NoiseFrames:
+    """Anel de quadros de ruído pré-renderizados para um tamanho de overlay."""
+    def __init__(self, size):
+        self.width, self.height = size
+        frame_bytes = (self.width + NOISE_TILE) * (self.height + NOISE_TILE) * 4
+        self.count = max(2, min(NOISE_FRAMES, NOISE_CACHE_MEGABYTES * 1024 * 1024 // frame_bytes))
+        self._images = []
+        self._photos = []
+        self.ready = threading.Event()
+
+    def render(self):
+        """Renderiza o anel (em segundo plano): um tile por quadro, repetido com o NumPy."""
+        rng = np.random.default_rng()
+        rows = -(-(self.height + NOISE_TILE) // NOISE_TILE)
+        cols = -(-(self.width + NOISE_TILE) // NOISE_TILE)
+        try:
+            for _ in range(self.count):
+                tile = rng.integers(0, NOISE_LEVEL, (NOISE_TILE, NOISE_TILE), dtype=np.uint8)
+                frame = np.tile(tile, (rows, cols))[:self.height + NOISE_TILE, :self.width + NOISE_TILE]
+                self._images.append(Image.fromarray(frame, 'L'))
+        except Exception as e:
+            logging.error(f"Não foi possível gerar o ruído das telas inativas: {e}")
+            self._images = []
+        self.ready.set()
+
+    def photo(self, index):
+        """
+        PhotoImage do quadro `index` (thread do Tk), ou None enquanto o anel é renderizado.
+        Cada quadro é convertido na primeira vez em que aparece; a cópia do PIL é descartada aí.
+        """
+        if not self.ready.is_set() or not self._images and not self._photos:
+            return None
+        index %= self.count
+        if index < len(self._photos):
+            return self._photos[index]
+        if not self._images:
+            return None
+        photo = ImageTk.PhotoImage(self._images.pop(0))
+        self._photos.append(photo)
+        return photo
+
+
+class StaticNoiseAnimator:
+    """
+    Anima a estática de todos os overlays inativos com um único timer do Tk,
+    alternando entre quadros guardados em vez de montar uma imagem por tick.
+    Os anéis ficam guardados por tamanho durante toda a sessão, então o
+    próximo modo de preparação já os encontra prontos.
+    """
+    def __init__(self, root):
+        self.root = root
+        self._rings = {}  # (largura, altura) -> NoiseFrames
+        self._canvases = {}  # canvas -> (item da imagem, tamanho)
+        self._after_id = None
+        self._tick_count = 0
+        self._interval = NOISE_INTERVAL_MS
+        self._due = 0.0
+        self._paused = False
+        self._rng = np.random.default_rng()
+
+    def prepare(self, size):
+        """Começa a renderizar em segundo plano o anel de `size`, se ele ainda não estiver guardado."""
+        size = (int(size[0]), int(size[1]))
+        if size not in self._rings:
+            ring = self._rings[size] = NoiseFrames(size)
+            threading.Thread(target=ring.render, name="RuidoOverlay", daemon=True).start()
+        return self._rings[size]
+
+    def add(self, canvas, image_item, size):
+        self.prepare(size)
+        self._canvases[canvas] = (image_item, (int(size[0]), int(size[1])))
+        self._schedule(10)
+
+    def remove(self, canvas):
+        self._canvases.pop(canvas, None)
+        if not self._canvases:
+            self._cancel()
+
+    def pause(self):
+        """Para a animação (durante uma gravação); os quadros continuam guardados."""
+        self._paused = True
+        self._cancel()
+
+    def resume(self):
+        self._paused = False
+        if self._canvases:
+            self._schedule(10)
+
+    def _schedule(self, delay_ms):
+        if self._after_id is None and not self._paused:
+            self._due = time.perf_counter() + delay_ms / 1000
+            self._after_id = self.root.after(delay_ms, self._tick)
+
+    def _cancel(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _tick(self):
+        self._after_id = None
+        if self._paused or not self._canvases:
+            return
+
+        # Um tick que dispara bem depois da hora indica o loop do Tk ocupado: desacelera.
+        late = time.perf_counter() - self._due
+        if late > self._interval / 2000:
+            self._interval = min(NOISE_MAX_INTERVAL_MS, int(self._interval * 1.5))
+        elif self._interval > NOISE_INTERVAL_MS:
+            self._interval = max(NOISE_INTERVAL_MS, int(self._interval * 0.9))
+
+        dx, dy = (int(v) for v in self._rng.integers(0, NOISE_TILE, 2))
+        for canvas, (image_item, size) in list(self._canvases.items()):
+            try:
+                photo = self._rings[size].photo(self._tick_count)
+                if photo is not None:
+                    canvas.itemconfig(image_item, image=photo)
+                    canvas.coords(image_item, -dx, -dy)
+            except Exception:
+                # O overlay foi destruído sem ser removido.
+                self._canvases.pop(canvas, None)
+        self._tick_count += 1
+        self._schedule(self._interval)
+
+
+_animator = None
+
+
+def noise_animator(root) -> StaticNoiseAnimator:
+    """O animador do aplicativo (um por raiz do Tk), criado no primeiro uso."""
+    global _animator
+    if _animator is None or _animator.root is not root:
+        _animator = StaticNoiseAnimator(root)
+    return _animator
@@ -2,7 +2,7 @@
 import sys
 import os
 import logging
-from screeninfo import get_monitors
+from functools import lru_cache
 
 def resource_path(relative_path: str) -> str:
     """ Obtém o caminho absoluto para um recurso, funcionando para dev e para o PyInstaller. """
@@ -16,18 +16,13 @@ def resource_path(relative_path: str) -> str:
     return os.path.join(base_path, relative_path)
 
 def get_primary_monitor_resolution():
-    """Retorna a resolução (largura, altura) do monitor primário."""
-    try:
-        primary_monitor = next(m for m in get_monitors() if m.is_primary)
-        return (primary_monitor.width, primary_monitor.height)
-    except StopIteration:
-        # Fallback se nenhum monitor for marcado como primário
-        logging.warning("Nenhum monitor primário detectado. Usando o primeiro monitor da lista.")
-        if get_monitors():
-            monitor = get_monitors()[0]
-            return (monitor.width, monitor.height)
-        return (1920, 1080) # Fallback absoluto
+    """Retorna a resolução (largura, altura) do monitor primário, da topologia de monitores em cache."""
+    from src.core.monitors import topology  # importado aqui: traz o backend de captura
+
+    primary = topology.primary()
+    return (primary['width'], primary['height'])
 
+@lru_cache(maxsize=None)
 def get_primary_monitor_refresh_rate():
     """
     Tenta obter a taxa de atualização do monitor primário.
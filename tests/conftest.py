@@ -0,0 +1,44 @@
+import os
+import sys
+from fractions import Fraction
+
+import av
+import pytest
+from av.video.frame import PictureType
+
+# Os testes importam `src.*` como o aplicativo (rodando a partir da raiz do repositório).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.synthetic import SyntheticScreen  # noqa: E402
+
+TIME_BASE = Fraction(1, 1000)
+FPS = 10
+
+
+class SyntheticVideo:
+    """Encoder H.264 pequeno alimentado pela tela sintética, com PTS em milissegundos."""
+    def __init__(self, width, height, gop=100):
+        self.encoder = av.CodecContext.create("libx264", "w")
+        self.encoder.width = width
+        self.encoder.height = height
+        self.encoder.pix_fmt = "yuv420p"
+        self.encoder.time_base = TIME_BASE
+        self.encoder.framerate = Fraction(FPS, 1)
+        self.encoder.gop_size = gop
+        self.encoder.options = {"preset": "ultrafast", "tune": "zerolatency"}
+        self.screen = SyntheticScreen(width, height)
+
+    def encode(self, index, keyframe=False):
+        frame = av.VideoFrame.from_ndarray(self.screen.frame(index), format="bgra").reformat(format="yuv420p")
+        frame.pts = index * 1000 // FPS
+        frame.time_base = TIME_BASE
+        frame.pict_type = PictureType.I if keyframe else PictureType.NONE
+        return list(self.encoder.encode(frame))
+
+    def flush(self):
+        return list(self.encoder.encode(None))
+
+
+@pytest.fixture
+def synthetic_video():
+    return SyntheticVideo
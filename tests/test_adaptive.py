@@ -0,0 +1,32 @@
+from src.core.adaptive import AdaptiveQualityController, build_quality_ladder, X264_SPEED_LADDER
+from src.core.presets import VideoSettings
+
+VIDEO = VideoSettings(codec="libx264", resolution=(1280, 720), fps=30, crf=23, preset="medium")
+
+
+def test_ladder_order():
+    levels = build_quality_ladder(VIDEO)
+    assert [level.speed for level in levels[:len(X264_SPEED_LADDER)]] == X264_SPEED_LADDER
+    fps = [level.fps for level in levels]
+    assert fps == sorted(fps, reverse=True)
+    # A resolução só cai depois do menor fps.
+    reduced = [level for level in levels if level.resolution != VIDEO.resolution]
+    assert reduced and all(level.fps == levels[-1].fps for level in reduced)
+    assert all(width % 2 == 0 and height % 2 == 0 for width, height in (level.resolution for level in levels))
+
+
+def test_ladder_without_resolution_steps_keeps_the_size():
+    levels = build_quality_ladder(VIDEO, resolution_steps=False)
+    assert {level.resolution for level in levels} == {VIDEO.resolution}
+    assert levels == [level for level in build_quality_ladder(VIDEO) if level.resolution == VIDEO.resolution]
+
+
+def test_controller_stops_at_the_lowest_fps_without_resolution_steps():
+    controller = AdaptiveQualityController(VIDEO, 0.0, resolution_steps=False)
+    now = 0.0
+    # Cada quadro leva o dobro do intervalo: o controlador desce até o último degrau.
+    for _ in range(2000):
+        now += 0.1
+        controller.observe(2 / controller.level.fps, 0, 4, now)
+    assert controller.level == controller.levels[-1]
+    assert controller.level.resolution == VIDEO.resolution
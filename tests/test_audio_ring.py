@@ -0,0 +1,72 @@
+import threading
+import time
+
+import numpy as np
+
+from src.core.audio import AudioRingBuffer, AUDIO_OVERFLOW_BLOCK, AUDIO_OVERFLOW_DROP_OLDEST
+from src.core.presets import AudioSettings
+
+# Anel de 100 amostras mono: 1 s a 100 Hz.
+SETTINGS = AudioSettings("aac", 64000, channels=1, samplerate=100)
+
+
+def block(start, frames):
+    return np.arange(start, start + frames, dtype=np.float32).reshape(-1, 1)
+
+
+def test_ring_reads_what_was_written_across_the_wrap():
+    ring = AudioRingBuffer(1, SETTINGS, seconds=1)
+    out = np.empty((60, 1), dtype=np.float32)
+    ring.put((0, 0.6, block(0, 60)))
+    assert ring.read(0, out) == 0
+    ring.put((0, 1.2, block(60, 60)))
+    assert ring.read(0, out) == 60
+    np.testing.assert_array_equal(out, block(60, 60))
+    assert ring.read(0, out) is None
+
+
+def test_drop_oldest_keeps_the_newest_samples():
+    ring = AudioRingBuffer(1, SETTINGS, seconds=1, overflow=AUDIO_OVERFLOW_DROP_OLDEST)
+    for index in range(3):
+        assert ring.put((0, (index + 1) * 0.5, block(index * 50, 50)))
+
+    assert ring.overruns == 1
+    assert ring.overrun_samples == 50
+    assert ring.available(0) == 100
+    out = np.empty((100, 1), dtype=np.float32)
+    # A posição devolvida pula as amostras descartadas, então o PTS continua certo.
+    assert ring.read(0, out) == 50
+    np.testing.assert_array_equal(out, block(50, 100))
+
+
+def test_block_waits_for_the_reader():
+    ring = AudioRingBuffer(1, SETTINGS, seconds=1, overflow=AUDIO_OVERFLOW_BLOCK)
+    ring.put((0, 0.8, block(0, 80)))
+    writer = threading.Thread(target=ring.put, args=((0, 1.3, block(80, 50)),))
+    writer.start()
+    time.sleep(0.2)
+    assert writer.is_alive()
+
+    out = np.empty((40, 1), dtype=np.float32)
+    assert ring.read(0, out) == 0
+    writer.join(2)
+    assert not writer.is_alive()
+    assert ring.overruns == 1
+    assert ring.overrun_samples == 0
+
+    rest = np.empty((90, 1), dtype=np.float32)
+    assert ring.read(0, rest) == 40
+    np.testing.assert_array_equal(rest, block(40, 90))
+
+
+def test_block_gives_up_when_closed():
+    ring = AudioRingBuffer(1, SETTINGS, seconds=1, overflow=AUDIO_OVERFLOW_BLOCK)
+    ring.put((0, 1.0, block(0, 100)))
+    results = []
+    writer = threading.Thread(target=lambda: results.append(ring.put((0, 1.5, block(100, 50)))))
+    writer.start()
+    time.sleep(0.1)
+    ring.close()
+    writer.join(2)
+    assert results == [False]
+    assert not ring.put((0, 2.0, block(150, 10)))
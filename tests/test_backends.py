@@ -0,0 +1,42 @@
+import enum
+import logging
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.core.backends import X11ShmBackend
+
+
+class ShmStatus(enum.Enum):
+    """Os estados do `mss.linux.xshmgetimage.ShmStatus`."""
+    UNKNOWN = enum.auto()
+    AVAILABLE = enum.auto()
+    UNAVAILABLE = enum.auto()
+
+
+def backend_with(status, notes):
+    """Um X11ShmBackend sobre um mss fictício (a implementação X11 do mss guarda o `shm_status`)."""
+    shot = SimpleNamespace(raw=bytes(2 * 2 * 4), width=2, height=2)
+    sct = SimpleNamespace(_impl=SimpleNamespace(shm_status=status), performance_status=notes,
+                          grab=lambda region: shot)
+    backend = X11ShmBackend.__new__(X11ShmBackend)
+    backend._sct = sct
+    backend._checked = False
+    return backend
+
+
+@pytest.mark.parametrize("status, notes, level", [
+    (ShmStatus.AVAILABLE, ["MIT-SHM is working correctly."], logging.INFO),
+    (ShmStatus.UNAVAILABLE, ["MIT-SHM GetImage failed; falling back to XGetImage."], logging.WARNING),
+])
+def test_shm_notes_are_warnings_only_on_fallback(caplog, status, notes, level):
+    backend = backend_with(status, notes)
+    caplog.set_level(logging.DEBUG)
+    image = backend.grab({'left': 0, 'top': 0, 'width': 2, 'height': 2})
+    assert isinstance(image, np.ndarray)
+    assert [(record.levelno, record.getMessage()) for record in caplog.records] == [(level, f"Captura X11: {notes[0]}")]
+
+    caplog.clear()
+    backend.grab({'left': 0, 'top': 0, 'width': 2, 'height': 2})
+    assert not caplog.records
@@ -0,0 +1,42 @@
+import av
+import numpy as np
+
+from src.core.buffers import FrameBufferPool
+
+
+def test_frame_pool_reuses_released_buffers():
+    pool = FrameBufferPool((4, 4, 3), count=2)
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.acquire()
+    pool.acquire()  # o pool esgotou e cresceu
+    assert pool.capacity == 3
+    assert pool.bytes_allocated == pool.frame_nbytes
+
+
+def test_frame_pool_ignores_foreign_buffers():
+    pool = FrameBufferPool((4, 4, 3), count=1)
+    pool.release(np.empty((2, 2, 3), dtype=np.uint8))
+    pool.acquire()
+    pool.acquire()
+    assert pool.capacity == 2
+
+
+def test_ensure_target_counts_the_extra_copy():
+    pool = FrameBufferPool((4, 4, 3), count=1)
+    target = pool.acquire()
+    assert pool.ensure_target(target, target) is target
+    assert pool.bytes_allocated == 0
+    pool.ensure_target(target.copy(), target)
+    assert pool.bytes_allocated == target.nbytes
+
+
+def test_libav_frames_are_counted_apart():
+    pool = FrameBufferPool((4, 4, 3), count=1)
+    bgra = av.VideoFrame.from_ndarray(np.zeros((16, 32, 4), dtype=np.uint8), format="bgra")
+    yuv = bgra.reformat(format="yuv420p")
+    pool.note_libav_allocation(bgra)
+    pool.note_libav_allocation(yuv)
+    assert pool.libav_bytes_allocated >= 16 * 32 * 4 + 16 * 32 * 3 // 2
+    assert pool.bytes_allocated == 0
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from src.core.damage import DamageDetector
+
+
+def screen(height=128, width=256):
+    return np.full((height, width, 4), 40, dtype=np.uint8)
+
+
+def test_first_frame_is_all_dirty():
+    detector = DamageDetector((128, 256), tile_size=16, sample_step=2)
+    assert (detector.rows, detector.cols) == (4, 8)
+    assert detector.dirty_fraction(screen()) == 1.0
+
+
+def test_unchanged_frame_is_clean():
+    detector = DamageDetector((128, 256), tile_size=16, sample_step=2)
+    frame = screen()
+    detector.dirty_fraction(frame)
+    assert detector.dirty_fraction(frame.copy()) == 0.0
+
+
+def test_change_marks_only_its_tiles():
+    detector = DamageDetector((128, 256), tile_size=16, sample_step=2)
+    frame = screen()
+    detector.dirty_fraction(frame)
+
+    changed = frame.copy()
+    # Um tile de amostra cobre 32x32 pixels; o retângulo fica dentro de um só.
+    changed[40:50, 70:80] = 255
+    assert detector.dirty_fraction(changed) == pytest.approx(1 / 32)
+
+    # Atravessando a fronteira de tiles (x = 96 e y = 64), o mesmo tamanho suja quatro.
+    moved = frame.copy()
+    moved[60:70, 92:100] = 255
+    assert detector.dirty_fraction(moved) == pytest.approx(4 / 32)
+
+
+def test_only_the_alpha_channel_counts_too():
+    detector = DamageDetector((128, 256), tile_size=16, sample_step=1)
+    frame = screen()
+    detector.dirty_fraction(frame)
+    changed = frame.copy()
+    changed[0, 0, 3] = 0
+    assert detector.dirty_fraction(changed) == pytest.approx(1 / detector.total_tiles)
+
+
+def test_sizes_that_are_not_tile_multiples():
+    detector = DamageDetector((100, 150), tile_size=16, sample_step=2)
+    frame = screen(100, 150)
+    detector.dirty_fraction(frame)
+    changed = frame.copy()
+    changed[-1, -1] = 0  # o último pixel amostrado cai na margem do último tile
+    changed[-2, -2] = 0
+    assert detector.dirty_fraction(changed) == pytest.approx(1 / detector.total_tiles)
+
+
+def test_skip_statistics():
+    detector = DamageDetector((128, 256), tile_size=16)
+    frame = screen()
+    detector.dirty_fraction(frame)
+    if detector.dirty_fraction(frame) == 0.0:
+        detector.record_skip()
+    assert detector.skip_ratio == 0.5
+    assert detector.mean_dirty_fraction == 0.5
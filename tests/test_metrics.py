@@ -0,0 +1,53 @@
+import pytest
+
+from src.core.metrics import LatencyHistogram, HISTOGRAM_BUCKETS_PER_DECADE, HISTOGRAM_MAX_SECONDS
+
+# Os percentis saem com o limite superior do balde: até um balde (~12%) acima do valor real.
+BUCKET_ERROR = 10 ** (1 / HISTOGRAM_BUCKETS_PER_DECADE)
+
+
+def test_empty_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) == 0.0
+    assert histogram.to_dict()["mean_ms"] == 0.0
+
+
+def test_percentiles_of_a_uniform_distribution():
+    histogram = LatencyHistogram()
+    samples = [i / 1000 for i in range(1, 101)]  # 1 a 100 ms
+    for seconds in samples:
+        histogram.record(seconds)
+
+    for q, expected in ((50, 0.050), (95, 0.095), (99, 0.099)):
+        value = histogram.percentile(q)
+        assert expected <= value <= expected * BUCKET_ERROR
+    assert histogram.percentile(100) == pytest.approx(0.100)
+    assert histogram.max == pytest.approx(0.100)
+    assert histogram.to_dict()["mean_ms"] == pytest.approx(50.5)
+
+
+def test_percentiles_find_the_slow_tail():
+    histogram = LatencyHistogram()
+    for _ in range(98):
+        histogram.record(0.002)
+    histogram.record(0.250)
+    histogram.record(0.300)
+
+    assert histogram.percentile(50) <= 0.002 * BUCKET_ERROR
+    assert histogram.percentile(99) >= 0.250
+    assert histogram.percentile(99) <= 0.250 * BUCKET_ERROR
+
+
+def test_percentile_never_exceeds_the_maximum():
+    histogram = LatencyHistogram()
+    histogram.record(0.0101)
+    assert histogram.percentile(50) == pytest.approx(0.0101)
+
+
+def test_extremes_go_to_the_edge_buckets():
+    histogram = LatencyHistogram()
+    histogram.record(0.0)
+    histogram.record(HISTOGRAM_MAX_SECONDS * 10)
+    assert histogram.counts[0] == 1
+    assert histogram.counts[-1] == 1
+    assert histogram.percentile(100) == HISTOGRAM_MAX_SECONDS * 10
@@ -0,0 +1,45 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from src.core import monitors
+from src.core.backends import SyntheticBackend
+
+# Duas telas lado a lado, na ordem do backend; a primária é a segunda.
+SCREENS = ((1920, 1080), (2560, 1440))
+
+
+def screeninfo_reporting(*entries):
+    """Um módulo `screeninfo` que lista os monitores (x, y, largura, altura, primário)."""
+    listed = [SimpleNamespace(x=x, y=y, width=w, height=h, is_primary=p) for x, y, w, h, p in entries]
+    return SimpleNamespace(get_monitors=lambda: listed)
+
+
+@pytest.fixture
+def topology(monkeypatch):
+    monkeypatch.setattr(monitors, "create_backend", lambda name: SyntheticBackend(SCREENS))
+    return monitors.MonitorTopology()
+
+
+def test_primary_comes_from_the_system(topology, monkeypatch):
+    monkeypatch.setitem(sys.modules, "screeninfo", screeninfo_reporting(
+        (0, 0, 1920, 1080, False), (1920, 0, 2560, 1440, True)))
+    assert (topology.primary()['width'], topology.primary()['id']) == (2560, 1)
+    assert [screen['is_primary'] for screen in topology.screens()] == [False, True]
+
+
+def test_primary_matches_by_origin_when_sizes_differ(topology, monkeypatch):
+    # Com escala de DPI, o sistema pode informar um tamanho diferente do capturado.
+    monkeypatch.setitem(sys.modules, "screeninfo", screeninfo_reporting((1920, 0, 1707, 960, True)))
+    assert topology.primary()['id'] == 1
+
+
+@pytest.mark.parametrize("reported", [
+    screeninfo_reporting((0, 0, 1920, 1080, None), (1920, 0, 2560, 1440, None)),
+    None,  # screeninfo ausente
+])
+def test_falls_back_to_the_first_screen_with_a_warning(topology, monkeypatch, caplog, reported):
+    monkeypatch.setitem(sys.modules, "screeninfo", reported)
+    assert topology.primary()['id'] == 0
+    assert "Nenhum monitor primário detectado" in caplog.text
@@ -0,0 +1,207 @@
+import os
+import threading
+import time
+
+import av
+import numpy as np
+import pytest
+
+from src.core.audio import AudioRingBuffer, CHUNK_FRAMES
+from src.core.backends import SyntheticBackend, BACKEND_SYNTHETIC, register_backend
+from src.core.benchmark import bench_preset
+from src.core.buffers import FrameBufferPool
+from src.core.clock import MediaClock
+from src.core.pipeline import CapturedFrame, FrameQueue, RecordingPipeline, CONVERSION_OPENCV, CONVERSION_SWSCALE
+from src.core.segments import FORMAT_FRAGMENTED, FORMAT_STANDARD
+from src.core.synthetic import SyntheticAudio
+
+SIZE = (320, 180)
+MONITOR = {'left': 0, 'top': 0, 'width': SIZE[0], 'height': SIZE[1]}
+
+
+@register_backend
+class StaticBackend(SyntheticBackend):
+    """Tela sintética parada: depois da primeira, toda captura é igual."""
+    name = "teste-estatico"
+
+    def grab(self, region):
+        self._index = 0
+        return super().grab(region)
+
+
+def record(tmp_path, seconds, backend=BACKEND_SYNTHETIC, output_format=FORMAT_FRAGMENTED, **kwargs):
+    """Grava `seconds` segundos com o preset balanceado (libx264 com B-frames) e áudio sintético."""
+    preset = bench_preset("balanced", SIZE)
+    clock = MediaClock()
+    stop_event = threading.Event()
+    audio_ring = AudioRingBuffer(1, preset.audio)
+    kwargs.setdefault("adaptive_quality", False)
+    pipeline = RecordingPipeline(
+        preset, MONITOR, str(tmp_path / f"gravacao{preset.container}"), stop_event,
+        audio_queue=audio_ring, clock=clock, capture_backend=backend, output_format=output_format, **kwargs,
+    )
+    tone = SyntheticAudio(preset.audio, audio_ring, stop_event, clock, chunk_frames=CHUNK_FRAMES)
+    timer = threading.Timer(seconds, stop_event.set)
+    tone.start()
+    timer.start()
+    try:
+        pipeline.run()
+    finally:
+        stop_event.set()
+        timer.cancel()
+        tone.join()
+    return pipeline
+
+
+def first_timestamps(path):
+    """Instante do primeiro quadro de vídeo decodificado e do primeiro pacote de áudio."""
+    with av.open(path) as container:
+        video = next(frame.time for frame in container.decode(container.streams.video[0]))
+    with av.open(path) as container:
+        audio = next(float(packet.pts * packet.time_base)
+                     for packet in container.demux(container.streams.audio[0]) if packet.pts is not None)
+    return video, audio
+
+
+# O MP4 comum guarda, pela lista de edição, a espera até a primeira captura (alguns
+# milissegundos); o fragmentado começa cada faixa no zero.
+START_TOLERANCE = {FORMAT_FRAGMENTED: 0.005, FORMAT_STANDARD: 0.1}
+
+
+@pytest.mark.parametrize("output_format", [FORMAT_FRAGMENTED, FORMAT_STANDARD])
+@pytest.mark.parametrize("backend", [BACKEND_SYNTHETIC, StaticBackend.name], ids=["movimento", "parada"])
+def test_video_and_audio_start_together(tmp_path, backend, output_format):
+    pipeline = record(tmp_path, 2.0, backend, output_format)
+    path = pipeline.summary.output_files[0]
+    assert os.path.exists(path)
+
+    # Sem lista de edição no MP4 fragmentado, os B-frames atrasavam o vídeo em dois
+    # quadros (tela em movimento) ou em segundos (tela parada, quadros esparsos).
+    video, audio = first_timestamps(path)
+    assert video < START_TOLERANCE[output_format]
+    assert audio < START_TOLERANCE[output_format]
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        last = max(frame.time for frame in container.decode(stream))
+    assert last < pipeline.summary.duration + 1 / pipeline.preset.video.fps
+
+
+def screens():
+    """Duas telas diferentes; a segunda fica parada depois da mudança."""
+    before = np.full((SIZE[1], SIZE[0], 4), 40, dtype=np.uint8)
+    after = before.copy()
+    after[10:20, 10:20] = 255
+    return before, after
+
+
+def grab_step(pipeline, queue, image, captured_at, last_sent_at):
+    """O que o laço da captura faz com um quadro: pula se não mudou, senão envia."""
+    frame = CapturedFrame(0, image, None, captured_at, region=MONITOR)
+    if pipeline._is_unchanged(frame, None, last_sent_at):
+        return "pulado", last_sent_at
+    dropped = pipeline.grab_stats.dropped
+    pipeline._send(frame, queue)
+    if pipeline.grab_stats.dropped > dropped:
+        return "descartado", last_sent_at
+    return "enviado", captured_at
+
+
+@pytest.fixture
+def idle_pipeline(tmp_path):
+    return RecordingPipeline(bench_preset("balanced", SIZE), MONITOR, str(tmp_path / "gravacao.mp4"),
+                             threading.Event(), keepalive=1.0)
+
+
+def test_change_dropped_at_the_convert_queue_is_sent_again(idle_pipeline):
+    before, after = screens()
+    queue = FrameQueue(1)
+
+    assert grab_step(idle_pipeline, queue, before, 0.0, None) == ("enviado", 0.0)
+    # A fila está cheia: o quadro com a mudança é descartado.
+    assert grab_step(idle_pipeline, queue, after, 0.1, 0.0) == ("descartado", 0.0)
+    queue.get()
+    # A tela não mudou de novo, mas a mudança ainda não chegou ao arquivo.
+    assert grab_step(idle_pipeline, queue, after.copy(), 0.2, 0.0) == ("enviado", 0.2)
+    queue.get()
+    assert grab_step(idle_pipeline, queue, after.copy(), 0.3, 0.2) == ("pulado", 0.2)
+
+
+def test_change_dropped_after_conversion_is_sent_again(idle_pipeline):
+    before, after = screens()
+    queue = FrameQueue(4)
+
+    grab_step(idle_pipeline, queue, before, 0.0, None)
+    assert grab_step(idle_pipeline, queue, after, 0.1, 0.0) == ("enviado", 0.1)
+    # A fila entre a conversão e o encoder descarta o quadro convertido.
+    idle_pipeline.buffer_pool = FrameBufferPool((SIZE[1], SIZE[0], 3), count=1)
+    idle_pipeline._on_converted_frame_dropped(CapturedFrame(0, idle_pipeline.buffer_pool.acquire()))
+    assert grab_step(idle_pipeline, queue, after.copy(), 0.2, 0.1) == ("enviado", 0.2)
+    assert grab_step(idle_pipeline, queue, after.copy(), 0.3, 0.2) == ("pulado", 0.2)
+
+
+@pytest.mark.parametrize("conversion, per_frame", [
+    (CONVERSION_SWSCALE, SIZE[0] * SIZE[1] * (4 + 3 / 2)),  # BGRA de from_ndarray e yuv420p do reformat
+    (CONVERSION_OPENCV, SIZE[0] * SIZE[1] * 3),  # rgb24 de from_ndarray
+])
+def test_libav_frames_are_accounted(tmp_path, conversion, per_frame):
+    pipeline = record(tmp_path, 1.0, conversion=conversion)
+    converted = pipeline.stages[0].stats.processed
+    assert converted > 0
+    assert pipeline.buffer_pool.libav_bytes_allocated >= converted * per_frame
+
+
+@pytest.mark.parametrize("limits, resolution_steps", [
+    ({}, False),
+    ({"segment_seconds": 60}, True),
+], ids=["um_arquivo", "em_segmentos"])
+def test_resolution_steps_only_when_recording_in_segments(tmp_path, limits, resolution_steps):
+    pipeline = record(tmp_path, 0.3, adaptive_quality=True, **limits)
+    sizes = {level.resolution for level in pipeline.quality.levels}
+    assert (len(sizes) > 1) == resolution_steps
+
+
+
+@register_backend
+class StampedBackend(SyntheticBackend):
+    """Tela sintética que anota o instante de cada captura."""
+    name = "teste-carimbado"
+    grabbed_at = []
+
+    def grab(self, region):
+        self.grabbed_at.append(MediaClock.now())
+        return super().grab(region)
+
+
+def test_pipeline_opened_before_the_start_captures_from_the_first_instant(tmp_path):
+    """O fluxo de um processo por tela: abre, espera a largada e só então fixa o PTS zero."""
+    clock = MediaClock()
+    stop_event = threading.Event()
+    pipeline = RecordingPipeline(bench_preset("balanced", SIZE), MONITOR, str(tmp_path / "gravacao.mp4"), stop_event,
+                                 clock=clock, capture_backend=StampedBackend.name, adaptive_quality=False)
+    pipeline.open()
+    assert pipeline._video_encoder.is_open
+    time.sleep(0.3)  # as outras telas ainda abrindo
+
+    StampedBackend.grabbed_at.clear()
+    started_at = clock.start(clock.now() + 0.05)
+    pipeline.set_creation_time("2026-01-02T03:04:05+00:00")
+    timer = threading.Timer(1.0, stop_event.set)
+    timer.start()
+    try:
+        pipeline.run()
+    finally:
+        timer.cancel()
+
+    # Nada mais a abrir depois da largada: a primeira captura sai no PTS zero.
+    assert StampedBackend.grabbed_at[0] - started_at < 0.02
+    with av.open(pipeline.summary.output_files[0]) as container:
+        assert container.metadata['creation_time'].startswith("2026-01-02T03:04:05")
+        assert any(True for _ in container.decode(container.streams.video[0]))
+
+def test_cancel_after_open_leaves_no_files(tmp_path):
+    pipeline = RecordingPipeline(bench_preset("balanced", SIZE), MONITOR, str(tmp_path / "gravacao.mp4"),
+                                 threading.Event(), capture_backend=BACKEND_SYNTHETIC, segment_seconds=60)
+    pipeline.open()
+    pipeline.cancel()
+    assert not any(stage.is_alive() for stage in pipeline.stages)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,101 @@
+from fractions import Fraction
+
+import av
+
+from src.core.replay import ReplayBuffer
+from src.core.segments import StreamTemplate
+
+AUDIO_TIME_BASE = Fraction(1, 1000)
+AUDIO_TEMPLATE = StreamTemplate("audio", "aac", AUDIO_TIME_BASE, sample_rate=48000, layout="stereo")
+
+
+def feed(replay, synthetic_video, frames, size=(160, 120), start=0):
+    """Grava `frames` quadros a 10 fps no anel, forçando os quadros-chave que ele pede."""
+    video = synthetic_video(*size)
+    template = StreamTemplate.from_encoder(video.encoder)
+    for index in range(start, start + frames):
+        keyframe = replay.take_keyframe_request(index / 10)
+        for packet in video.encode(index, keyframe):
+            replay.append(template, packet)
+    for packet in video.flush():
+        replay.append(template, packet)
+
+
+def audio_packet(seconds):
+    packet = av.Packet(b"\0" * 64)
+    packet.pts = packet.dts = round(seconds * 1000)
+    packet.duration = 20
+    packet.time_base = AUDIO_TIME_BASE
+    return packet
+
+
+def video_of(packets):
+    return [p for p in packets if p.template.type == "video"]
+
+
+def test_window_is_trimmed_by_whole_gops(synthetic_video):
+    replay = ReplayBuffer(max_seconds=2)
+    feed(replay, synthetic_video, 60)
+
+    # Até um GOP (keyframe_interval) além da janela: o descarte nunca parte um GOP.
+    assert 2.0 <= replay.duration < 2.0 + replay.keyframe_interval
+    assert replay.evicted_packets > 0
+    video = video_of(replay.snapshot())
+    assert video[0].is_keyframe
+    assert video[0].time >= 5.9 - 2.0 - replay.keyframe_interval
+
+
+def test_snapshot_starts_at_the_keyframe_covering_the_request(synthetic_video):
+    replay = ReplayBuffer(max_seconds=5)
+    feed(replay, synthetic_video, 50)
+
+    video = video_of(replay.snapshot(seconds=1.5))
+    latest = max(p.time for p in video)
+    assert video[0].is_keyframe
+    assert 1.5 <= latest - video[0].time < 1.5 + replay.keyframe_interval
+    assert len(video_of(replay.snapshot())) > len(video)
+
+
+def test_window_is_trimmed_by_bytes(synthetic_video):
+    replay = ReplayBuffer(max_seconds=10, max_bytes=40_000)
+    feed(replay, synthetic_video, 80, size=(320, 240))
+
+    # Sem o limite de bytes, os 8 s caberiam na janela de 10 s.
+    assert replay.evicted_packets > 0
+    assert replay.size_bytes <= 40_000
+    assert replay.duration < 8.0 - replay.keyframe_interval
+    assert video_of(replay.snapshot())[0].is_keyframe
+
+
+def test_audio_before_the_first_keyframe_is_dropped(synthetic_video):
+    replay = ReplayBuffer(max_seconds=2)
+    replay.reset([AUDIO_TEMPLATE])
+    video = synthetic_video(160, 120)
+    template = StreamTemplate.from_encoder(video.encoder)
+    for index in range(40):
+        replay.append(AUDIO_TEMPLATE, audio_packet(index / 10))
+        for packet in video.encode(index, replay.take_keyframe_request(index / 10)):
+            replay.append(template, packet)
+
+    packets = replay.snapshot()
+    start = video_of(packets)[0].time
+    audio = [p for p in packets if p.template.type == "audio"]
+    assert audio
+    assert min(p.time for p in audio) >= start
+    assert [p.decode_time for p in packets] == sorted(p.decode_time for p in packets)
+
+
+def test_snapshot_after_a_resolution_change_has_one_size(tmp_path, synthetic_video):
+    replay = ReplayBuffer(max_seconds=10)
+    feed(replay, synthetic_video, 20, size=(320, 240))
+    feed(replay, synthetic_video, 20, size=(160, 120), start=20)
+
+    video = video_of(replay.snapshot())
+    assert {(p.template.width, p.template.height) for p in video} == {(160, 120)}
+    assert video[0].is_keyframe
+
+    path = str(tmp_path / "replay.mp4")
+    assert replay.save(path) > 0
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        assert {(frame.width, frame.height) for frame in container.decode(stream)} == {(160, 120)}
@@ -0,0 +1,95 @@
+import json
+import os
+
+import av
+import pytest
+
+from src.core.segments import (
+    SegmentedWriter, StreamTemplate, ROTATE_END, ROTATE_RESOLUTION, ROTATE_SIZE, ROTATE_TIME,
+)
+
+
+def record(writer, synthetic_video, sizes, frames_per_size):
+    """Grava `frames_per_size` quadros em cada tamanho, trocando o encoder como o degrau de qualidade."""
+    video = template = None
+    index = 0
+    for size in sizes:
+        if video is not None:
+            for packet in video.flush():
+                writer.mux(template, packet)
+        video = synthetic_video(*size)
+        template = StreamTemplate.from_encoder(video.encoder)
+        if writer._container is None:
+            writer.open(template)
+        for _ in range(frames_per_size):
+            keyframe = writer.take_keyframe_request(index / 10)
+            for packet in video.encode(index, keyframe):
+                writer.mux(template, packet)
+            index += 1
+    for packet in video.flush():
+        writer.mux(template, packet)
+    writer.close()
+
+
+def frame_sizes(path):
+    """Tamanho declarado pelo stream de vídeo e os tamanhos de todos os quadros decodificados."""
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        return (stream.width, stream.height), {(frame.width, frame.height) for frame in container.decode(stream)}
+
+
+def assert_single_size(path):
+    declared, decoded = frame_sizes(path)
+    assert decoded == {declared}, f"{os.path.basename(path)}: stream {declared}, quadros {decoded}"
+
+
+def test_rotates_by_time(tmp_path, synthetic_video):
+    writer = SegmentedWriter(str(tmp_path / "gravacao.mp4"), segment_seconds=1)
+    record(writer, synthetic_video, [(160, 120)], 35)
+
+    reasons = [segment["end_reason"] for segment in writer.segments]
+    assert reasons == [ROTATE_TIME] * (len(reasons) - 1) + [ROTATE_END]
+    assert len(writer.paths) >= 3
+    assert [os.path.basename(path) for path in writer.paths[:2]] == ["gravacao_parte001.mp4", "gravacao_parte002.mp4"]
+    for segment in writer.segments[:-1]:
+        assert segment["duration"] == pytest.approx(1.0, abs=0.15)
+    for path in writer.paths:
+        assert_single_size(path)
+
+    with open(writer.manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert [segment["file"] for segment in manifest["segments"]] == [os.path.basename(p) for p in writer.paths]
+    assert all(segment["complete"] for segment in manifest["segments"])
+
+
+def test_rotates_by_size(tmp_path, synthetic_video):
+    writer = SegmentedWriter(str(tmp_path / "gravacao.mp4"), segment_bytes=30_000)
+    record(writer, synthetic_video, [(320, 240)], 40)
+
+    reasons = [segment["end_reason"] for segment in writer.segments]
+    assert len(reasons) >= 2
+    assert reasons == [ROTATE_SIZE] * (len(reasons) - 1) + [ROTATE_END]
+    for path in writer.paths:
+        assert_single_size(path)
+
+
+@pytest.mark.parametrize("segment_seconds", [0, 60], ids=["sem_limites", "com_limite_de_tempo"])
+def test_resolution_change_opens_a_new_file(tmp_path, synthetic_video, segment_seconds):
+    writer = SegmentedWriter(str(tmp_path / "gravacao.mp4"), segment_seconds=segment_seconds)
+    record(writer, synthetic_video, [(320, 240), (160, 120)], 10)
+
+    assert [segment["end_reason"] for segment in writer.segments] == [ROTATE_RESOLUTION, ROTATE_END]
+    assert [frame_sizes(path)[0] for path in writer.paths] == [(320, 240), (160, 120)]
+    for path in writer.paths:
+        assert_single_size(path)
+    assert writer.mismatched_video_packets == 0
+    assert os.path.exists(writer.manifest_path)
+
+
+def test_without_limits_keeps_the_requested_name(tmp_path, synthetic_video):
+    writer = SegmentedWriter(str(tmp_path / "gravacao.mp4"))
+    record(writer, synthetic_video, [(160, 120)], 10)
+
+    assert writer.paths == [str(tmp_path / "gravacao.mp4")]
+    assert not os.path.exists(writer.manifest_path)
+    assert_single_size(writer.paths[0])